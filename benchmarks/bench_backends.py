@@ -0,0 +1,107 @@
+# benchmarks/bench_backends.py
+
+"""
+Benchmark the inference backends (torch, torch-int8, onnx) of the embedding, sentiment and NER models on
+single-input latency, batched throughput and agreement with the fp32 outputs.
+
+Usage:
+    python -m benchmarks.bench_backends --tasks embedding sentiment ner --backends torch torch-int8 onnx
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from models import backends, nlp_models
+from utils.config import update_settings
+
+SAMPLE_SENTENCES = [
+    "The central bank raised interest rates for the third time this year",
+    "Customers complained that the new update drained their phone batteries",
+    "Satya Nadella presented the results at the Microsoft headquarters in Redmond",
+    "The film was beautifully shot but the story dragged in the second half",
+    "Researchers at Oxford published a study on sleep and memory",
+    "Delivery was fast and the packaging was excellent",
+]
+
+def make_texts(count: int, seed: int = 0) -> list:
+    """
+    Build texts of one to eight sentences.
+    """
+    rng = random.Random(seed)
+    return [". ".join(rng.choice(SAMPLE_SENTENCES) for _ in range(rng.randint(1, 8))) + "." for _ in range(count)]
+
+def run(task: str, model, texts: list, batch_size: int):
+    if task in backends.ONNX_PIPELINE_TASKS:
+        return model(texts, batch_size=batch_size)
+    return model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+def bench_backend(task: str, backend: str, texts: list, batch_size: int, reference) -> dict:
+    """
+    Load one backend of a task's default model and time it.
+    """
+    model_id = nlp_models.resolve_model_id(task)
+    options = dict(backends.DEFAULT_BACKEND_OPTIONS, backend=backend, sanity_check=False)
+    pipeline_kwargs = nlp_models.pipeline_tasks[task][1] if task in nlp_models.pipeline_tasks else None
+
+    start_time = time.perf_counter()
+    model = backends.load_with_backend(
+        task, model_id, lambda: nlp_models._load_torch_model(task, model_id), options, pipeline_kwargs
+    )
+    load_seconds = time.perf_counter() - start_time
+
+    # Warm up before timing
+    run(task, model, texts[:batch_size], batch_size)
+
+    latencies = []
+    for text in texts:
+        start_time = time.perf_counter()
+        run(task, model, [text], 1)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+
+    start_time = time.perf_counter()
+    run(task, model, texts, batch_size)
+    batch_seconds = time.perf_counter() - start_time
+
+    outputs = backends.sanity_outputs(task, model)
+    latencies.sort()
+    return {
+        "task": task,
+        "backend": backend,
+        "model": model_id,
+        "load_seconds": round(load_seconds, 2),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        "texts_per_second": round(len(texts) / batch_seconds, 1),
+        "agreement": round(backends.agreement(task, reference, outputs), 4) if reference is not None else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference backends")
+    parser.add_argument("--tasks", nargs="+", default=["embedding", "sentiment", "ner"], help="Tasks to benchmark")
+    parser.add_argument("--backends", nargs="+", default=list(backends.BACKENDS), help="Backends to compare")
+    parser.add_argument("--texts", type=int, default=200, help="Number of texts per run")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size for the throughput run")
+    args = parser.parse_args()
+
+    with open("models_config.json", "r") as file:
+        config = json.load(file)
+    update_settings(config)
+    nlp_models.configure_models(config)
+
+    texts = make_texts(args.texts)
+    results = []
+    for task in args.tasks:
+        model_id = nlp_models.resolve_model_id(task)
+        reference = backends.sanity_outputs(task, nlp_models._load_torch_model(task, model_id))
+        for backend in args.backends:
+            try:
+                results.append(bench_backend(task, backend, texts, args.batch_size, reference))
+            except RuntimeError as e:
+                results.append({"task": task, "backend": backend, "error": str(e)})
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
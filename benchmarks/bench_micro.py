@@ -0,0 +1,206 @@
+# benchmarks/bench_micro.py
+
+"""
+Micro-benchmarks of the pure-Python hot paths that every request goes through: text normalization,
+cost estimation, length bucketing, rate limiting, admission, cache keys and embedding serialization.
+
+Each case runs for at least `--seconds` after a warm-up and reports operations per second and
+microseconds per operation as JSON, so runs before and after a change can be compared directly.
+
+Usage:
+    python -m benchmarks.bench_micro --seconds 1 --cases fix_spacing rate_limit admission
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import numpy as np
+
+from benchmarks.stub_models import SAMPLE_SENTENCES
+
+def make_text(sentences: int, seed: int = 0) -> str:
+    """
+    Build a text with messy spacing from the sample sentences.
+    """
+    rng = random.Random(seed)
+    separators = [". ", ".", ".  ", ",", " ;"]
+    return "".join(rng.choice(SAMPLE_SENTENCES) + rng.choice(separators) for _ in range(sentences))
+
+def fake_request(path: str = "/embed/", api_key: str = "load-test"):
+    """
+    Build a Starlette request with an API key, as the rate limiting middleware sees it.
+    """
+    from starlette.requests import Request
+
+    return Request({
+        "type": "http", "method": "POST", "scheme": "http", "server": ("testserver", 80), "root_path": "",
+        "path": path, "query_string": b"", "client": ("127.0.0.1", 50000),
+        "headers": [(b"authorization", f"Bearer {api_key}".encode("utf-8"))],
+    })
+
+def case_fix_spacing():
+    from utils.text_processing import fix_spacing
+
+    text = make_text(10)
+    return lambda: fix_spacing(text)
+
+def case_correct_sentence_spacing():
+    from utils import text_processing
+
+    # The rule-based splitter needs no spaCy model download
+    text_processing._sentence_splitter = text_processing.load_sentence_splitter("sentencizer")
+    text = make_text(10)
+    return lambda: text_processing.correct_sentence_spacing(text)
+
+def case_estimate_tokens():
+    from utils.admission import estimate_tokens
+
+    texts = [make_text(3, seed) for seed in range(32)]
+    return lambda: estimate_tokens(texts)
+
+def case_length_buckets():
+    from utils.bucketing import length_buckets
+
+    rng = random.Random(0)
+    lengths = [rng.randint(8, 512) for _ in range(256)]
+    return lambda: length_buckets(lengths, 32, 16384)
+
+def case_sliding_window():
+    from utils.throttling import _acquire
+
+    state = [None]
+    clock = [0.0]
+
+    def run():
+        clock[0] += 0.001
+        state[0] = _acquire(state[0], 1_000_000, 60, clock[0])[3]
+    return run
+
+def case_rate_limit():
+    from utils.throttling import AdaptiveThrottling
+
+    throttler = AdaptiveThrottling(options={"default": {"limit": 10 ** 12, "window_seconds": 60}})
+    request = fake_request()
+    return lambda: throttler.check_rate_limit(request)
+
+def case_admission():
+    from utils.admission import AdmissionQueue
+
+    queue = AdmissionQueue("micro", max_concurrent=4, max_queue=64)
+
+    async def run():
+        await queue.acquire(10.0, 1)
+        queue.release(10.0, 0.001)
+    return run
+
+def case_result_cache_key():
+    from utils.result_cache import ResultCache
+
+    text = make_text(10)
+    params = {"num_keywords": 5, "use_mmr": False, "diversity": 0.5}
+    return lambda: ResultCache.make_key("extract_keywords", "all-MiniLM-L6-v2", params, text)
+
+def case_result_cache_hit():
+    from utils.result_cache import ResultCache
+
+    cache = ResultCache()
+    key = ResultCache.make_key("sentiment", "model", {}, make_text(3))
+    cache.put(key, [{"label": "POSITIVE", "score": 0.98}])
+    return lambda: cache.get(key)
+
+def case_embedding_cache_hit():
+    from utils.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache()
+    texts = [make_text(2, seed) for seed in range(8)]
+    cache.put_many("model", texts, np.random.default_rng(0).random((8, 384), dtype=np.float32))
+    return lambda: cache.get_many("model", texts)
+
+def case_embedding_json():
+    from utils.embedding_response import ORJSONNumpyResponse, prepare_embeddings
+
+    embeddings = np.random.default_rng(0).random((16, 384), dtype=np.float32)
+    response = ORJSONNumpyResponse(content=None)
+    return lambda: response.render({"data": prepare_embeddings(embeddings, normalize_embeddings=True)})
+
+def case_embedding_base64():
+    from utils.embedding_response import encode_base64
+
+    embedding = np.random.default_rng(0).random(384, dtype=np.float32)
+    return lambda: encode_base64(embedding)
+
+CASES = {
+    "fix_spacing": case_fix_spacing,
+    "correct_sentence_spacing": case_correct_sentence_spacing,
+    "estimate_tokens": case_estimate_tokens,
+    "length_buckets": case_length_buckets,
+    "sliding_window": case_sliding_window,
+    "rate_limit": case_rate_limit,
+    "admission": case_admission,
+    "result_cache_key": case_result_cache_key,
+    "result_cache_hit": case_result_cache_hit,
+    "embedding_cache_hit": case_embedding_cache_hit,
+    "embedding_json": case_embedding_json,
+    "embedding_base64": case_embedding_base64,
+}
+
+async def _repeat_async(fn, count: int):
+    for _ in range(count):
+        await fn()
+
+def _probe(fn):
+    # Functions that return coroutines (like check_rate_limit bound in a lambda) are timed as async
+    result = fn()
+    if asyncio.iscoroutine(result):
+        result.close()
+    return result
+
+def measure(fn, seconds: float) -> dict:
+    """
+    Time a function, or an async function, in growing rounds until one round takes at least `seconds`.
+    """
+    is_async = asyncio.iscoroutine(_probe(fn))
+    loop = asyncio.new_event_loop() if is_async else None
+
+    def run(count):
+        start_time = time.perf_counter()
+        if is_async:
+            loop.run_until_complete(_repeat_async(fn, count))
+        else:
+            for _ in range(count):
+                fn()
+        return time.perf_counter() - start_time
+
+    try:
+        run(10)  # Warm up
+        count = 100
+        elapsed = run(count)
+        while elapsed < seconds:
+            count = int(count * min(10.0, max(2.0, 1.2 * seconds / max(elapsed, 1e-9))))
+            elapsed = run(count)
+    finally:
+        if loop is not None:
+            loop.close()
+    return {
+        "ops_per_second": round(count / elapsed, 1),
+        "us_per_op": round(elapsed / count * 1e6, 3),
+        "iterations": count,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the request hot paths")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="Cases to run")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Minimum timed duration of each case")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.cases:
+        results[name] = measure(CASES[name](), args.seconds)
+        print(f"{name}: {results[name]['us_per_op']} us/op", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
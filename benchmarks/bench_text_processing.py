@@ -0,0 +1,102 @@
+# benchmarks/bench_text_processing.py
+
+"""
+Micro-benchmark comparing the original correct_sentence_spacing (full en_core_web_sm pipeline and
+per-call regular expressions) with the current implementation, on throughput and output equivalence.
+
+Usage:
+    python -m benchmarks.bench_text_processing --texts 500 --splitter senter
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+import spacy
+from utils import text_processing
+
+SAMPLE_SENTENCES = [
+    "The U.S. economy grew faster than expected in the third quarter",
+    "Analysts at J.P. Morgan said the results were strong,but cautioned about inflation",
+    "Dr. Smith arrived at 9 a.m.and met with the board",
+    "Is this the right approach?Many engineers think so;others disagree",
+    "Prices rose 3.5% year over year , according to the report",
+    "She said:we will ship the feature next week!",
+    "The model was trained on 1,000,000 examples from the corpus",
+    "Mr. Jones works at I.B.M. in New York",
+]
+
+def legacy_correct_sentence_spacing(nlp, text: str) -> str:
+    """
+    The original implementation: full pipeline parse and regular expressions rebuilt on every call.
+    """
+    doc = nlp(text)
+    sentences = [sent.text.strip() for sent in doc.sents]
+    corrected_text = " ".join(sentences)
+    corrected_text = re.sub(r",(\S)", r", \1", corrected_text)
+    corrected_text = re.sub(r"(\.\s*)([A-Za-z])", r". \2", corrected_text)
+    corrected_text = re.sub(r"([!?,;:])(\S)", r"\1 \2", corrected_text)
+    corrected_text = re.sub(r"\s{2,}", " ", corrected_text)
+    corrected_text = corrected_text.strip()
+    abbreviations = ["U\\.", "I\\.", "P\\.", "R\\.", "B\\.", "O\\.", "S\\.", "J\\.", "A\\."]
+    abbrev_pattern = "|".join(abbreviations)
+    corrected_text = re.sub(rf"\b({abbrev_pattern})\b", lambda m: m.group(0).replace(" ", ""), corrected_text)
+    corrected_text = re.sub(rf"(\b{abbrev_pattern})\s+(\b{abbrev_pattern})", r"\1\2", corrected_text)
+    corrected_text = re.sub(rf"\s({abbrev_pattern})", r" \1", corrected_text)
+    return corrected_text
+
+def make_texts(count: int, seed: int = 0) -> list:
+    """
+    Build texts of varying length with messy spacing and punctuation.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        sentences = [rng.choice(SAMPLE_SENTENCES) for _ in range(rng.randint(1, 30))]
+        separators = [rng.choice([". ", ".", ".  ", ".\n", ". \n\n"]) for _ in sentences]
+        texts.append("".join(s + sep for s, sep in zip(sentences, separators)))
+    return texts
+
+def measure(fn, texts: list) -> float:
+    start_time = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark correct_sentence_spacing")
+    parser.add_argument("--texts", type=int, default=500, help="Number of texts to process")
+    parser.add_argument("--splitter", type=str, default="senter", help="Sentence splitter: senter, sentencizer or parser")
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+    legacy_nlp = spacy.load("en_core_web_sm")
+    text_processing._sentence_splitter = text_processing.load_sentence_splitter(args.splitter)
+
+    # Warm up both pipelines before timing
+    legacy_correct_sentence_spacing(legacy_nlp, texts[0])
+    text_processing.correct_sentence_spacing(texts[0])
+
+    legacy_seconds = measure(lambda text: legacy_correct_sentence_spacing(legacy_nlp, text), texts)
+    current_seconds = measure(text_processing.correct_sentence_spacing, texts)
+
+    identical = sum(
+        legacy_correct_sentence_spacing(legacy_nlp, text) == text_processing.correct_sentence_spacing(text)
+        for text in texts
+    )
+    characters = sum(len(text) for text in texts)
+
+    print(json.dumps({
+        "texts": len(texts),
+        "characters": characters,
+        "splitter": args.splitter,
+        "legacy_texts_per_second": round(len(texts) / legacy_seconds, 1),
+        "current_texts_per_second": round(len(texts) / current_seconds, 1),
+        "speedup": round(legacy_seconds / current_seconds, 2),
+        "identical_outputs": identical,
+        "equivalence_ratio": round(identical / len(texts), 4),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
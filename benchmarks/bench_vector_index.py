@@ -0,0 +1,89 @@
+# benchmarks/bench_vector_index.py
+
+"""
+Benchmark the vector index on synthetic clustered embeddings: exact search latency, then recall@k
+against exact search and latency of IVF search at several nprobe values.
+
+Usage:
+    python -m benchmarks.bench_vector_index --rows 1000000 --dimensions 384 --nprobe 4 8 16 32 64
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import numpy as np
+from utils.vector_index import DEFAULT_INDEX_OPTIONS, VectorIndex, normalize_rows
+
+def make_vectors(rows: int, dimensions: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """
+    Build unit vectors scattered around random cluster centres, like embeddings of related documents.
+    """
+    rng = np.random.default_rng(seed)
+    centres = normalize_rows(rng.normal(size=(clusters, dimensions)))
+    vectors = np.empty((rows, dimensions), dtype=np.float32)
+    for start in range(0, rows, 65536):
+        end = min(start + 65536, rows)
+        labels = rng.integers(0, clusters, size=end - start)
+        vectors[start:end] = centres[labels] + 0.6 * rng.normal(size=(end - start, dimensions)) / np.sqrt(dimensions)
+    return normalize_rows(vectors)
+
+def timed_search(collection, queries: np.ndarray, k: int, mode: str, nprobe: int = None):
+    latencies, results = [], []
+    for query in queries:
+        start_time = time.perf_counter()
+        results.append([row_id for row_id, _ in collection.search(query, k, mode, nprobe)[0]])
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    latencies.sort()
+    return results, {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact and IVF vector search")
+    parser.add_argument("--rows", type=int, default=200000, help="Vectors in the collection")
+    parser.add_argument("--dimensions", type=int, default=384, help="Vector size")
+    parser.add_argument("--clusters", type=int, default=1000, help="Clusters in the synthetic data")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Matches per query")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default about 4 * sqrt(rows))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64], help="IVF lists scanned per query")
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.rows, args.dimensions, args.clusters)
+    queries = make_vectors(args.queries, args.dimensions, args.clusters, seed=1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = VectorIndex(dict(DEFAULT_INDEX_OPTIONS, directory=directory))
+        collection = index.get_or_create("bench", args.dimensions, "synthetic")
+
+        start_time = time.perf_counter()
+        for start in range(0, args.rows, 10000):
+            collection.add([str(i) for i in range(start, min(start + 10000, args.rows))], vectors[start:start + 10000])
+        add_seconds = time.perf_counter() - start_time
+
+        exact, exact_latency = timed_search(collection, queries, args.k, "exact")
+        results = [{"mode": "exact", "recall": 1.0, **exact_latency}]
+
+        start_time = time.perf_counter()
+        ivf = collection.build_ivf(args.nlist)
+        build_seconds = time.perf_counter() - start_time
+
+        for nprobe in args.nprobe:
+            approximate, latency = timed_search(collection, queries, args.k, "approximate", nprobe)
+            recall = statistics.mean(len(set(a) & set(e)) / len(e) for a, e in zip(approximate, exact))
+            results.append({"mode": "approximate", "nprobe": nprobe, "recall": round(recall, 4), **latency})
+
+    print(json.dumps({
+        "rows": args.rows,
+        "dimensions": args.dimensions,
+        "add_rows_per_second": round(args.rows / add_seconds, 1),
+        "ivf_build_seconds": round(build_seconds, 2),
+        "ivf": ivf,
+        "results": results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# benchmarks/load_test.py
+
+"""
+Offline load test: run the FastAPI app in-process on tiny stand-in models and drive every endpoint at a
+configurable concurrency and payload-size mix, reporting p50/p95/p99 latency, throughput, status codes
+and peak RSS as JSON.
+
+The stand-in models (benchmarks/stub_models.py) are built locally with random weights, so no network
+access or model download is needed. Absolute numbers measure the service's own overhead (validation,
+normalization, tokenization, batching, pools and serialization) rather than real model cost; compare
+runs on the same machine to catch regressions.
+
+Usage:
+    python -m benchmarks.load_test --requests 200 --concurrency 16 --mix short:0.6,medium:0.3,long:0.1
+    python -m benchmarks.load_test --endpoints embed sentiment --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+API_KEY = "load-test"
+# The API key is read when utils.auth is imported, so set it before the app is imported
+os.environ["API_KEY"] = API_KEY
+
+from benchmarks.stub_models import SAMPLE_SENTENCES, build_stub_models, install_stub_models
+
+# Sentences per text for each payload size
+PAYLOAD_SIZES = {"short": (1, 2), "medium": (5, 10), "long": (30, 45)}
+DEFAULT_MIX = "short:0.6,medium:0.3,long:0.1"
+
+COLLECTION = "load-test"
+
+def parse_mix(mix: str) -> list:
+    """
+    Parse a payload mix such as "short:0.6,medium:0.3,long:0.1" into (size, weight) pairs.
+    """
+    pairs = []
+    for part in mix.split(","):
+        size, _, weight = part.partition(":")
+        if size not in PAYLOAD_SIZES:
+            raise ValueError(f"Unknown payload size {size}; expected one of {', '.join(PAYLOAD_SIZES)}.")
+        pairs.append((size, float(weight or 1)))
+    return pairs
+
+class PayloadGenerator:
+    def __init__(self, mix: list, duplicate_ratio: float = 0.0, seed: int = 0):
+        """
+        Initialize the PayloadGenerator class, which builds request texts of mixed sizes.
+
+        Texts are unique unless `duplicate_ratio` asks for repeats, so caches only help when intended.
+
+        Args:
+            mix (list): (size, weight) pairs from `parse_mix`.
+            duplicate_ratio (float): The share of texts that repeat an earlier one.
+            seed (int): The random seed.
+        """
+        self.sizes = [size for size, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.duplicate_ratio = duplicate_ratio
+        self.rng = random.Random(seed)
+        self.issued = []
+
+    def text(self) -> str:
+        if self.issued and self.rng.random() < self.duplicate_ratio:
+            return self.rng.choice(self.issued)
+        size = self.rng.choices(self.sizes, self.weights)[0]
+        low, high = PAYLOAD_SIZES[size]
+        sentences = [self.rng.choice(SAMPLE_SENTENCES) for _ in range(self.rng.randint(low, high))]
+        text = f"Report {len(self.issued)}. " + ". ".join(sentences) + "."
+        self.issued.append(text)
+        return text
+
+# Each endpoint maps a generator and a request number to (method, path, keyword arguments of the request)
+ENDPOINTS = {
+    "embed": lambda gen, i: ("POST", "/embed/", {"json": {"text": gen.text()}}),
+    "v1_embeddings": lambda gen, i: (
+        "POST", "/v1/embeddings/", {"json": {"input": [gen.text() for _ in range(4)], "model": "all-MiniLM-L6-v2"}}
+    ),
+    "sentiment": lambda gen, i: ("POST", "/sentiment/", {"json": {"text": gen.text()}}),
+    "entities": lambda gen, i: ("POST", "/entities/", {"json": {"text": gen.text()}}),
+    "extract_keywords": lambda gen, i: ("POST", "/extract_keywords/", {"json": {"text": gen.text()}}),
+    "extract_keywords_batch": lambda gen, i: (
+        "POST", "/extract_keywords/batch", {"json": {"texts": [gen.text() for _ in range(4)]}}
+    ),
+    "summarize": lambda gen, i: ("POST", "/summarize/", {"json": {"text": gen.text()}}),
+    "paraphrase": lambda gen, i: ("POST", "/paraphrase/", {"json": {"text": gen.text()}}),
+    "analyze": lambda gen, i: (
+        "POST", "/analyze/", {"json": {"text": gen.text(), "tasks": ["sentiment", "entities", "keywords", "embedding"]}}
+    ),
+    "tokenize": lambda gen, i: ("POST", "/tokenize/", {"json": {"text": gen.text(), "return_offsets": True}}),
+    "detokenize": lambda gen, i: ("POST", "/detokenize/", {"json": {"tokens": [[5 + (i + j) % 250 for j in range(32)]] * 4}}),
+    "similarity_add": lambda gen, i: (
+        "POST", f"/similarity/collections/{COLLECTION}/documents",
+        {"json": {"documents": [{"id": f"doc-{i}-{j}", "text": gen.text()} for j in range(4)]}},
+    ),
+    "similarity_query": lambda gen, i: (
+        "POST", f"/similarity/collections/{COLLECTION}/query", {"json": {"text": gen.text(), "top_k": 10}}
+    ),
+    "ready": lambda gen, i: ("GET", "/ready", {}),
+    "metrics": lambda gen, i: ("GET", "/metrics", {}),
+    # Jobs run in the background on a single worker; this measures submission only
+    "jobs": lambda gen, i: (
+        "POST", "/jobs/embeddings",
+        {"content": "\n".join(json.dumps({"id": f"{i}-{j}", "text": gen.text()}) for j in range(16)).encode("utf-8")},
+    ),
+}
+
+def load_config(work_dir: str, rate_limit: int, summary_length: int) -> dict:
+    """
+    Load models_config.json, adjusted so the load test runs offline and leaves no files in the repository.
+    """
+    with open("models_config.json", "r") as file:
+        config = json.load(file)
+    # The rule-based splitter needs no spaCy model download
+    config.setdefault("text_normalization", {})["sentence_splitter"] = "sentencizer"
+    # Measure the service, not the rate limiter's rejections
+    config["rate_limits"] = dict(config.get("rate_limits", {}), backend="memory", routes={},
+                                 default={"limit": rate_limit, "window_seconds": 60})
+    config["summarization"] = dict(config.get("summarization", {}), max_length=summary_length,
+                                   min_length=min(8, summary_length))
+    config["bulk_embedding"] = dict(config.get("bulk_embedding", {}), jobs_dir=os.path.join(work_dir, "jobs"),
+                                    input_dir=os.path.join(work_dir, "inputs"))
+    config["vector_index"] = dict(config.get("vector_index", {}), directory=os.path.join(work_dir, "collections"))
+    return config
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Return a percentile of sorted values, interpolating between the nearest ranks.
+    """
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+def peak_rss_mb() -> float:
+    """
+    Return the peak resident set size of this process; Linux reports it in KiB, macOS in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def drive(client, name: str, requests: int, concurrency: int, generator: PayloadGenerator) -> dict:
+    """
+    Send `requests` requests to one endpoint with at most `concurrency` in flight, and summarize the latencies.
+    """
+    build = ENDPOINTS[name]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+
+    async def one(i):
+        method, path, kwargs = build(generator, i)
+        async with semaphore:
+            start_time = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                await response.aread()
+                statuses[str(response.status_code)] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - start_time) * 1000)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start_time
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "statuses": dict(statuses),
+        "throughput_rps": round(requests / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+async def run(args, app) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {API_KEY}"}
+    generator = PayloadGenerator(parse_mix(args.mix), args.duplicate_ratio, args.seed)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", headers=headers,
+                                 timeout=args.timeout) as client:
+        if "similarity_query" in args.endpoints:
+            # Give queries a collection to search
+            for i in range(args.collection_size // 64):
+                documents = [{"id": f"seed-{i}-{j}", "text": generator.text()} for j in range(64)]
+                await client.post(f"/similarity/collections/{COLLECTION}/documents", json={"documents": documents})
+
+        for name in args.endpoints:
+            # A few sequential requests first, so lazily loaded models and pools are warm before timing
+            await drive(client, name, args.warmup, 1, generator)
+            results[name] = await drive(client, name, args.requests, args.concurrency, generator)
+            print(f"{name}: p50 {results[name]['p50_ms']} ms, {results[name]['throughput_rps']} req/s", file=sys.stderr)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of every endpoint on stand-in models")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS),
+                        help="Endpoints to drive, in order")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per endpoint before timing")
+    parser.add_argument("--mix", type=str, default=DEFAULT_MIX, help="Payload sizes and weights, e.g. short:0.6,medium:0.3,long:0.1")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0, help="Share of texts that repeat an earlier one")
+    parser.add_argument("--collection-size", type=int, default=1024, help="Documents added before similarity queries")
+    parser.add_argument("--summary-length", type=int, default=64, help="Maximum summary tokens generated")
+    parser.add_argument("--rate-limit", type=int, default=10_000_000, help="Requests per minute before 429")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request timeout in seconds")
+    parser.add_argument("--models-dir", type=str, default="benchmarks/.stub_models", help="Where the stand-in models are built")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the payloads")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    from models import nlp_models
+    from utils.config import update_settings
+
+    paths = build_stub_models(args.models_dir)
+    with tempfile.TemporaryDirectory(prefix="load-test-") as work_dir:
+        config = load_config(work_dir, args.rate_limit, args.summary_length)
+        # Import the app and set it up the way its startup event would, without parsing this script's arguments
+        import main as service
+        update_settings(config)
+        install_stub_models(config, paths)
+        nlp_models.configure_models(config)
+        start_time = time.perf_counter()
+        service.warm_up()
+        warm_up_seconds = time.perf_counter() - start_time
+        rss_after_warm_up = peak_rss_mb()
+
+        results = asyncio.run(run(args, service.app))
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "duplicate_ratio": args.duplicate_ratio,
+        },
+        "warm_up_seconds": round(warm_up_seconds, 2),
+        "rss_after_warm_up_mb": rss_after_warm_up,
+        "peak_rss_mb": peak_rss_mb(),
+        "endpoints": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# benchmarks/stub_models.py
+
+"""
+Tiny random-weight stand-ins for the service's models, built locally so benchmarks run without network access.
+
+Every task gets a model of the right architecture and a WordPiece (BERT) or Unigram (T5) tokenizer
+trained on generated text. The outputs are meaningless; the models exist so the request path
+(tokenization, batching, pools, serialization) can be timed end to end.
+
+Usage:
+    python -m benchmarks.stub_models --directory benchmarks/.stub_models
+"""
+
+import argparse
+import os
+import random
+
+SAMPLE_SENTENCES = [
+    "The central bank raised interest rates for the third time this year",
+    "Customers complained that the new update drained their phone batteries",
+    "Satya Nadella presented the results at the Microsoft headquarters in Redmond",
+    "The film was beautifully shot but the story dragged in the second half",
+    "Researchers at Oxford published a study on sleep and memory",
+    "Delivery was fast and the packaging was excellent",
+    "Angela Merkel met Emmanuel Macron in Berlin to discuss the European budget",
+    "The U.S. economy grew faster than expected in the third quarter",
+]
+
+# Labels of the stand-in classifiers
+SENTIMENT_LABELS = ["NEGATIVE", "POSITIVE"]
+NER_LABELS = ["O", "B-PER", "I-PER", "B-ORG", "I-ORG", "B-LOC", "I-LOC", "B-MISC", "I-MISC"]
+
+# Architecture of every stand-in: small enough to build in seconds and run on one CPU core
+HIDDEN_SIZE = 64
+LAYERS = 2
+HEADS = 4
+VOCAB_SIZE = 2000
+MAX_POSITIONS = 512
+
+def make_corpus(lines: int = 2000, seed: int = 0) -> list:
+    """
+    Build training text for the tokenizers from the sample sentences and random words.
+    """
+    rng = random.Random(seed)
+    words = " ".join(SAMPLE_SENTENCES).split()
+    corpus = list(SAMPLE_SENTENCES)
+    for _ in range(lines):
+        corpus.append(" ".join(rng.choice(words) for _ in range(rng.randint(5, 30))))
+    return corpus
+
+def build_bert_tokenizer(corpus: list):
+    """
+    Train a WordPiece tokenizer with BERT's special tokens.
+    """
+    from tokenizers import Tokenizer, decoders, models, normalizers, pre_tokenizers, processors, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.WordPiece(unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=False)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.decoder = decoders.WordPiece()
+    special_tokens = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    tokenizer.train_from_iterator(corpus, trainers.WordPieceTrainer(vocab_size=VOCAB_SIZE, special_tokens=special_tokens))
+    cls_id, sep_id = tokenizer.token_to_id("[CLS]"), tokenizer.token_to_id("[SEP]")
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B:1 [SEP]:1",
+        special_tokens=[("[CLS]", cls_id), ("[SEP]", sep_id)],
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, model_max_length=MAX_POSITIONS, unk_token="[UNK]", pad_token="[PAD]",
+        cls_token="[CLS]", sep_token="[SEP]", mask_token="[MASK]", clean_up_tokenization_spaces=True,
+    )
+
+def build_t5_tokenizer(corpus: list):
+    """
+    Train a Unigram tokenizer with T5's special tokens, appending </s> to every input.
+    """
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, processors, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.Unigram())
+    tokenizer.pre_tokenizer = pre_tokenizers.Metaspace()
+    tokenizer.decoder = decoders.Metaspace()
+    special_tokens = ["<pad>", "</s>", "<unk>"]
+    tokenizer.train_from_iterator(
+        corpus, trainers.UnigramTrainer(vocab_size=VOCAB_SIZE, special_tokens=special_tokens, unk_token="<unk>")
+    )
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="$A </s>", pair="$A </s> $B </s>", special_tokens=[("</s>", tokenizer.token_to_id("</s>"))]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, model_max_length=MAX_POSITIONS, unk_token="<unk>", pad_token="<pad>", eos_token="</s>",
+        clean_up_tokenization_spaces=True,
+        # Like T5's own tokenizer; generate() rejects token_type_ids
+        model_input_names=["input_ids", "attention_mask"],
+    )
+
+def _bert_config(tokenizer, **kwargs):
+    from transformers import BertConfig
+
+    return BertConfig(
+        vocab_size=len(tokenizer), hidden_size=HIDDEN_SIZE, num_hidden_layers=LAYERS, num_attention_heads=HEADS,
+        intermediate_size=HIDDEN_SIZE * 4, max_position_embeddings=MAX_POSITIONS, pad_token_id=tokenizer.pad_token_id,
+        **kwargs,
+    )
+
+def _labels(names: list) -> dict:
+    return {"id2label": dict(enumerate(names)), "label2id": {name: i for i, name in enumerate(names)}}
+
+def build_stub_models(directory: str, seed: int = 0) -> dict:
+    """
+    Build the stand-in models under a directory, skipping those already built.
+
+    Returns:
+        dict: The model directory of each task.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer, models as st_models
+    from transformers import BertForSequenceClassification, BertForTokenClassification, BertModel, T5Config, T5ForConditionalGeneration
+
+    torch.manual_seed(seed)
+    paths = {
+        "bert": os.path.join(directory, "bert"),
+        "embedding": os.path.join(directory, "embedding"),
+        "sentiment": os.path.join(directory, "sentiment"),
+        "ner": os.path.join(directory, "ner"),
+        "t5": os.path.join(directory, "t5"),
+    }
+    if all(os.path.exists(os.path.join(path, "config.json")) for path in paths.values()):
+        return stub_model_paths(directory)
+
+    corpus = make_corpus(seed=seed)
+    bert_tokenizer = build_bert_tokenizer(corpus)
+    t5_tokenizer = build_t5_tokenizer(corpus)
+
+    BertModel(_bert_config(bert_tokenizer)).save_pretrained(paths["bert"])
+    bert_tokenizer.save_pretrained(paths["bert"])
+    transformer = st_models.Transformer(paths["bert"], max_seq_length=256)
+    pooling = st_models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    SentenceTransformer(modules=[transformer, pooling, st_models.Normalize()]).save(paths["embedding"])
+
+    BertForSequenceClassification(_bert_config(bert_tokenizer, **_labels(SENTIMENT_LABELS))).save_pretrained(paths["sentiment"])
+    bert_tokenizer.save_pretrained(paths["sentiment"])
+    BertForTokenClassification(_bert_config(bert_tokenizer, **_labels(NER_LABELS))).save_pretrained(paths["ner"])
+    bert_tokenizer.save_pretrained(paths["ner"])
+
+    t5_config = T5Config(
+        vocab_size=len(t5_tokenizer), d_model=HIDDEN_SIZE, d_kv=HIDDEN_SIZE // HEADS, d_ff=HIDDEN_SIZE * 4,
+        num_layers=LAYERS, num_heads=HEADS, pad_token_id=t5_tokenizer.pad_token_id,
+        eos_token_id=t5_tokenizer.eos_token_id, decoder_start_token_id=t5_tokenizer.pad_token_id,
+    )
+    T5ForConditionalGeneration(t5_config).save_pretrained(paths["t5"])
+    t5_tokenizer.save_pretrained(paths["t5"])
+    return stub_model_paths(directory)
+
+def stub_model_paths(directory: str) -> dict:
+    """
+    Return the model directory that stands in for each task.
+    """
+    return {
+        "embedding": os.path.join(directory, "embedding"),
+        "keyword": os.path.join(directory, "embedding"),
+        "sentiment": os.path.join(directory, "sentiment"),
+        "ner": os.path.join(directory, "ner"),
+        "summarization": os.path.join(directory, "t5"),
+        "paraphrase": os.path.join(directory, "t5"),
+    }
+
+def install_stub_models(config: dict, paths: dict):
+    """
+    Point each task's configured model name at its stand-in, so requests that name the default models still resolve.
+    """
+    from models import nlp_models
+
+    for task, (config_key, _) in nlp_models.task_config.items():
+        model_name = config.get(config_key, "all-MiniLM-L6-v2")
+        nlp_models.supported_models[task][model_name] = paths[task]
+    # Several endpoints default to all-MiniLM-L6-v2 by name
+    nlp_models.supported_models["embedding"]["all-MiniLM-L6-v2"] = paths["embedding"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Build tiny stand-in models for offline benchmarks")
+    parser.add_argument("--directory", type=str, default="benchmarks/.stub_models", help="Where to save the models")
+    args = parser.parse_args()
+    for task, path in build_stub_models(args.directory).items():
+        print(f"{task}: {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Bulk embedding jobs from the command line.
+
+    python embed_jobs.py run records.jsonl --text-field body
+    python embed_jobs.py resume <job_id>
+    python embed_jobs.py status <job_id>
+
+Jobs run in the foreground and share their job directory with the /jobs API, so a job started either way
+can be inspected or resumed from the other.
+"""
+import argparse
+import json
+import sys
+from models.nlp_models import configure_models
+from utils.bulk_embedding import create_job, job_status, run_job
+from utils.config import update_settings
+
+def load_config():
+    """
+    Load model configuration from a JSON file.
+    """
+    with open("models_config.json", "r") as file:
+        return json.load(file)
+
+def print_progress(state):
+    print(f"{state['next_record']}/{state['total']} records ({state.get('records_per_second')} records/s)")
+
+def parse_arguments():
+    """
+    Parse the subcommand and its options.
+    """
+    parser = argparse.ArgumentParser(description="Run bulk embedding jobs")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    run = subcommands.add_parser("run", help="Embed a JSONL or text file")
+    run.add_argument("input", type=str, help="Path to the input file")
+    run.add_argument("--format", choices=["jsonl", "text"], default="jsonl", help="One JSON object or one text per line")
+    run.add_argument("--model", type=str, help="Specify embedding model")
+    run.add_argument("--text-field", type=str, default="text", help="JSONL field holding the text")
+    run.add_argument("--id-field", type=str, default="id", help="JSONL field holding the record ID")
+
+    for name, description in (("resume", "Resume a job from its last checkpoint"), ("status", "Show a job's progress")):
+        subcommand = subcommands.add_parser(name, help=description)
+        subcommand.add_argument("job_id", type=str, help="The job ID")
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    config = load_config()
+    update_settings(config)
+    configure_models(config)
+
+    if args.command == "status":
+        print(json.dumps(job_status(args.job_id), indent=2))
+        return 0
+
+    if args.command == "run":
+        job_id = create_job(args.input, args.format, args.model, args.text_field, args.id_field)["job_id"]
+        print(f"Started job {job_id}")
+    else:
+        job_id = args.job_id
+
+    try:
+        state = run_job(job_id, progress=print_progress)
+    except RuntimeError as e:
+        # The server or another run is working on the job
+        print(e)
+        return 1
+    except KeyboardInterrupt:
+        # The last checkpoint is already on disk
+        print(f"Interrupted; resume with: python embed_jobs.py resume {job_id}")
+        return 130
+    print(json.dumps(job_status(job_id), indent=2))
+    return 0 if state["state"] == "completed" else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# gunicorn_conf.py
+
+"""
+Multi-worker serving with Gunicorn and Uvicorn workers, sharing model weights across workers.
+
+    gunicorn -c gunicorn_conf.py main:app
+
+The app and its eagerly loaded models are loaded once in the master process before it forks. Workers then
+share the weight pages copy-on-write instead of each loading their own copy. Settings come from the
+environment:
+
+    WEB_CONCURRENCY   number of workers (default 2)
+    TORCH_THREADS     torch intra-op threads per worker (default: CPU cores divided by workers)
+    PORT              listening port (default 5000)
+    PRELOAD_MODELS    set to 0 to load models in each worker instead
+    PROMETHEUS_MULTIPROC_DIR
+                      where workers share request and stage metrics (default: a directory under the system
+                      temporary directory, emptied at startup)
+
+Check how much memory the workers share with `python memory_report.py`.
+
+Workers share what must be consistent across them, so any WEB_CONCURRENCY is safe:
+
+    rate_limits       the default "auto" backend keeps counters in SQLite when there are several workers
+    vector_index      writes to a collection hold an exclusive file lock and searches a shared one; each
+                      worker reloads what the others changed
+    bulk_embedding    a job's lock file keeps it queued or running in one worker, and a cancel file stops it
+                      from any worker
+    /metrics          request and stage metrics are merged from PROMETHEUS_MULTIPROC_DIR
+
+Caches, micro-batchers, executor pools and admission queues are per worker by design: their limits apply to
+each worker, and /diagnostics and the scrape-time /metrics statistics describe the worker that answers.
+"""
+
+import gc
+import os
+import tempfile
+
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# The app reads the worker count, e.g. to share rate limit counters between workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+# Model loading happens in the master, so workers only need the default boot time
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+preload_app = os.getenv("PRELOAD_MODELS", "1") != "0"
+# main.py loads the models at import when PRELOAD_MODELS is set, which preload_app does in the master
+os.environ["PRELOAD_MODELS"] = "1" if preload_app else "0"
+
+# Workers split the cores between them rather than each starting one thread per core
+torch_threads = int(os.getenv("TORCH_THREADS", max(1, (os.cpu_count() or 1) // workers)))
+
+# Request and stage metrics are written to files in this directory by every worker, so /metrics reports them
+# for the whole server whichever worker answers. It is set before the app is imported, and emptied so counts
+# from an earlier run do not carry over
+prometheus_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"llm-services-prometheus-{os.getpid()}")
+)
+os.makedirs(prometheus_dir, exist_ok=True)
+for name in os.listdir(prometheus_dir):
+    if name.endswith(".db"):
+        os.remove(os.path.join(prometheus_dir, name))
+
+if preload_app:
+    # The master runs inference only to check optimized backends while loading. A single thread keeps it from
+    # starting an OpenMP thread pool, which does not survive fork; workers set their own thread count
+    os.environ["OMP_NUM_THREADS"] = "1"
+    os.environ["MKL_NUM_THREADS"] = "1"
+
+def when_ready(server):
+    """
+    Freeze the objects created while preloading, before the first worker is forked.
+
+    Frozen objects are skipped by the garbage collector, so collections in the workers do not write to
+    their headers and copy the shared pages.
+    """
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+        server.log.info(f"Preloaded app; {gc.get_freeze_count()} objects frozen")
+
+def post_fork(server, worker):
+    """
+    Give each worker its share of the torch threads.
+    """
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    server.log.info(f"Worker {worker.pid} using {torch_threads} torch threads")
+
+def child_exit(server, worker):
+    """
+    Drop an exited worker's live metric files, so its gauges are not reported after it is gone.
+    """
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -8,18 +8,25 @@ and embedding generation.
 """
 
 import argparse
+import asyncio
 import json
+import os
 import sys
-from fastapi import FastAPI, Depends, Request
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from utils.middleware import add_security_headers
 from utils.auth import get_api_key  
-from routers import summarization, sentiment, entities, paraphrase, keywords, embedding, openai_compatible_embedding, tokenize, detokenize
-from models.nlp_models import load_models
+from routers import summarization, sentiment, entities, paraphrase, keywords, embedding, openai_compatible_embedding, tokenize, detokenize, diagnostics, analyze, health, metrics, jobs, similarity
+from models.nlp_models import configure_models, load_eager_models, unload_idle_models, ModelUnavailableError
 from utils.throttling import AdaptiveThrottling
+from utils.config import update_settings
+from utils.executors import shutdown_pools
+from utils.text_processing import get_sentence_splitter
+from utils.metrics import TimedJSONResponse, record_request_metrics, register_collectors
 
-# Initialize the FastAPI app with global API key dependency
-app = FastAPI(dependencies=[Depends(get_api_key)])
+# Initialize the FastAPI app with global API key dependency; JSON responses record their serialization time
+app = FastAPI(dependencies=[Depends(get_api_key)], default_response_class=TimedJSONResponse)
 
 # Initialize Adaptive Throttling
 throttler = AdaptiveThrottling()
@@ -40,7 +47,11 @@ app.middleware("http")(add_security_headers)
 @app.middleware("http")
 async def adaptive_throttling_middleware(request: Request, call_next):
     client_ip = request.client.host
-    await throttler.check_rate_limit(request)
+    try:
+        rate_limit_headers = await throttler.check_rate_limit(request)
+    except HTTPException as e:
+        # Exceptions raised in middleware bypass the app's exception handlers, so build the 429 here
+        return JSONResponse(status_code=e.status_code, content={"detail": e.detail}, headers=e.headers)
 
     try:
         response = await call_next(request)
@@ -49,8 +60,13 @@ async def adaptive_throttling_middleware(request: Request, call_next):
         throttler.record_error(client_ip)
         raise e
 
+    response.headers.update(rate_limit_headers)
     return response
 
+# Record request counts and latency by route; added last so it wraps the other middleware
+app.middleware("http")(record_request_metrics)
+register_collectors()
+
 # Include routers
 app.include_router(summarization.router)
 app.include_router(sentiment.router)
@@ -61,6 +77,17 @@ app.include_router(embedding.router)
 app.include_router(openai_compatible_embedding.router)
 app.include_router(tokenize.router)
 app.include_router(detokenize.router)
+app.include_router(analyze.router)
+app.include_router(diagnostics.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
+app.include_router(similarity.router)
+
+# Requests for disabled tasks are a server capability issue, not a client error
+@app.exception_handler(ModelUnavailableError)
+async def model_unavailable_handler(request: Request, exc: ModelUnavailableError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 def load_config():
     """
@@ -81,31 +108,60 @@ def parse_arguments():
     parser.add_argument("--paraphrase-model", type=str, help="Specify paraphrasing model")
     parser.add_argument("--keyword-model", type=str, help="Specify keyword extraction model")
 
-    # Only parse args if we're not running via Uvicorn
-    if 'uvicorn' not in sys.argv[0]:
+    # Only parse args if we're not running via Uvicorn or Gunicorn
+    if 'uvicorn' not in sys.argv[0] and 'gunicorn' not in sys.argv[0]:
         args = parser.parse_args()
         return vars(args)
     else:
         return {}
 
-def initialize_models():
+def initialize_settings():
     """
-    Load models during application startup.
+    Load the configuration and record each task's default model and loading policy.
     """
     # Load JSON config and command-line args
     config = load_config()
     # Combine the JSON configuration with any command-line overrides
     args = parse_arguments()
     config.update({k.replace("-", "_"): v for k, v in args.items() if v is not None})
-    # Load models based on the configuration
-    load_models(config)
+    # Share the configuration with the routers and utilities
+    update_settings(config)
+    configure_models(config)
+    return config
+
+def warm_up():
+    """
+    Load the sentence splitter and the eagerly loaded models.
+    """
+    get_sentence_splitter()
+    load_eager_models()
+    print("Models loaded successfully.")
+
+def initialize_models():
+    """
+    Load models during application startup.
+    """
+    initialize_settings()
+    warm_up()
 
 # Ensure that models are loaded when the FastAPI app starts
 @app.on_event("startup")
 async def startup_event():
     print("Initializing models...")
+    initialize_settings()
+    # Eager models load in the background so the server answers probes immediately; /ready reports 503 until they are resident
+    asyncio.get_running_loop().run_in_executor(None, warm_up)
+    # Unload lazily loaded models once they have been idle longer than the configured TTL
+    app.state.idle_unloader = asyncio.create_task(unload_idle_models())
+
+# Under Gunicorn with preload_app (see gunicorn_conf.py), the master imports the app and loads the models
+# before forking, so every worker shares the same weight pages; the workers' startup finds them resident
+if os.getenv("PRELOAD_MODELS", "0") == "1":
     initialize_models()
-    print("Models loaded successfully.")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_pools()
 
 if __name__ == "__main__":
     initialize_models()  # Load models when running directly
@@ -0,0 +1,54 @@
+"""
+Report how much memory the Gunicorn master and its workers use, and how much of it they share.
+
+    python memory_report.py
+    python memory_report.py --pid <master pid>
+
+For each process, RSS counts every page it maps, PSS charges shared pages in equal parts to the processes
+sharing them, and shared/private split RSS by whether other processes map the page too. The totals
+compare the sum of RSS (what N independent workers would need) with the sum of PSS (what the group uses).
+Linux only; run it in the server's container, e.g. `docker exec <container> python memory_report.py`.
+"""
+import argparse
+import json
+import os
+import sys
+from utils.memory import worker_memory_report
+
+def read_cmdline(pid) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as file:
+            return file.read().replace(b"\0", b" ").decode("utf-8", "replace")
+    except OSError:
+        return ""
+
+def parent_pid(pid) -> int:
+    with open(f"/proc/{pid}/stat", "r") as file:
+        return int(file.read().rsplit(")", 1)[1].split()[1])
+
+def find_master_pid() -> int:
+    """
+    Find the Gunicorn master: a gunicorn process whose parent is not one.
+    """
+    for entry in sorted(os.listdir("/proc"), key=lambda name: int(name) if name.isdigit() else 0):
+        if not entry.isdigit() or "gunicorn" not in read_cmdline(entry):
+            continue
+        try:
+            if "gunicorn" not in read_cmdline(parent_pid(entry)):
+                return int(entry)
+        except OSError:
+            continue
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-worker and shared memory of the server")
+    parser.add_argument("--pid", type=int, help="PID of the Gunicorn master; found automatically if omitted")
+    args = parser.parse_args()
+
+    master_pid = args.pid or find_master_pid()
+    if master_pid is None:
+        sys.exit("No Gunicorn master process found; pass --pid.")
+    print(json.dumps(worker_memory_report(master_pid), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# backends.py
+import os
+import re
+import numpy as np
+import torch
+from transformers import AutoTokenizer
+
+# Inference backends a task can run on; "torch" is the plain fp32 model
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+# Built-in backend options, overridable per task under "inference_backends" in models_config.json
+DEFAULT_BACKEND_OPTIONS = {
+    "backend": "torch",
+    "onnx_cache_dir": "onnx_cache",
+    "sanity_check": True,
+    "min_agreement": 0.95,
+}
+
+# ONNX Runtime pipeline task and optimum model class for each transformers-backed task
+ONNX_PIPELINE_TASKS = {
+    "summarization": ("summarization", "ORTModelForSeq2SeqLM"),
+    "sentiment": ("text-classification", "ORTModelForSequenceClassification"),
+    "ner": ("token-classification", "ORTModelForTokenClassification"),
+    "paraphrase": ("text2text-generation", "ORTModelForSeq2SeqLM"),
+}
+
+# Short inputs compared against the fp32 model when an optimized backend is loaded
+SANITY_TEXTS = [
+    "The quarterly results from Microsoft exceeded analyst expectations in New York.",
+    "I was really disappointed by the service at the restaurant last night.",
+    "Angela Merkel met Emmanuel Macron in Berlin to discuss the European budget.",
+    "This is the best phone I have ever owned, the battery lasts for days.",
+]
+
+class OnnxTransformer(torch.nn.Module):
+    def __init__(self, ort_model):
+        """
+        Initialize the OnnxTransformer class, a stand-in for a SentenceTransformer's Hugging Face model
+        that runs the exported ONNX graph, so pooling and normalization modules keep working unchanged.
+
+        Args:
+            ort_model: An optimum `ORTModelForFeatureExtraction`.
+        """
+        super().__init__()
+        self.ort_model = ort_model
+        self.config = ort_model.config
+
+    def forward(self, input_ids=None, attention_mask=None, token_type_ids=None, **kwargs):
+        outputs = self.ort_model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)
+        return (outputs.last_hidden_state,)
+
+def _import_onnxruntime():
+    try:
+        import optimum.onnxruntime as ort
+        from optimum.pipelines import pipeline as ort_pipeline
+    except ImportError:
+        raise RuntimeError("The onnx backend requires optimum[onnxruntime]; install it or select another backend.")
+    return ort, ort_pipeline
+
+def onnx_cache_path(cache_dir: str, model_id: str) -> str:
+    """
+    Return the directory an exported model is cached in.
+    """
+    return os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "--", model_id))
+
+def _onnx_model(model_class, source: str, path: str, tokenizer=None):
+    # Export on first use and reuse the cached graph afterwards
+    if not os.path.isfile(os.path.join(path, "config.json")):
+        print(f"Exporting {source} to ONNX in {path}")
+        model = model_class.from_pretrained(source, export=True)
+        model.save_pretrained(path)
+        if tokenizer is not None:
+            tokenizer.save_pretrained(path)
+    return model_class.from_pretrained(path)
+
+def quantize_int8(task: str, model):
+    """
+    Apply dynamic int8 quantization to the Linear layers of a pipeline or SentenceTransformer, in place.
+    """
+    # Pipelines wrap the torch module in `.model`; SentenceTransformer is the module itself
+    module = model if hasattr(model, "parameters") else model.model
+    torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+def load_onnx(task: str, model_id: str, load_torch_model, cache_dir: str, pipeline_kwargs: dict = None):
+    """
+    Load a task's model on ONNX Runtime, exporting it to the cache directory first if needed.
+
+    Args:
+        task (str): The task name.
+        model_id (str): The model identifier.
+        load_torch_model (callable): Loads the fp32 model, used as the export source.
+        cache_dir (str): The directory holding exported models.
+        pipeline_kwargs (dict): Extra pipeline arguments for transformers-backed tasks.
+
+    Returns:
+        A pipeline or SentenceTransformer backed by ONNX Runtime.
+    """
+    ort, ort_pipeline = _import_onnxruntime()
+    path = onnx_cache_path(cache_dir, model_id)
+
+    if task not in ONNX_PIPELINE_TASKS:
+        # Keep the SentenceTransformer for tokenization, pooling and normalization; only the transformer runs on ONNX
+        model = load_torch_model()
+        transformer = model[0]
+        transformer.auto_model = OnnxTransformer(
+            _onnx_model(ort.ORTModelForFeatureExtraction, transformer.auto_model.name_or_path, path)
+        )
+        return model
+
+    pipeline_task, model_class = ONNX_PIPELINE_TASKS[task]
+    if not os.path.isfile(os.path.join(path, "config.json")):
+        reference = load_torch_model()
+        _onnx_model(getattr(ort, model_class), reference.model.name_or_path, path, reference.tokenizer)
+        del reference
+    ort_model = getattr(ort, model_class).from_pretrained(path)
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    return ort_pipeline(pipeline_task, model=ort_model, tokenizer=tokenizer, accelerator="ort", **(pipeline_kwargs or {}))
+
+def sanity_outputs(task: str, model):
+    """
+    Run the sanity inputs through a model, or return None for tasks that are not checked.
+    """
+    if task == "sentiment":
+        return [result["label"] for result in model(SANITY_TEXTS)]
+    if task == "ner":
+        return [{(entity["entity_group"], entity["word"]) for entity in doc} for doc in model(SANITY_TEXTS)]
+    if task not in ONNX_PIPELINE_TASKS:
+        return model.encode(SANITY_TEXTS, normalize_embeddings=True, convert_to_numpy=True)
+    # Generated text diverges token by token and is too slow to check at load time
+    return None
+
+def agreement(task: str, reference, candidate) -> float:
+    """
+    Score how closely an optimized model reproduces the fp32 outputs, from 0 to 1.
+
+    Embeddings use the lowest cosine similarity, sentiment the share of matching labels and NER the mean
+    Jaccard overlap of the entity sets.
+    """
+    if task == "sentiment":
+        return float(np.mean([a == b for a, b in zip(reference, candidate)]))
+    if task == "ner":
+        return float(np.mean([len(a & b) / len(a | b) if a | b else 1.0 for a, b in zip(reference, candidate)]))
+    return float(np.min(np.sum(reference * candidate, axis=1)))
+
+def load_with_backend(task: str, model_id: str, load_torch_model, options: dict, pipeline_kwargs: dict = None):
+    """
+    Load a task's model on the configured backend, falling back to fp32 torch if it fails the sanity check.
+
+    Args:
+        task (str): The task name.
+        model_id (str): The model identifier.
+        load_torch_model (callable): Loads the fp32 model.
+        options (dict): The task's backend options.
+        pipeline_kwargs (dict): Extra pipeline arguments for transformers-backed tasks.
+
+    Returns:
+        The loaded model, with the same interface as the fp32 model.
+
+    Raises:
+        ValueError: If the backend is not supported.
+    """
+    backend = options["backend"]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported inference backend {backend} for task {task}.")
+    if backend == "torch":
+        return load_torch_model()
+
+    reference_model = load_torch_model() if backend == "torch-int8" or options["sanity_check"] else None
+    reference = sanity_outputs(task, reference_model) if options["sanity_check"] else None
+    # The ONNX embedding path swaps the transformer of the model it is given, so keep the fp32 one to restore
+    fp32_transformer = None
+    if backend == "onnx" and task not in ONNX_PIPELINE_TASKS and reference_model is not None:
+        fp32_transformer = reference_model[0].auto_model
+
+    if backend == "torch-int8":
+        model = quantize_int8(task, reference_model)
+    else:
+        # Reuse the fp32 model loaded for the sanity check as the export source
+        loader = load_torch_model if reference_model is None else (lambda: reference_model)
+        model = load_onnx(task, model_id, loader, options["onnx_cache_dir"], pipeline_kwargs)
+
+    if reference is not None:
+        score = agreement(task, reference, sanity_outputs(task, model))
+        print(f"{backend} backend for {task}/{model_id}: agreement with fp32 {score:.4f}")
+        if score < options["min_agreement"]:
+            print(f"{backend} backend for {task}/{model_id} is below min_agreement {options['min_agreement']}, using torch instead")
+            return _fp32_fallback(task, model_id, reference_model, fp32_transformer, backend, load_torch_model)
+    print(f"Using {backend} backend for {task}/{model_id}")
+    return model
+
+def _fp32_fallback(task, model_id, reference_model, fp32_transformer, backend, load_torch_model):
+    # The fp32 reference is still intact unless it was quantized in place; only then are the weights loaded again
+    if backend == "torch-int8":
+        print(f"Using torch backend for {task}/{model_id} (fp32 weights reloaded after in-place quantization)")
+        return load_torch_model()
+    if fp32_transformer is not None:
+        reference_model[0].auto_model = fp32_transformer
+    print(f"Using torch backend for {task}/{model_id} (fp32 reference model reused)")
+    return reference_model
@@ -0,0 +1,180 @@
+from itertools import combinations
+from math import comb
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from utils.embedding_cache import get_embedding_cache
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _mmr(doc_similarity, candidate_similarity, top_n, diversity):
+    # Maximal Marginal Relevance: trade relevance to the document against similarity to already chosen keywords
+    selected = [int(np.argmax(doc_similarity))]
+    remaining = [i for i in range(len(doc_similarity)) if i != selected[0]]
+    for _ in range(min(top_n - 1, len(remaining))):
+        redundancy = candidate_similarity[np.ix_(remaining, selected)].max(axis=1)
+        scores = (1 - diversity) * doc_similarity[remaining] - diversity * redundancy
+        best = remaining[int(np.argmax(scores))]
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+# Largest number of combinations Max Sum Distance searches exhaustively; beyond it, keywords are chosen greedily
+MAX_SUM_COMBINATIONS = 10000
+
+def _max_sum(doc_similarity, candidate_similarity, top_n, nr_candidates):
+    # Max Sum Distance: among the most relevant candidates, pick the combination that is least similar to itself
+    shortlist = list(np.argsort(doc_similarity)[-nr_candidates:])
+    if len(shortlist) <= top_n:
+        return shortlist[::-1]
+    shortlist_similarity = candidate_similarity[np.ix_(shortlist, shortlist)]
+    if comb(len(shortlist), top_n) > MAX_SUM_COMBINATIONS:
+        return [shortlist[i] for i in _greedy_max_sum(shortlist_similarity, top_n)]
+    return [shortlist[i] for i in _exhaustive_max_sum(shortlist_similarity, top_n)]
+
+def _exhaustive_max_sum(shortlist_similarity, top_n):
+    # Score every combination of top_n shortlist entries; only used within MAX_SUM_COMBINATIONS
+    best_combination, best_score = None, np.inf
+    for combination in combinations(range(len(shortlist_similarity)), top_n):
+        pairwise = shortlist_similarity[np.ix_(combination, combination)]
+        score = pairwise.sum() - np.trace(pairwise)
+        if score < best_score:
+            best_combination, best_score = combination, score
+    return list(best_combination)
+
+def _greedy_max_sum(shortlist_similarity, top_n):
+    # Start from the most relevant candidate (the shortlist is sorted by relevance, ascending), then keep adding
+    # the candidate least similar to those already chosen; O(top_n * shortlist) instead of C(shortlist, top_n)
+    selected = [len(shortlist_similarity) - 1]
+    total_similarity = shortlist_similarity[selected[0]].copy()
+    for _ in range(top_n - 1):
+        total_similarity[selected] = np.inf
+        best = int(np.argmin(total_similarity))
+        selected.append(best)
+        total_similarity += shortlist_similarity[best]
+    return selected
+
+def encode_with_keyword_model(model_name: str, texts: list) -> np.ndarray:
+    """
+    Encode texts with the loaded keyword model in length-bucketed batches.
+    """
+    # Imported here so the engine can run on an injected encoder without the model stack
+    from models.nlp_models import get_model
+    from utils.bucketing import bucketing_options, encode_bucketed
+
+    options = bucketing_options("keyword")
+    return encode_bucketed(get_model("keyword", model_name), texts, 64, options["max_seq_length"], options["max_batch_tokens"])
+
+class KeywordEngine:
+    def __init__(self, model_name: str = None, ngram_range=(1, 2), stop_words="english", model_id: str = None,
+                 encode=None):
+        """
+        Initialize the KeywordEngine class, a long-lived KeyBERT-style extractor around the loaded keyword model.
+
+        Candidate phrase embeddings are stored in the shared embedding cache, so phrases that recur across
+        documents and requests are only encoded once.
+
+        Args:
+            model_name (str): The keyword model name, or None for the default keyword model.
+            ngram_range (tuple): The range of n-gram lengths considered as candidates.
+            stop_words: Stop words removed before building n-grams, as accepted by CountVectorizer.
+            model_id (str): The ID embeddings are cached under, or None to resolve it from the model name.
+            encode (callable): A function that takes a list of texts and returns their embeddings, or None to
+                use the keyword model.
+        """
+        if model_id is None:
+            from models.nlp_models import resolve_model_id
+            model_id = resolve_model_id("keyword", model_name)
+        self.model_name = model_name
+        self.model_id = model_id
+        self.encode = encode or (lambda texts: encode_with_keyword_model(model_name, texts))
+        # The analyzer tokenizes and builds n-grams without fitting a vocabulary per document
+        self.analyzer = CountVectorizer(ngram_range=ngram_range, stop_words=stop_words).build_analyzer()
+
+    def candidates(self, doc: str) -> list:
+        """
+        Return the unique candidate phrases of a document.
+        """
+        return sorted(set(self.analyzer(doc)))
+
+    def embed(self, texts: list) -> np.ndarray:
+        """
+        Embed texts through the shared cache, encoding only the misses in one call.
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        cache = get_embedding_cache()
+        results = cache.get_many(self.model_id, texts)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            encoded = self.encode(missing_texts)
+            cache.put_many(self.model_id, missing_texts, encoded)
+            for i, embedding in zip(missing, encoded):
+                results[i] = embedding
+        return np.vstack(results).astype(np.float32, copy=False)
+
+    def extract(self, docs: list, top_n: int = 5, doc_embeddings=None, use_mmr: bool = False,
+                diversity: float = 0.5, use_maxsum: bool = False, nr_candidates: int = 20) -> list:
+        """
+        Extract keywords from a batch of documents.
+
+        Args:
+            docs (list): The documents.
+            top_n (int): The number of keywords per document.
+            doc_embeddings: Precomputed document embeddings, one row per document, or None to embed them here.
+            use_mmr (bool): Diversify keywords with Maximal Marginal Relevance.
+            diversity (float): The MMR trade-off between relevance (0) and diversity (1).
+            use_maxsum (bool): Diversify keywords with Max Sum Distance.
+            nr_candidates (int): The number of most relevant candidates considered by Max Sum Distance.
+
+        Returns:
+            list: For each document, a list of (keyword, score) tuples sorted by relevance.
+        """
+        doc_candidates = [self.candidates(doc) for doc in docs]
+
+        # Embed all unique candidates of the batch together, then the documents if needed
+        unique_candidates = sorted(set(phrase for candidates in doc_candidates for phrase in candidates))
+        candidate_index = {phrase: i for i, phrase in enumerate(unique_candidates)}
+        candidate_embeddings = _normalize_rows(self.embed(unique_candidates)) if unique_candidates else None
+        if doc_embeddings is None:
+            doc_embeddings = self.embed(docs)
+        doc_embeddings = _normalize_rows(np.asarray(doc_embeddings, dtype=np.float32).reshape(len(docs), -1))
+
+        results = []
+        for doc_embedding, candidates in zip(doc_embeddings, doc_candidates):
+            if not candidates:
+                results.append([])
+                continue
+            embeddings = candidate_embeddings[[candidate_index[phrase] for phrase in candidates]]
+            # Cosine similarity of every candidate to the document in one matrix-vector product
+            doc_similarity = embeddings @ doc_embedding
+
+            if use_mmr and len(candidates) > 1:
+                selected = _mmr(doc_similarity, embeddings @ embeddings.T, top_n, diversity)
+            elif use_maxsum and len(candidates) > 1:
+                selected = _max_sum(doc_similarity, embeddings @ embeddings.T, top_n, max(nr_candidates, top_n))
+            else:
+                selected = list(np.argsort(doc_similarity)[::-1][:top_n])
+
+            keywords = [(candidates[i], round(float(doc_similarity[i]), 4)) for i in selected]
+            results.append(sorted(keywords, key=lambda keyword: keyword[1], reverse=True))
+        return results
+
+# Engines for each keyword model, created on first use
+keyword_engines = {}
+
+def get_keyword_engine(model_name: str = None) -> KeywordEngine:
+    """
+    Retrieve the keyword engine for a model, creating it on first use.
+    """
+    from models.nlp_models import resolve_model_id
+
+    model_id = resolve_model_id("keyword", model_name)
+    engine = keyword_engines.get(model_id)
+    if engine is None:
+        engine = KeywordEngine(model_name, model_id=model_id)
+        keyword_engines[model_id] = engine
+    return engine
@@ -1,6 +1,12 @@
+import asyncio
+import gc
+import threading
 from sentence_transformers import SentenceTransformer
 from transformers import pipeline
 import torch
+from models.backends import DEFAULT_BACKEND_OPTIONS, load_with_backend
+from models.registry import ModelRegistry
+from utils.config import get_task_setting
 
 # Check if a GPU is available and use it if possible
 device = 0 if torch.cuda.is_available() else -1
@@ -36,69 +42,191 @@ supported_models = {
     }
 }
 
-# Cache for loaded models
-loaded_models = {}
+# Pipeline task names and extra keyword arguments for the transformers-backed tasks
+pipeline_tasks = {
+    "summarization": ("summarization", {}),
+    "sentiment": ("sentiment-analysis", {}),
+    "ner": ("ner", {"aggregation_strategy": "simple"}),
+    "paraphrase": ("text2text-generation", {}),
+}
 
-def load_models(config):
+# Configuration keys and display names for each task
+task_config = {
+    "embedding": ("embedding_model", "embedding model"),
+    "summarization": ("summarization_model", "summarization model"),
+    "sentiment": ("sentiment_model", "sentiment analysis model"),
+    "ner": ("ner_model", "NER model"),
+    "paraphrase": ("paraphrase_model", "paraphrase model"),
+    "keyword": ("keyword_model", "keyword extraction model"),
+}
+
+# Tasks that load the same kind of model share registry entries, so one set of weights serves both
+registry_tasks = {
+    "keyword": "embedding",
+}
+
+# Process-wide registry of resident models, keyed by (task, model id)
+model_registry = ModelRegistry()
+
+# Default model name for each task, taken from the configuration
+default_models = {}
+
+# Loading policy for each task: "eager" loads at startup, "lazy" on first request, "disabled" never
+LOADING_POLICIES = ("eager", "lazy", "disabled")
+loading_policies = {}
+
+# Idle-unload settings for models that are not loaded eagerly
+idle_unload = {"ttl_seconds": None, "interval_seconds": 60}
+
+# Set once every eagerly loaded model is resident
+models_ready = threading.Event()
+
+class ModelUnavailableError(Exception):
     """
-    Load models based on the provided configuration.
+    Raised when a request needs a model for a task that is disabled.
+    """
+
+def _load_torch_model(task, model_id):
+    """
+    Load a model from disk or the Hugging Face hub for the given task.
+    """
+    if task in pipeline_tasks:
+        pipeline_task, kwargs = pipeline_tasks[task]
+        return pipeline(pipeline_task, model=model_id, device=device, **kwargs)
+    return SentenceTransformer(model_id)
+
+def _load_model(task, model_id):
+    """
+    Load a model on the inference backend configured for the task under "inference_backends".
+    """
+    options = get_task_setting("inference_backends", task, DEFAULT_BACKEND_OPTIONS)
+    pipeline_kwargs = pipeline_tasks[task][1] if task in pipeline_tasks else None
+    return load_with_backend(task, model_id, lambda: _load_torch_model(task, model_id), options, pipeline_kwargs)
+
+def configure_models(config):
+    """
+    Record the default model and loading policy of each task, without loading anything.
+    """
+    registry_config = config.get("model_registry", {})
+    model_registry.configure(
+        max_models=registry_config.get("max_models"),
+        max_memory_mb=registry_config.get("max_memory_mb"),
+    )
+
+    loading_config = config.get("model_loading", {})
+    policies = loading_config.get("policies", {})
+    idle_unload["ttl_seconds"] = loading_config.get("idle_ttl_seconds")
+    idle_unload["interval_seconds"] = loading_config.get("sweep_interval_seconds", 60)
+
+    try:
+        for task, (config_key, display_name) in task_config.items():
+            if task == "keyword":
+                model_name = config.get(config_key, "all-MiniLM-L6-v2")
+            else:
+                model_name = config[config_key]
+            policy = policies.get(task, policies.get("default", "eager"))
+            if policy not in LOADING_POLICIES:
+                raise ValueError(f"Unsupported loading policy {policy} for task {task}.")
+            default_models[task] = model_name
+            loading_policies[task] = policy
+
+    except KeyError as e:
+        print(f"Error: Model key not found in configuration or supported models. Details: {e}")
+
+def load_eager_models():
+    """
+    Load the default model of every task whose loading policy is "eager".
     """
     # Load each model and log the process
     try:
-        # Load embedding model
-        embedding_model_name = config["embedding_model"]
-        print(f"Loading embedding model: {embedding_model_name}")
-        loaded_models["embedding"] = SentenceTransformer(supported_models["embedding"][embedding_model_name])
-        print(f"Loaded embedding model: {embedding_model_name}")
-
-        # Load summarization model
-        summarization_model_name = config["summarization_model"]
-        print(f"Loading summarization model: {summarization_model_name}")
-        loaded_models["summarization"] = pipeline("summarization", model=supported_models["summarization"][summarization_model_name], device=device)
-        print(f"Loaded summarization model: {summarization_model_name}")
-
-        # Load sentiment analysis model
-        sentiment_model_name = config["sentiment_model"]
-        print(f"Loading sentiment analysis model: {sentiment_model_name}")
-        loaded_models["sentiment"] = pipeline("sentiment-analysis", model=supported_models["sentiment"][sentiment_model_name], device=device)
-        print(f"Loaded sentiment analysis model: {sentiment_model_name}")
-
-        # Load named entity recognition model
-        ner_model_name = config["ner_model"]
-        print(f"Loading NER model: {ner_model_name}")
-        loaded_models["ner"] = pipeline("ner", model=supported_models["ner"][ner_model_name], aggregation_strategy="simple", device=device)
-        print(f"Loaded NER model: {ner_model_name}")
-
-        # Load paraphrasing model
-        paraphrase_model_name = config["paraphrase_model"]
-        print(f"Loading paraphrase model: {paraphrase_model_name}")
-        loaded_models["paraphrase"] = pipeline("text2text-generation", model=supported_models["paraphrase"][paraphrase_model_name], device=device)
-        print(f"Loaded paraphrase model: {paraphrase_model_name}")
-
-        # Load keyword extraction model
-        keyword_model_name = config.get("keyword_model", "all-MiniLM-L6-v2")
-        print(f"Loading keyword extraction model: {keyword_model_name}")
-        loaded_models["keyword"] = SentenceTransformer(supported_models["keyword"][keyword_model_name])
-        print(f"Loaded keyword extraction model: {keyword_model_name}")
+        for task, (config_key, display_name) in task_config.items():
+            if loading_policies.get(task) != "eager":
+                print(f"Skipping {display_name} ({loading_policies.get(task, 'not configured')})")
+                continue
+            model_name = default_models[task]
+            print(f"Loading {display_name}: {model_name}")
+            # Eager models are pinned so the LRU budget and idle unloading only apply to the others
+            get_model(task, model_name, pin=True)
+            print(f"Loaded {display_name}: {model_name}")
 
     except KeyError as e:
         print(f"Error: Model key not found in configuration or supported models. Details: {e}")
     except Exception as e:
         print(f"An unexpected error occurred during model loading: {e}")
+    finally:
+        models_ready.set()
+
+def load_models(config):
+    """
+    Load models based on the provided configuration.
+    """
+    configure_models(config)
+    load_eager_models()
+
+async def unload_idle_models():
+    """
+    Periodically unload models that have been idle for longer than the configured TTL.
+    """
+    if not idle_unload["ttl_seconds"]:
+        return
+    while True:
+        await asyncio.sleep(idle_unload["interval_seconds"])
+        if model_registry.evict_idle(idle_unload["ttl_seconds"]):
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+def model_status() -> dict:
+    """
+    Report readiness and, for each task, its loading policy and whether its default model is resident.
+    """
+    models = []
+    for task, model_name in default_models.items():
+        model_id = supported_models[task].get(model_name)
+        models.append({
+            "task": task,
+            "model": model_name,
+            "policy": loading_policies.get(task),
+            "resident": model_id is not None and model_registry.is_resident(registry_tasks.get(task, task), model_id),
+        })
+    return {"ready": models_ready.is_set(), "models": models}
 
-def get_model(task, model_name=None):
+def resolve_model_id(task, model_name=None):
+    """
+    Resolve a model name, or the task's default model, to its model identifier.
+    """
+    if task not in supported_models:
+        raise ValueError(f"Task {task} is not supported.")
+    if loading_policies.get(task) == "disabled":
+        raise ModelUnavailableError(f"Task {task} is disabled on this server.")
+
+    # Fall back to the default model configured for the task
+    if not model_name:
+        model_name = default_models.get(task)
+        if model_name is None:
+            raise ValueError(f"Model for task {task} is not loaded.")
+
+    if model_name not in supported_models[task]:
+        raise ValueError(f"Model {model_name} not supported for task {task}.")
+
+    return supported_models[task][model_name]
+
+def get_model(task, model_name=None, pin=False):
     """
     Retrieve the model for a specific task. Optionally allows specifying a model name.
+
+    Models are loaded once through the shared registry and reused across requests.
+    """
+    model_id = resolve_model_id(task, model_name)
+    registry_task = registry_tasks.get(task, task)
+    return model_registry.get(registry_task, model_id, lambda: _load_model(registry_task, model_id), pin=pin)
+
+def get_loaded_model(task, model_name=None):
+    """
+    Return the model for a task if it is already loaded, or None, without ever loading it.
     """
-    # If a model name is provided, check against the supported models and return the appropriate model.
-    if model_name:
-        if model_name in supported_models[task]:
-            return SentenceTransformer(supported_models[task][model_name])
-        else:
-            raise ValueError(f"Model {model_name} not supported for task {task}.")
-    
-    # Otherwise, return the default loaded model for the task.
-    if task in loaded_models:
-        return loaded_models[task]
-    
-    raise ValueError(f"Model for task {task} is not loaded.")
+    try:
+        model_id = resolve_model_id(task, model_name)
+    except (ValueError, ModelUnavailableError):
+        return None
+    return model_registry.peek(registry_tasks.get(task, task), model_id)
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import OrderedDict
+
+def estimate_model_bytes(model):
+    """
+    Estimate the memory held by a model's parameters and buffers, in bytes.
+    """
+    # Pipelines wrap the torch module in `.model`; SentenceTransformer is the module itself
+    module = model if hasattr(model, "parameters") else getattr(model, "model", None)
+    if module is None or not hasattr(module, "parameters"):
+        return 0
+
+    total = sum(p.numel() * p.element_size() for p in module.parameters())
+    total += sum(b.numel() * b.element_size() for b in module.buffers())
+    return total
+
+class ModelRegistry:
+    def __init__(self, max_models: int = None, max_memory_mb: int = None):
+        """
+        Initialize the ModelRegistry class, a process-wide cache of loaded models keyed by (task, model id).
+
+        Args:
+            max_models (int): The maximum number of resident models, or None for no limit.
+            max_memory_mb (int): The maximum estimated memory of resident models in MB, or None for no limit.
+        """
+        self.max_models = max_models
+        self.max_memory_mb = max_memory_mb
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds_total = 0.0
+
+    def configure(self, max_models: int = None, max_memory_mb: int = None):
+        """
+        Update the registry budgets and evict models that no longer fit.
+
+        Args:
+            max_models (int): The maximum number of resident models, or None for no limit.
+            max_memory_mb (int): The maximum estimated memory of resident models in MB, or None for no limit.
+        """
+        with self._lock:
+            self.max_models = max_models
+            self.max_memory_mb = max_memory_mb
+            self._evict()
+
+    def get(self, task: str, model_id: str, loader, pin: bool = False):
+        """
+        Return the model for (task, model_id), loading it with `loader` on first use.
+
+        Concurrent first requests for the same key wait on a per-key lock so the model is loaded once.
+
+        Args:
+            task (str): The task the model serves.
+            model_id (str): The model identifier.
+            loader (callable): A zero-argument callable that loads the model.
+            pin (bool): Exclude the model from LRU eviction.
+
+        Returns:
+            The loaded model.
+        """
+        key = (task, model_id)
+        model = self._lookup(key, pin)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another request may have finished loading while we waited for the key lock
+            model = self._lookup(key, pin)
+            if model is not None:
+                return model
+
+            start_time = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start_time
+
+            with self._lock:
+                self.misses += 1
+                self.load_seconds_total += load_seconds
+                self._entries[key] = {
+                    "model": model,
+                    "bytes": estimate_model_bytes(model),
+                    "pinned": pin,
+                    "load_seconds": load_seconds,
+                    "last_used": time.monotonic(),
+                }
+                self._evict(keep=key)
+
+        return model
+
+    def _lookup(self, key, pin):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry["last_used"] = time.monotonic()
+            entry["pinned"] = entry["pinned"] or pin
+            self.hits += 1
+            return entry["model"]
+
+    def _over_budget(self):
+        if self.max_models is not None and len(self._entries) > self.max_models:
+            return True
+        if self.max_memory_mb is not None:
+            resident_bytes = sum(entry["bytes"] for entry in self._entries.values())
+            return resident_bytes > self.max_memory_mb * 1024 * 1024
+        return False
+
+    def _evict(self, keep=None):
+        # Walk from least to most recently used, skipping pinned models and the model just loaded
+        while self._over_budget():
+            victim = next(
+                (key for key, entry in self._entries.items() if not entry["pinned"] and key != keep),
+                None,
+            )
+            if victim is None:
+                break
+            del self._entries[victim]
+            self._key_locks.pop(victim, None)
+            self.evictions += 1
+            print(f"Evicted model from registry: {victim[0]}/{victim[1]}")
+
+    def evict_idle(self, max_idle_seconds: float) -> list:
+        """
+        Drop unpinned models that have not been used for longer than the given time.
+
+        Args:
+            max_idle_seconds (float): The idle time after which a model is unloaded.
+
+        Returns:
+            list: The (task, model id) keys that were unloaded.
+        """
+        with self._lock:
+            now = time.monotonic()
+            victims = [
+                key for key, entry in self._entries.items()
+                if not entry["pinned"] and now - entry["last_used"] > max_idle_seconds
+            ]
+            for key in victims:
+                del self._entries[key]
+                self._key_locks.pop(key, None)
+                self.evictions += 1
+                print(f"Unloaded idle model: {key[0]}/{key[1]}")
+        return victims
+
+    def remove(self, task: str, model_id: str) -> bool:
+        """
+        Drop a model from the registry.
+
+        Args:
+            task (str): The task the model serves.
+            model_id (str): The model identifier.
+
+        Returns:
+            bool: True if the model was resident.
+        """
+        with self._lock:
+            return self._entries.pop((task, model_id), None) is not None
+
+    def peek(self, task: str, model_id: str):
+        """
+        Return the model for (task, model_id) if it is loaded, without loading it or counting a use.
+        """
+        with self._lock:
+            entry = self._entries.get((task, model_id))
+            return entry["model"] if entry is not None else None
+
+    def is_resident(self, task: str, model_id: str) -> bool:
+        """
+        Check whether a model is currently loaded.
+        """
+        with self._lock:
+            return (task, model_id) in self._entries
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss/load-time counters and the list of resident models.
+        """
+        with self._lock:
+            now = time.monotonic()
+            lookups = self.hits + self.misses
+            resident = [
+                {
+                    "task": task,
+                    "model": model_id,
+                    "bytes": entry["bytes"],
+                    "pinned": entry["pinned"],
+                    "load_seconds": round(entry["load_seconds"], 3),
+                    "idle_seconds": round(now - entry["last_used"], 3),
+                }
+                for (task, model_id), entry in self._entries.items()
+            ]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "load_seconds_total": round(self.load_seconds_total, 3),
+                "resident_bytes": sum(entry["bytes"] for entry in self._entries.values()),
+                "max_models": self.max_models,
+                "max_memory_mb": self.max_memory_mb,
+                "resident": resident,
+            }
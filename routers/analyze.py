@@ -0,0 +1,93 @@
+import asyncio
+import time
+from fastapi import APIRouter, Depends
+from schemas.requests import AnalyzeRequest
+from utils.auth import get_api_key
+from models.nlp_models import resolve_model_id
+from utils.text_processing import normalize_text
+from utils.executors import run_in_pool
+from utils.admission import admit
+from utils.embedding_response import ORJSONNumpyResponse
+from routers.embedding import get_embedding
+from routers.entities import find_entities
+from routers.keywords import find_keywords
+from routers.sentiment import classify_sentiment
+
+router = APIRouter(prefix="/analyze", tags=["Multi-Task Analysis"])
+
+def normalize_texts(texts: list, normalize: bool) -> list:
+    """
+    Normalize every text once, for all requested tasks.
+    """
+    return [normalize_text(text, "analyze", normalize) for text in texts]
+
+async def timed(timings: dict, name: str, coroutine):
+    """
+    Await a coroutine and record its duration in milliseconds.
+    """
+    start_time = time.perf_counter()
+    result = await coroutine
+    timings[f"{name}_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
+    return result
+
+async def analyze_text(text: str, tasks: list, num_keywords: int) -> dict:
+    """
+    Run the requested tasks concurrently on one normalized text.
+    """
+    timings = {}
+    jobs = {}
+
+    # KeyBERT scores candidates against the document embedding, so compute it once when both tasks use the same model
+    share_embedding = "keywords" in tasks and resolve_model_id("keyword") == resolve_model_id("embedding")
+    embedding_job = None
+    if "embedding" in tasks:
+        embedding_job = asyncio.ensure_future(timed(timings, "embedding", get_embedding(text)))
+        jobs["embedding"] = embedding_job
+    elif share_embedding:
+        # Only the keywords task uses it, so its time is part of keywords_ms
+        embedding_job = asyncio.ensure_future(get_embedding(text))
+
+    if "sentiment" in tasks:
+        jobs["sentiment"] = timed(timings, "sentiment", classify_sentiment(text))
+    if "entities" in tasks:
+        jobs["entities"] = timed(timings, "entities", find_entities(text))
+    if "keywords" in tasks:
+        async def keywords_job():
+            doc_embeddings = (await embedding_job)[None, :] if share_embedding else None
+            return await find_keywords(text, num_keywords, doc_embeddings)
+        jobs["keywords"] = timed(timings, "keywords", keywords_job())
+
+    jobs = {name: asyncio.ensure_future(job) for name, job in jobs.items()}
+    try:
+        results = await asyncio.gather(*jobs.values())
+    finally:
+        # When a task fails, stop the others instead of leaving them running with nobody to collect their errors
+        for job in [*jobs.values(), embedding_job]:
+            if job is None:
+                continue
+            if not job.done():
+                job.cancel()
+            elif not job.cancelled():
+                job.exception()
+    analysis = dict(zip(jobs.keys(), results))
+    analysis["timings"] = timings
+    return analysis
+
+# Embeddings stay numpy arrays and are written directly by orjson
+@router.post("/", dependencies=[Depends(get_api_key)], response_class=ORJSONNumpyResponse)
+async def analyze(request: AnalyzeRequest):
+    """
+    Run several analysis tasks over one or more texts with a single normalization pass and one round-trip.
+    """
+    start_time = time.perf_counter()
+    texts = [request.text] if isinstance(request.text, str) else request.text
+    tasks = list(dict.fromkeys(request.tasks))
+
+    async with admit("analyze", texts):
+        timings = {}
+        corrected_texts = await timed(timings, "preprocess", run_in_pool("preprocess", normalize_texts, texts, request.normalize))
+
+        # Texts are analyzed concurrently, so their embedding and sentiment calls share micro-batches
+        results = await asyncio.gather(*(analyze_text(text, tasks, request.num_keywords) for text in corrected_texts))
+        timings["total_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
+        return {"results": results, "timings": timings}
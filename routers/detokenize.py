@@ -1,21 +1,25 @@
 from fastapi import APIRouter, HTTPException, Depends
 from schemas.requests import DetokenizeRequest
-from models.nlp_models import get_model
 from utils.auth import get_api_key
+from utils.fast_tokenizers import decode_tokens
+from utils.executors import run_in_pool
 
 router = APIRouter(prefix="/detokenize", tags=["Detokenization"])
 
 @router.post("/", dependencies=[Depends(get_api_key)])
-async def detokenize(request: DetokenizeRequest):    
+async def detokenize(request: DetokenizeRequest):
+    """
+    Detokenize one token ID list, or a list of them, with the standalone fast tokenizer of an embedding model.
+    """
     # Use the provided model or default to the embedding model
     model_name = request.model if request.model else "all-MiniLM-L6-v2"
-        
+    single = isinstance(request.tokens[0], int)
+    token_lists = [request.tokens] if single else request.tokens
+
+    # Detokenize the tokens back to text in one batch, without loading the model weights
     try:
-        tokenizer = get_model("embedding", model_name).tokenizer
+        decoded_texts = await run_in_pool("preprocess", decode_tokens, model_name, token_lists)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    
-    # Detokenize the tokens back to text
-    decoded_text = tokenizer.decode(request.tokens, skip_special_tokens=True)
-    
-    return {"text": decoded_text}
+
+    return {"text": decoded_texts[0] if single else decoded_texts}
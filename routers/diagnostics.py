@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException
+from models.nlp_models import model_registry
+from utils.admission import admission_stats
+from utils.auth import get_api_key
+from utils.batching import batching_stats
+from utils.executors import executor_stats
+from utils.embedding_cache import get_embedding_cache
+from utils.memory import process_memory
+from utils.result_cache import get_result_cache
+
+router = APIRouter(prefix="/diagnostics", tags=["Diagnostics"])
+
+@router.get("/models", dependencies=[Depends(get_api_key)])
+async def model_stats():
+    """
+    Report registry hit/miss/load-time counters and the models currently resident in this worker.
+    """
+    return model_registry.stats()
+
+@router.get("/batching", dependencies=[Depends(get_api_key)])
+async def batcher_stats():
+    """
+    Report queue depth and batch-size histograms for each micro-batcher.
+    """
+    return {"batchers": batching_stats()}
+
+@router.get("/executors", dependencies=[Depends(get_api_key)])
+async def pool_stats():
+    """
+    Report queue depth, rejections and utilization for each inference pool.
+    """
+    return {"pools": executor_stats()}
+
+@router.get("/embedding_cache", dependencies=[Depends(get_api_key)])
+async def embedding_cache_stats():
+    """
+    Report the embedding cache hit ratio and the bytes stored in each tier.
+    """
+    return get_embedding_cache().stats()
+
+@router.get("/admission", dependencies=[Depends(get_api_key)])
+async def admission_queue_stats():
+    """
+    Report concurrency, load shedding and queue-wait times for each admission class.
+    """
+    return {"classes": admission_stats()}
+
+@router.get("/result_cache", dependencies=[Depends(get_api_key)])
+async def result_cache_stats():
+    """
+    Report result cache hits, coalesced requests and the bytes stored.
+    """
+    return get_result_cache().stats()
+
+@router.get("/memory", dependencies=[Depends(get_api_key)])
+async def memory_stats():
+    """
+    Report this worker's resident, proportional, shared and private memory.
+    """
+    try:
+        return process_memory()
+    except OSError as e:
+        raise HTTPException(status_code=501, detail=f"Memory statistics are unavailable: {e}")
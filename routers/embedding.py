@@ -1,21 +1,39 @@
-from fastapi import APIRouter, HTTPException, Depends
-from schemas.requests import TextRequest
+from fastapi import APIRouter, HTTPException, Depends, Header
+from schemas.requests import EmbedRequest
 from utils.auth import get_api_key
-from models.nlp_models import get_model
-from utils.text_processing import correct_sentence_spacing
-from functools import lru_cache
+from models.nlp_models import resolve_model_id
+from utils.batching import get_batcher
+from utils.embedding_cache import cached_embeddings
+from utils.embedding_response import embedding_response, encode_base64, negotiate, prepare_embeddings
+from utils.text_processing import normalize_text
+from utils.executors import run_in_pool
+from utils.admission import admit
 
 router = APIRouter(prefix="/embed", tags=["Embedding Generation"])
 
-# Caching mechanism for embeddings
-@lru_cache(maxsize=1024)
-def get_embedding(text: str):
-    model = get_model("embedding")
-    return model.encode(text).tolist()
+async def get_embedding(text: str):
+    # Cached embeddings are shared with /v1/embeddings and keyword extraction; misses are
+    # encoded together with concurrent requests by the micro-batcher
+    model_id = resolve_model_id("embedding")
+    embeddings = await cached_embeddings(model_id, [text], get_batcher("embedding").submit_many)
+    return embeddings[0]
 
 @router.post("/", dependencies=[Depends(get_api_key)])
-async def embed(request: TextRequest):
-    corrected_text = correct_sentence_spacing(request.text)
-    # Generate the embedding
-    embedding = get_embedding(corrected_text)
-    return {"embedding": embedding}
+async def embed(request: EmbedRequest, accept: str = Header(None)):
+    """
+    Generate an embedding for the given text.
+
+    Send `Accept: application/octet-stream` for the raw vector or `Accept: application/msgpack` for msgpack.
+    """
+    async with admit("embed", request.text):
+        corrected_text = await run_in_pool("preprocess", normalize_text, request.text, "embed", request.normalize)
+        # Generate the embedding
+        embedding = await get_embedding(corrected_text)
+
+    # float16 only applies to the binary encodings; JSON numbers are written from float32
+    binary = negotiate(accept) != "json" or request.encoding_format == "base64"
+    embedding = prepare_embeddings(
+        embedding, request.normalize_embeddings, request.precision, request.dtype if binary else "float32"
+    )
+    content = {"embedding": encode_base64(embedding) if request.encoding_format == "base64" else embedding}
+    return embedding_response(accept, content, embedding)
@@ -1,41 +1,109 @@
 from fastapi import APIRouter, HTTPException, Depends
 from schemas.requests import TextRequest
 from utils.auth import get_api_key
-from models.nlp_models import get_model
-from utils.text_processing import correct_sentence_spacing, chunk_text
-from transformers import AutoTokenizer
+from models.nlp_models import get_model, resolve_model_id
+from utils.config import get_task_setting
+from utils.text_processing import normalize_text, chunk_spans
+from utils.executors import run_in_pool, run_task
+from utils.admission import admit
+from utils.result_cache import cached_result
 from collections import defaultdict
 
 router = APIRouter(prefix="/entities", tags=["Named Entity Recognition"])
 
-@router.post("/", dependencies=[Depends(get_api_key)])
-async def entities(request: TextRequest):
+def merge_overlapping(entities: list) -> list:
     """
-    Perform named entity recognition on the given text. Returns entities sorted by their frequency in descending order.
+    Merge overlapping entities of the same type, keeping the longer one, or the higher-scoring one if they
+    are as long.
+
+    An entity that straddles a chunk overlap is found in both chunks, often cut at different points, so
+    matching exact spans would count it twice.
+
+    Args:
+        entities (list): `(start, end, type, word, score)` tuples with offsets in the whole text.
+
+    Returns:
+        list: The merged entities, ordered by start offset.
+    """
+    merged = []
+    # The last kept entity of each type, as an index into merged
+    last_of_type = {}
+    for entity in sorted(entities, key=lambda item: (item[0], item[1])):
+        start, end, entity_type, _, score = entity
+        index = last_of_type.get(entity_type)
+        if index is not None and start < merged[index][1]:
+            kept = merged[index]
+            if (end - start, score) > (kept[1] - kept[0], kept[4]):
+                merged[index] = entity
+            continue
+        last_of_type[entity_type] = len(merged)
+        merged.append(entity)
+    return merged
+
+def count_entities(text: str) -> dict:
+    """
+    Run named entity recognition over the text in chunks and count each (entity type, word) pair.
     """
-    corrected_text = correct_sentence_spacing(request.text)
     # Get named entity recognition model
     ner_pipeline = get_model("ner")  # Correctly use task name "ner"
 
-    # Tokenizer for chunking
-    tokenizer = AutoTokenizer.from_pretrained("dbmdz/bert-large-cased-finetuned-conll03-english")
-    chunks = chunk_text(corrected_text, tokenizer, max_length=512, overlap=50)
+    # Chunk with the pipeline's own tokenizer, using character offsets so chunks are never re-decoded
+    tokenizer = ner_pipeline.tokenizer
+    max_length = min(tokenizer.model_max_length, 512)
+    spans = chunk_spans(text, tokenizer, max_length=max_length, overlap=50)
+    chunks = [text[start:end] for start, end in spans]
     entity_frequency = defaultdict(int)
+    if not chunks:
+        return entity_frequency
 
-    # Process each chunk and gather entities
-    for chunk in chunks:
-        chunk_entities = ner_pipeline(chunk)
+    # Run every chunk through the pipeline as one batch
+    batch_size = get_task_setting("batching", "ner", {"max_batch_size": 8})["max_batch_size"]
+    chunk_results = ner_pipeline(chunks, batch_size=batch_size)
+
+    # Gather entities with their offsets in the whole text; entities without offsets are counted as they are
+    located = []
+    for (chunk_start, _), chunk_entities in zip(spans, chunk_results):
         for entity in chunk_entities:
             # Ensure all expected keys are present and calculate frequency
             entity_type = entity.get("entity_group") or entity.get("entity", "")
             word = entity.get("word", "")
-            # Increase the frequency count for each entity
-            entity_frequency[(entity_type, word)] += 1
-
-    # Convert frequency dictionary to a list and sort by frequency
-    sorted_entities = sorted(
-        [{"entity": et[0], "word": et[1], "frequency": freq} for et, freq in entity_frequency.items()],
-        key=lambda x: x["frequency"],
-        reverse=True
-    )
-    return {"entities": sorted_entities}
+            if entity.get("start") is None:
+                entity_frequency[(entity_type, word)] += 1
+                continue
+            located.append(
+                (chunk_start + entity["start"], chunk_start + entity["end"], entity_type, word, entity.get("score", 0.0))
+            )
+
+    # Increase the frequency count once for each entity, even when two overlapping chunks cut it differently
+    for _, _, entity_type, word, _ in merge_overlapping(located):
+        entity_frequency[(entity_type, word)] += 1
+
+    return entity_frequency
+
+async def find_entities(text: str) -> list:
+    """
+    Find the named entities in normalized text, sorted by their frequency in descending order.
+    """
+    async def compute():
+        # Tokenization and inference run in the NER task's pool
+        entity_frequency = await run_task("ner", count_entities, text)
+
+        # Convert frequency dictionary to a list and sort by frequency
+        return sorted(
+            [{"entity": et[0], "word": et[1], "frequency": freq} for et, freq in entity_frequency.items()],
+            key=lambda x: x["frequency"],
+            reverse=True
+        )
+
+    # Results are cached, and identical concurrent requests share one run
+    return await cached_result("entities", resolve_model_id("ner"), {}, text, compute)
+
+@router.post("/", dependencies=[Depends(get_api_key)])
+async def entities(request: TextRequest):
+    """
+    Perform named entity recognition on the given text. Returns entities sorted by their frequency in descending order.
+    """
+    async with admit("entities", request.text):
+        corrected_text = await run_in_pool("preprocess", normalize_text, request.text, "entities", request.normalize)
+        sorted_entities = await find_entities(corrected_text)
+        return {"entities": sorted_entities}
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from models.nlp_models import model_status
+from utils.auth import get_api_key
+
+router = APIRouter(tags=["Health"])
+
+@router.get("/ready", dependencies=[Depends(get_api_key)])
+async def ready():
+    """
+    Report whether the eagerly loaded models are resident, with each task's loading policy.
+
+    Returns 503 until startup loading has finished, so it can back a readiness probe.
+    """
+    status = model_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
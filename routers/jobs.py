@@ -0,0 +1,142 @@
+import os
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import FileResponse
+from schemas.requests import EmbeddingJobRequest
+from utils.auth import get_api_key
+from utils.bulk_embedding import (
+    cancel_job, clear_submitted, create_job, job_dir, job_options, job_status, mark_submitted, new_upload_path, read_state, resolve_input_path, run_job
+)
+from utils.executors import get_pool, run_in_pool
+
+router = APIRouter(prefix="/jobs", tags=["Bulk Embedding Jobs"])
+
+# Upload bytes buffered before each write to disk
+UPLOAD_FLUSH_BYTES = 1024 * 1024
+
+def submit(job_id: str):
+    # Jobs run one at a time in the "jobs" pool; the request returns as soon as the job is queued
+    if not mark_submitted(job_id):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is already queued or running.")
+    try:
+        get_pool("jobs").submit(run_job, job_id)
+    except HTTPException:
+        clear_submitted(job_id)
+        raise
+
+async def save_upload(request: Request, path: str, max_bytes: int):
+    """
+    Stream a request body to a file, flushing buffered chunks in the preprocess pool.
+
+    Raises:
+        HTTPException: 413 once the body exceeds `max_bytes`.
+    """
+    file = await run_in_pool("preprocess", open, path, "wb")
+    try:
+        received = 0
+        buffer = bytearray()
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes.")
+            buffer += chunk
+            if len(buffer) >= UPLOAD_FLUSH_BYTES:
+                await run_in_pool("preprocess", file.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_pool("preprocess", file.write, bytes(buffer))
+    finally:
+        await run_in_pool("preprocess", file.close)
+
+def existing_state(job_id: str) -> dict:
+    try:
+        return read_state(job_id)
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+
+@router.post("/embeddings", status_code=202, dependencies=[Depends(get_api_key)])
+async def create_upload_job(request: Request, format: Literal["jsonl", "text"] = "jsonl", model: str = None,
+                            text_field: str = "text", id_field: str = "id"):
+    """
+    Start a bulk embedding job over a JSONL or text file sent as the raw request body.
+
+    The body is streamed to disk in buffered writes off the event loop, so uploads use constant memory
+    and do not stall other requests. Bodies over `bulk_embedding.max_upload_bytes` are rejected with 413.
+    """
+    max_bytes = job_options()["max_upload_bytes"]
+    declared = request.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes.")
+
+    input_path = new_upload_path()
+    try:
+        await save_upload(request, input_path, max_bytes)
+        state = await run_in_pool("preprocess", create_job, input_path, format, model, text_field, id_field)
+    except ValueError as e:
+        os.remove(input_path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        if os.path.exists(input_path):
+            os.remove(input_path)
+        raise
+    submit(state["job_id"])
+    return job_status(state["job_id"])
+
+@router.post("/embeddings/from_path", status_code=202, dependencies=[Depends(get_api_key)])
+async def create_path_job(request: EmbeddingJobRequest):
+    """
+    Start a bulk embedding job over a file in the configured input directory.
+    """
+    try:
+        input_path = resolve_input_path(request.path)
+        state = create_job(input_path, request.format, request.model, request.text_field, request.id_field)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    submit(state["job_id"])
+    return job_status(state["job_id"])
+
+@router.get("/{job_id}", dependencies=[Depends(get_api_key)])
+async def get_job(job_id: str):
+    """
+    Report a job's state and progress.
+    """
+    existing_state(job_id)
+    return job_status(job_id)
+
+@router.post("/{job_id}/resume", status_code=202, dependencies=[Depends(get_api_key)])
+async def resume_job(job_id: str):
+    """
+    Resume an interrupted, failed or cancelled job from its last checkpoint.
+    """
+    if existing_state(job_id)["state"] == "completed":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} has already completed.")
+    submit(job_id)
+    return job_status(job_id)
+
+@router.post("/{job_id}/cancel", dependencies=[Depends(get_api_key)])
+async def stop_job(job_id: str):
+    """
+    Stop a job after its current window; it can be resumed later.
+    """
+    existing_state(job_id)
+    if not cancel_job(job_id):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is not queued or running.")
+    return job_status(job_id)
+
+@router.get("/{job_id}/embeddings", dependencies=[Depends(get_api_key)])
+async def download_embeddings(job_id: str):
+    """
+    Download a completed job's embeddings as a float32 `.npy` file; row i belongs to line i of the ID index.
+    """
+    if existing_state(job_id)["state"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} has not completed.")
+    return FileResponse(os.path.join(job_dir(job_id), "embeddings.npy"), media_type="application/octet-stream",
+                        filename=f"{job_id}.npy")
+
+@router.get("/{job_id}/ids", dependencies=[Depends(get_api_key)])
+async def download_ids(job_id: str):
+    """
+    Download a job's ID index, one record ID per line in embedding row order.
+    """
+    existing_state(job_id)
+    return FileResponse(os.path.join(job_dir(job_id), "ids.txt"), media_type="text/plain", filename=f"{job_id}.ids.txt")
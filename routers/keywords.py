@@ -1,29 +1,84 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from schemas.requests import TextRequest
+from schemas.requests import TextRequest, KeywordBatchRequest
 from utils.auth import get_api_key
-from models.nlp_models import get_model
-from utils.text_processing import correct_sentence_spacing
-from keybert import KeyBERT
+from models.keyword_engine import get_keyword_engine
+from utils.text_processing import normalize_text
+from utils.executors import run_in_pool, run_task
+from utils.admission import admit
+from utils.result_cache import cached_result
 
 router = APIRouter(prefix="/extract_keywords", tags=["Keyword Extraction"])
 
-@router.post("/", dependencies=[Depends(get_api_key)])
-async def extract_keywords(request: TextRequest, num_keywords: int = Query(5, gt=0, le=20)):
-    """
-    Extract keywords from the given text. You can specify the number of keywords to return using `num_keywords`.
-    """
-    corrected_text = correct_sentence_spacing(request.text)
-    # Get the keyword extraction model
-    kw_model = get_model("keyword")  # Use the default model for keyword extraction
-    keybert = KeyBERT(kw_model)  # Initialize KeyBERT with the loaded model
-
-    # Extract keywords using KeyBERT
-    keywords = keybert.extract_keywords(
-        corrected_text,
-        keyphrase_ngram_range=(1, 2),  # Consider both single and two-word phrases
-        stop_words="english",  # Remove common stop words
-        top_n=num_keywords  # Return the specified number of keywords
-    )
+def normalize_texts(texts: list, normalize: bool) -> list:
+    """
+    Normalize each document of a batch.
+    """
+    return [normalize_text(text, "extract_keywords", normalize) for text in texts]
+
+async def find_keywords_batch(texts: list, num_keywords: int, doc_embeddings=None, **options) -> list:
+    """
+    Extract keywords from normalized texts, optionally with precomputed document embeddings.
+
+    Document embeddings are otherwise looked up in the shared embedding cache, so they are reused
+    across the embedding endpoints when the keyword and embedding models match.
+    """
+    engine = get_keyword_engine()
+    # Candidate scoring runs in the keyword task's pool
+    batch_keywords = await run_task("keyword", engine.extract, texts, top_n=num_keywords, doc_embeddings=doc_embeddings, **options)
     # Format keywords as a list of strings
-    formatted_keywords = [{"keyword": kw, "score": score} for kw, score in keywords]
-    return {"keywords": formatted_keywords}
+    return [[{"keyword": kw, "score": score} for kw, score in keywords] for keywords in batch_keywords]
+
+async def find_keywords(text: str, num_keywords: int, doc_embeddings=None, **options) -> list:
+    """
+    Extract keywords from one normalized text.
+
+    Results are cached, and identical concurrent requests share one extraction; precomputed document
+    embeddings come from the same model, so they do not change the result.
+    """
+    async def compute():
+        return (await find_keywords_batch([text], num_keywords, doc_embeddings, **options))[0]
+
+    params = {"num_keywords": num_keywords, **options}
+    return await cached_result("extract_keywords", get_keyword_engine().model_id, params, text, compute)
+
+@router.post("/", dependencies=[Depends(get_api_key)])
+async def extract_keywords(
+    request: TextRequest,
+    num_keywords: int = Query(5, gt=0, le=20),
+    use_mmr: bool = Query(False),
+    diversity: float = Query(0.5, ge=0, le=1),
+    use_maxsum: bool = Query(False),
+    nr_candidates: int = Query(20, gt=0, le=50),
+):
+    """
+    Extract keywords from the given text. You can specify the number of keywords to return using `num_keywords`,
+    and diversify them with `use_mmr`/`diversity` or `use_maxsum`/`nr_candidates`.
+    """
+    async with admit("extract_keywords", request.text):
+        corrected_text = await run_in_pool("preprocess", normalize_text, request.text, "extract_keywords", request.normalize)
+        formatted_keywords = await find_keywords(
+            corrected_text,
+            num_keywords,
+            use_mmr=use_mmr,
+            diversity=diversity,
+            use_maxsum=use_maxsum,
+            nr_candidates=nr_candidates,
+        )
+        return {"keywords": formatted_keywords}
+
+@router.post("/batch", dependencies=[Depends(get_api_key)])
+async def extract_keywords_batch(request: KeywordBatchRequest):
+    """
+    Extract keywords from several documents in one call.
+    """
+    async with admit("extract_keywords", request.texts):
+        corrected_texts = await run_in_pool("preprocess", normalize_texts, request.texts, request.normalize)
+        batch_keywords = await find_keywords_batch(
+            corrected_texts,
+            request.num_keywords,
+            use_mmr=request.use_mmr,
+            diversity=request.diversity,
+            use_maxsum=request.use_maxsum,
+            nr_candidates=request.nr_candidates,
+        )
+        return {"results": [{"keywords": keywords} for keywords in batch_keywords]}
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from utils.auth import get_api_key
+from utils.metrics import metrics_registry
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", dependencies=[Depends(get_api_key)])
+async def metrics():
+    """
+    Expose request, stage, model, cache, batching, executor and process metrics in the Prometheus text format.
+
+    Under Gunicorn, request and stage metrics cover every worker; see `utils.metrics.metrics_registry`.
+    """
+    return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -1,31 +1,145 @@
 # routers/openai_compatible_embedding.py
+import numpy as np
 from fastapi import APIRouter, HTTPException, Header, Depends
 from schemas.requests import EmbeddingRequest
-from models.nlp_models import get_model
-from utils.text_processing import correct_sentence_spacing
+from models.nlp_models import get_model, resolve_model_id
+from utils.batching import get_batcher
+from utils.bucketing import bucketing_options, encode_bucketed, tokenize_for_model
+from utils.config import get_setting
+from utils.embedding_cache import cached_embeddings
+from utils.embedding_response import embedding_response, encode_base64, negotiate, prepare_embeddings
+from utils.executors import run_in_pool, run_task
+from utils.admission import admit
+from utils.text_processing import normalize_text
 
 router = APIRouter(prefix="/v1/embeddings", tags=["OpenAI-Compatible Embeddings"])
 
+# Built-in limits, overridable under "openai_embeddings" in models_config.json
+DEFAULT_MAX_BATCH_SIZE = 2048
+DEFAULT_ENCODE_BATCH_SIZE = 64
+
+def correct_inputs(texts: list, normalize: bool) -> list:
+    """
+    Correct the spacing of each input text.
+    """
+    return [normalize_text(text, "embeddings", normalize) for text in texts]
+
+def prepare_inputs(model_name: str, texts: list, token_inputs: list):
+    """
+    Turn the request inputs into texts, tokenize them once and count the tokens the model will actually see.
+
+    Token ID inputs are decoded with the model's own tokenizer, so they must use its vocabulary.
+
+    Returns:
+        tuple: The texts to encode, the token count of each one, and their features for the
+            forward pass (None when the model has no fast tokenizer).
+    """
+    model = get_model("embedding", model_name)
+    tokenizer = model.tokenizer
+    max_seq_length = model.max_seq_length
+
+    if token_inputs is not None:
+        texts = tokenizer.batch_decode(token_inputs, skip_special_tokens=True)
+    if not getattr(tokenizer, "is_fast", False):
+        input_ids = token_inputs if token_inputs is not None else tokenizer(texts, add_special_tokens=True)["input_ids"]
+        return texts, [min(len(ids), max_seq_length) for ids in input_ids], None
+
+    features = tokenize_for_model(model, texts, bucketing_options("embedding")["max_seq_length"])
+    if token_inputs is not None:
+        token_counts = [min(len(ids), max_seq_length) for ids in token_inputs]
+    else:
+        token_counts = [len(feature["input_ids"]) for feature in features]
+    return texts, token_counts, features
+
+def encode_inputs(model_name: str, texts: list, batch_size: int, features: list = None):
+    """
+    Encode every input in one call, batched by token length and reusing the request's tokenization.
+    """
+    options = bucketing_options("embedding")
+    model = get_model("embedding", model_name)
+    return encode_bucketed(model, texts, batch_size, options["max_seq_length"], options["max_batch_tokens"], features)
+
+def truncate_embeddings(embeddings, dimensions: int) -> np.ndarray:
+    """
+    Truncate embeddings to the requested dimensions, re-normalizing so cosine similarity stays meaningful.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if dimensions is None:
+        return embeddings
+    embeddings = embeddings[:, :dimensions]
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
 @router.post("/")
 async def openai_compatible_embedding(
-    request: EmbeddingRequest
+    request: EmbeddingRequest,
+    accept: str = Header(None),
 ):
     """
     Generate embeddings in an OpenAI API-compatible format.
+
+    Send `Accept: application/octet-stream` for the raw embedding matrix or `Accept: application/msgpack`
+    for the same response structure in msgpack.
     """
+    options = get_setting("openai_embeddings", {})
+    max_batch_size = options.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE)
+
+    # Normalize the input to a list of texts or a list of token ID lists
+    texts, token_inputs = None, None
+    if isinstance(request.input, str):
+        texts = [request.input]
+    elif isinstance(request.input[0], str):
+        texts = request.input
+    elif isinstance(request.input[0], int):
+        token_inputs = [request.input]
+    else:
+        token_inputs = request.input
+
+    input_count = len(texts) if texts is not None else len(token_inputs)
+    if input_count > max_batch_size:
+        raise HTTPException(status_code=400, detail=f"Too many inputs: {input_count} exceeds the maximum batch size of {max_batch_size}.")
+
+    async with admit("openai_embeddings", texts if texts is not None else token_inputs):
+        # Correct the input text
+        if texts is not None:
+            texts = await run_in_pool("preprocess", correct_inputs, texts, request.normalize)
+
+        # Retrieve model from request or use default from config
+        model_name = request.model if request.model else "all-MiniLM-L6-v2"
+        try:
+            # Load the model and count tokens off the event loop, so unsupported names fail with a 400
+            texts, token_counts, features = await run_task("embedding", prepare_inputs, model_name, texts, token_inputs)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if request.dimensions is not None:
+            model_dimensions = get_model("embedding", model_name).get_sentence_embedding_dimension()
+            if request.dimensions > model_dimensions:
+                raise HTTPException(status_code=400, detail=f"dimensions must not exceed {model_dimensions} for model {model_name}.")
+
+        # Generate embeddings for cache misses: single inputs are batched with concurrent requests,
+        # lists are encoded in one call
+        encode_batch_size = options.get("encode_batch_size", DEFAULT_ENCODE_BATCH_SIZE)
+
+        features_by_text = dict(zip(texts, features)) if features is not None else None
 
-    # Correct the input text
-    corrected_text = correct_sentence_spacing(request.input)
+        async def encode(missing_texts):
+            if len(missing_texts) == 1:
+                return [await get_batcher("embedding", model_name).submit(missing_texts[0])]
+            missing_features = [features_by_text[text] for text in missing_texts] if features_by_text else None
+            return await run_task("embedding", encode_inputs, model_name, missing_texts, encode_batch_size, missing_features)
 
-    # Retrieve model from request or use default from config
-    model_name = request.model if request.model else "all-MiniLM-L6-v2"
-    try:
-        embedding_model = get_model("embedding", model_name)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        embeddings = await cached_embeddings(resolve_model_id("embedding", model_name), texts, encode)
 
-    # Generate embedding
-    embedding = embedding_model.encode(corrected_text).tolist()
+    # float16 only applies to the binary encodings; JSON numbers are written from float32
+    binary = negotiate(accept) != "json" or request.encoding_format == "base64"
+    embeddings = prepare_embeddings(
+        truncate_embeddings(embeddings, request.dimensions),
+        request.normalize_embeddings,
+        request.precision,
+        request.dtype if binary else "float32",
+    )
 
     # Simulate OpenAI's embedding API response format
     response = {
@@ -33,15 +147,16 @@ async def openai_compatible_embedding(
         "data": [
             {
                 "object": "embedding",
-                "index": 0,
-                "embedding": embedding,
+                "index": index,
+                "embedding": encode_base64(embedding) if request.encoding_format == "base64" else embedding,
             }
+            for index, embedding in enumerate(embeddings)
         ],
         "model": model_name,
         "usage": {
-            "prompt_tokens": len(corrected_text.split()),  # Rough approximation
-            "total_tokens": len(corrected_text.split()),
+            "prompt_tokens": sum(token_counts),
+            "total_tokens": sum(token_counts),
         }
     }
 
-    return response
+    return embedding_response(accept, response, embeddings, headers={"X-Prompt-Tokens": str(sum(token_counts))})
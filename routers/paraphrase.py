@@ -1,22 +1,42 @@
 from fastapi import APIRouter, HTTPException, Depends
-from schemas.requests import TextRequest
+from schemas.requests import ParaphraseRequest
 from utils.auth import get_api_key
 from models.nlp_models import get_model
-from utils.text_processing import correct_sentence_spacing
+from utils.text_processing import normalize_text
+from utils.executors import run_in_pool, run_task
+from utils.admission import admit
+from utils.streaming import stream_generation
 
 router = APIRouter(prefix="/paraphrase", tags=["Paraphrasing"])
 
 @router.post("/", dependencies=[Depends(get_api_key)])
-async def paraphrase(request: TextRequest):
-    corrected_text = correct_sentence_spacing(request.text)
-    # Get paraphrasing model
-    paraphraser = get_model("paraphrase", "Vamsi/T5_Paraphrase_Paws")
-    # Paraphrase text
-    paraphrased = paraphraser(
-        f"paraphrase: {corrected_text}", 
-        max_length=150, 
-        num_return_sequences=1, 
-        do_sample=True, 
-        temperature=0.9
-    )
-    return {"paraphrased_text": paraphrased[0]["generated_text"]}
+async def paraphrase(request: ParaphraseRequest):
+    async with admit("paraphrase", request.text) as slot:
+        corrected_text = await run_in_pool("preprocess", normalize_text, request.text, "paraphrase", request.normalize)
+        # Get paraphrasing model; a lazily loaded model is loaded in the generation pool
+        paraphraser = await run_task("paraphrase", get_model, "paraphrase")
+
+        if request.stream:
+            # Stream tokens as they are sampled; generation stops if the client disconnects
+            return stream_generation(
+                "paraphrase",
+                paraphraser,
+                f"paraphrase: {corrected_text}",
+                slot,
+                max_length=150,
+                num_return_sequences=1,
+                do_sample=True,
+                temperature=0.9,
+            )
+
+        # Paraphrase text in the generation pool
+        paraphrased = await run_task(
+            "paraphrase",
+            paraphraser,
+            f"paraphrase: {corrected_text}", 
+            max_length=150, 
+            num_return_sequences=1, 
+            do_sample=True, 
+            temperature=0.9
+        )
+        return {"paraphrased_text": paraphrased[0]["generated_text"]}
@@ -1,16 +1,117 @@
 from fastapi import APIRouter, HTTPException, Depends
-from schemas.requests import TextRequest
+from schemas.requests import SentimentRequest
 from utils.auth import get_api_key
-from models.nlp_models import get_model
-from utils.text_processing import correct_sentence_spacing
+from models.nlp_models import get_model, resolve_model_id
+from utils.batching import get_batcher
+from utils.bucketing import bucketing_options, classify_bucketed
+from utils.config import get_setting
+from utils.result_cache import cached_result
+from utils.text_processing import normalize_sentences, normalize_text
+from utils.executors import run_in_pool, run_task
+from utils.admission import admit
 
 router = APIRouter(prefix="/sentiment", tags=["Sentiment Analysis"])
 
+# Built-in document mode options, overridable under "sentiment_document" in models_config.json
+DEFAULT_DOCUMENT_OPTIONS = {"max_sentences": 512, "batch_size": 64}
+
+async def classify_sentiment(text: str) -> dict:
+    """
+    Classify the sentiment of normalized text, batched with concurrent requests.
+
+    Results are cached, and identical concurrent requests share one classification.
+    """
+    return await cached_result(
+        "sentiment", resolve_model_id("sentiment"), {}, text, lambda: get_batcher("sentiment").submit(text)
+    )
+
+def classify_sentences(sentences: list, batch_size: int) -> list:
+    """
+    Score every label of every sentence in one bucketed pass, so a document costs about one forward pass.
+    """
+    options = bucketing_options("sentiment")
+    classifier = get_model("sentiment")
+    if not options["enabled"]:
+        return classifier(sentences, batch_size=batch_size, truncation=True, top_k=None)
+    return classify_bucketed(
+        classifier, sentences, batch_size, options["max_seq_length"], options["max_batch_tokens"], all_scores=True
+    )
+
+def aggregate_sentiment(sentences: list, scores: list, aggregation: str) -> dict:
+    """
+    Combine per-sentence label scores into a document sentiment.
+
+    Args:
+        sentences (list): The sentences.
+        scores (list): Every label's score for each sentence, as `[{"label", "score"}, ...]`.
+        aggregation (str): "mean" averages the label scores over sentences; "weighted" does the same with
+            each sentence weighted by its length, so short fragments count less; "majority" takes the label
+            most sentences lean to, scored by the share of sentences that do.
+
+    Returns:
+        dict: The document's "label" and "score", plus the averaged "scores" or the "votes" per label.
+    """
+    if aggregation == "majority":
+        votes = {}
+        for sentence_scores in scores:
+            label = sentence_scores[0]["label"]
+            votes[label] = votes.get(label, 0) + 1
+        # Ties go to the label with the higher total score
+        totals = {}
+        for sentence_scores in scores:
+            for item in sentence_scores:
+                totals[item["label"]] = totals.get(item["label"], 0.0) + item["score"]
+        label = max(votes, key=lambda name: (votes[name], totals[name]))
+        return {"label": label, "score": votes[label] / len(scores), "votes": votes}
+
+    weights = [len(sentence) if aggregation == "weighted" else 1 for sentence in sentences]
+    total_weight = sum(weights)
+    averaged = {}
+    for weight, sentence_scores in zip(weights, scores):
+        for item in sentence_scores:
+            averaged[item["label"]] = averaged.get(item["label"], 0.0) + item["score"] * weight / total_weight
+    label = max(averaged, key=averaged.get)
+    return {"label": label, "score": averaged[label], "scores": averaged}
+
+async def classify_document(sentences: list, aggregation: str) -> dict:
+    """
+    Classify each sentence of a document and aggregate the scores.
+
+    The per-sentence scores are cached, keyed by the sentences, so changing the aggregation does not
+    classify the document again.
+    """
+    options = dict(DEFAULT_DOCUMENT_OPTIONS)
+    options.update(get_setting("sentiment_document", {}))
+    if len(sentences) > options["max_sentences"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Document has {len(sentences)} sentences; at most {options['max_sentences']} are supported.",
+        )
+
+    scores = await cached_result(
+        "sentiment", resolve_model_id("sentiment"), {"mode": "document"}, "\n".join(sentences),
+        lambda: run_task("sentiment", classify_sentences, sentences, options["batch_size"]),
+    )
+    return {
+        "sentiment": [aggregate_sentiment(sentences, scores, aggregation)],
+        "aggregation": aggregation,
+        "sentences": [
+            {"text": sentence, "label": sentence_scores[0]["label"], "score": sentence_scores[0]["score"]}
+            for sentence, sentence_scores in zip(sentences, scores)
+        ],
+    }
+
 @router.post("/", dependencies=[Depends(get_api_key)])
-async def sentiment(request: TextRequest):
-    corrected_text = correct_sentence_spacing(request.text)
-    # Get sentiment analysis model
-    sentiment_analyzer = get_model("sentiment", "distilbert-base-uncased-finetuned-sst-2-english")
-    # Analyze sentiment
-    result = sentiment_analyzer(corrected_text)
-    return {"sentiment": result}
+async def sentiment(request: SentimentRequest):
+    async with admit("sentiment", request.text):
+        if request.mode == "document":
+            # One sentence split serves both the spacing correction and the per-sentence classification
+            sentences = await run_in_pool("preprocess", normalize_sentences, request.text, "sentiment", request.normalize)
+            if not sentences:
+                raise HTTPException(status_code=400, detail="Text contains no sentences.")
+            return await classify_document(sentences, request.aggregation)
+
+        corrected_text = await run_in_pool("preprocess", normalize_text, request.text, "sentiment", request.normalize)
+        # Analyze sentiment, batched with concurrent requests
+        result = await classify_sentiment(corrected_text)
+        return {"sentiment": [result]}
@@ -0,0 +1,129 @@
+from fastapi import APIRouter, HTTPException, Depends
+from schemas.requests import SimilarityAddRequest, SimilarityDeleteRequest, SimilarityIndexRequest, SimilarityQueryRequest
+from utils.auth import get_api_key
+from models.nlp_models import default_models, resolve_model_id
+from utils.batching import get_batcher
+from utils.embedding_cache import cached_embeddings
+from utils.text_processing import normalize_text
+from utils.executors import run_in_pool, run_task
+from utils.admission import admit
+from utils.vector_index import get_vector_index
+from routers.openai_compatible_embedding import DEFAULT_ENCODE_BATCH_SIZE, encode_inputs
+
+router = APIRouter(prefix="/similarity", tags=["Similarity Search"])
+
+def correct_texts(texts: list, normalize: bool) -> list:
+    """
+    Correct the spacing of each text.
+    """
+    return [normalize_text(text, "similarity", normalize) for text in texts]
+
+async def embed_texts(texts: list, model_name: str):
+    """
+    Embed texts through the shared cache; a single miss is batched with concurrent requests.
+    """
+    async def encode(missing_texts):
+        if len(missing_texts) == 1:
+            return [await get_batcher("embedding", model_name).submit(missing_texts[0])]
+        return await run_task("embedding", encode_inputs, model_name, missing_texts, DEFAULT_ENCODE_BATCH_SIZE)
+
+    return await cached_embeddings(resolve_model_id("embedding", model_name), texts, encode)
+
+def existing_collection(name: str):
+    try:
+        collection = get_vector_index().get(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if collection is None:
+        raise HTTPException(status_code=404, detail=f"Collection {name} not found.")
+    return collection
+
+@router.get("/collections", dependencies=[Depends(get_api_key)])
+async def list_collections():
+    """
+    List the collections stored on this server.
+    """
+    return {"collections": get_vector_index().names()}
+
+@router.get("/collections/{name}", dependencies=[Depends(get_api_key)])
+async def collection_stats(name: str):
+    """
+    Report a collection's size, model and IVF index state.
+    """
+    try:
+        return existing_collection(name).stats()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/collections/{name}", dependencies=[Depends(get_api_key)])
+async def drop_collection(name: str):
+    """
+    Delete a collection and its files.
+    """
+    existing_collection(name)
+    await run_in_pool("search", get_vector_index().drop, name)
+    return {"deleted": name}
+
+@router.post("/collections/{name}/documents", dependencies=[Depends(get_api_key)])
+async def add_documents(name: str, request: SimilarityAddRequest):
+    """
+    Embed documents and add them to a collection, creating it on first use.
+
+    Vectors are appended to the collection's memory-mapped matrix; documents with an existing ID replace it.
+    """
+    model_name = request.model or default_models.get("embedding")
+    ids = [document.id for document in request.documents]
+    texts = [document.text for document in request.documents]
+
+    async with admit("similarity_add", texts):
+        texts = await run_in_pool("preprocess", correct_texts, texts, request.normalize)
+        try:
+            embeddings = await embed_texts(texts, model_name)
+            collection = get_vector_index().get_or_create(name, embeddings.shape[1], model_name)
+            return await run_in_pool("search", collection.add, ids, embeddings)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/collections/{name}/delete", dependencies=[Depends(get_api_key)])
+async def delete_documents(name: str, request: SimilarityDeleteRequest):
+    """
+    Delete documents from a collection by ID; deleted rows are reclaimed by periodic compaction.
+    """
+    collection = existing_collection(name)
+    try:
+        return await run_in_pool("search", collection.delete, request.ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/collections/{name}/index", dependencies=[Depends(get_api_key)])
+async def build_index(name: str, request: SimilarityIndexRequest):
+    """
+    Train (or retrain) the collection's IVF index used by approximate search.
+    """
+    collection = existing_collection(name)
+    try:
+        ivf = await run_in_pool("search", collection.build_ivf, request.nlist)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ivf": ivf}
+
+@router.post("/collections/{name}/query", dependencies=[Depends(get_api_key)])
+async def query(name: str, request: SimilarityQueryRequest):
+    """
+    Find the documents most similar to the query text, by cosine similarity.
+    """
+    collection = existing_collection(name)
+    single = isinstance(request.text, str)
+    texts = [request.text] if single else request.text
+
+    async with admit("similarity_query", texts):
+        texts = await run_in_pool("preprocess", correct_texts, texts, request.normalize)
+        # Queries are embedded with the collection's own model
+        embeddings = await embed_texts(texts, collection.model)
+        try:
+            matches = await run_in_pool("search", collection.search, embeddings, request.top_k, request.mode, request.nprobe)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    results = [{"matches": [{"id": row_id, "score": score} for row_id, score in query_matches]} for query_matches in matches]
+    return results[0] if single else {"results": results}
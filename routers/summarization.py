@@ -1,23 +1,167 @@
+import time
 from fastapi import APIRouter, HTTPException, Depends
-from schemas.requests import TextRequest
+from schemas.requests import SummarizationRequest
 from utils.auth import get_api_key
-from models.nlp_models import get_model
-from utils.text_processing import correct_sentence_spacing
+from models.nlp_models import get_model, resolve_model_id
+from utils.config import get_setting
+from utils.text_processing import normalize_text, chunk_spans, encode_for_chunking
+from utils.executors import run_in_pool, run_task
+from utils.admission import admit
+from utils.streaming import stream_generation
+from utils.result_cache import cached_result
 
 router = APIRouter(prefix="/summarize", tags=["Summarization"])
 
-@router.post("/", dependencies=[Depends(get_api_key)])
-async def summarize(request: TextRequest):
-    corrected_text = correct_sentence_spacing(request.text)
-    # Get summarization model
+# Built-in options, overridable under "summarization" in models_config.json
+DEFAULT_OPTIONS = {
+    "max_length": 450,  # Upper bound on summary length in tokens
+    "min_length": 150,  # Upper bound on the minimum summary length in tokens
+    "length_ratio": 0.5,  # Summary length as a fraction of the input length
+    "chunk_overlap": 64,  # Tokens shared by consecutive chunks in long-document mode
+    "batch_size": 4,  # Chunks summarized per forward pass
+    "max_reduce_passes": 3,  # Limit on repeated reduce passes over very long documents
+}
+
+def summary_lengths(input_tokens: int, options: dict):
+    """
+    Scale the summary length bounds with the input length, so short texts are not padded out to a fixed minimum.
+
+    Returns:
+        tuple: The (min_length, max_length) generation bounds.
+    """
+    max_length = max(16, min(options["max_length"], int(input_tokens * options["length_ratio"])))
+    min_length = min(options["min_length"], max_length // 3)
+    return min_length, max_length
+
+def generate_summaries(summarizer, texts: list, options: dict) -> list:
+    """
+    Summarize several texts, batching together the texts that share generation bounds.
+    """
+    token_counts = [len(ids) for ids in summarizer.tokenizer(texts, truncation=True)["input_ids"]]
+    groups = {}
+    for i, token_count in enumerate(token_counts):
+        groups.setdefault(summary_lengths(token_count, options), []).append(i)
+
+    summaries = [None] * len(texts)
+    for (min_length, max_length), indices in groups.items():
+        results = summarizer(
+            [texts[i] for i in indices],
+            batch_size=options["batch_size"],
+            max_length=max_length,
+            min_length=min_length,
+            do_sample=False,  # Use deterministic summarization with BART
+            num_beams=4,  # Use beam search for better results
+            early_stopping=True,  # Stop when all beams finish
+            truncation=True,  # Never fail on input past the model's window
+        )
+        for i, result in zip(indices, results):
+            summaries[i] = result["summary_text"]
+    return summaries
+
+def summarize_document(text: str, mode: str, reduce: bool) -> dict:
+    """
+    Summarize text in a single pass, or map-reduce it over token-aware chunks when it exceeds the model's window.
+    """
+    options = dict(DEFAULT_OPTIONS)
+    options.update(get_setting("summarization", {}))
     summarizer = get_model("summarization")
-    # Generate the summary
-    summary = summarizer(
-        corrected_text,
-        max_length=450,  # Adjust maximum length based on the desired summary length
-        min_length=150,  # Adjust minimum length to ensure a decent-sized summary
-        do_sample=False,  # Use deterministic summarization with BART
-        num_beams=4,  # Use beam search for better results
-        early_stopping=True,  # Stop when all beams finish
-    )
-    return {"summary": summary[0]["summary_text"]}
+    tokenizer = summarizer.tokenizer
+    window = min(tokenizer.model_max_length, 1024)
+    timings = {}
+
+    # Tokenize once; the same encoding sizes the input and, for long documents, places the chunk boundaries
+    start_time = time.perf_counter()
+    encoding = encode_for_chunking(text, tokenizer)
+    input_tokens = len(encoding["input_ids"]) + tokenizer.num_special_tokens_to_add()
+    timings["tokenize_ms"] = (time.perf_counter() - start_time) * 1000
+
+    if mode == "single" or (mode == "auto" and input_tokens <= window):
+        start_time = time.perf_counter()
+        summary = generate_summaries(summarizer, [text], options)[0]
+        timings["generate_ms"] = (time.perf_counter() - start_time) * 1000
+        return {"summary": summary, "mode": "single", "input_tokens": input_tokens, "chunks": 1, "timings": timings}
+
+    # Map: summarize each chunk, all chunks in batched calls
+    start_time = time.perf_counter()
+    spans = chunk_spans(text, tokenizer, max_length=window, overlap=options["chunk_overlap"], encoding=encoding)
+    chunks = [text[start:end] for start, end in spans]
+    partial_summaries = generate_summaries(summarizer, chunks, options)
+    timings["map_ms"] = (time.perf_counter() - start_time) * 1000
+
+    if not reduce or len(partial_summaries) == 1:
+        return {
+            "summary": " ".join(partial_summaries),
+            "mode": "long",
+            "input_tokens": input_tokens,
+            "chunks": len(chunks),
+            "timings": timings,
+        }
+
+    # Reduce: summarize the partial summaries, chunking again while they still exceed the window
+    start_time = time.perf_counter()
+    combined = " ".join(partial_summaries)
+    for _ in range(options["max_reduce_passes"] - 1):
+        combined_encoding = encode_for_chunking(combined, tokenizer)
+        if len(combined_encoding["input_ids"]) + tokenizer.num_special_tokens_to_add() <= window:
+            break
+        reduce_spans = chunk_spans(combined, tokenizer, max_length=window, overlap=0, encoding=combined_encoding)
+        reduce_chunks = [combined[start:end] for start, end in reduce_spans]
+        combined = " ".join(generate_summaries(summarizer, reduce_chunks, options))
+    summary = generate_summaries(summarizer, [combined], options)[0]
+    timings["reduce_ms"] = (time.perf_counter() - start_time) * 1000
+
+    return {"summary": summary, "mode": "long", "input_tokens": input_tokens, "chunks": len(chunks), "timings": timings}
+
+def count_input_tokens(summarizer, text: str) -> int:
+    """
+    Count the tokens the summarizer will see, after truncation to its input window.
+    """
+    return len(summarizer.tokenizer(text, truncation=True)["input_ids"])
+
+@router.post("/", dependencies=[Depends(get_api_key)])
+async def summarize(request: SummarizationRequest):
+    if request.stream and request.mode == "long":
+        raise HTTPException(status_code=400, detail="Streaming is not supported in long-document mode.")
+
+    # Streamed responses keep their slot until generation finishes
+    async with admit("summarize", request.text) as slot:
+        start_time = time.perf_counter()
+        corrected_text = await run_in_pool("preprocess", normalize_text, request.text, "summarize", request.normalize)
+        preprocess_ms = (time.perf_counter() - start_time) * 1000
+
+        if request.stream:
+            # Streamers do not support beam search, so streamed summaries are generated greedily
+            # from the input window, without long-document chunking
+            options = dict(DEFAULT_OPTIONS)
+            options.update(get_setting("summarization", {}))
+            summarizer = await run_task("summarization", get_model, "summarization")
+            input_tokens = await run_in_pool("preprocess", count_input_tokens, summarizer, corrected_text)
+            min_length, max_length = summary_lengths(input_tokens, options)
+            prefix = getattr(summarizer.model.config, "prefix", None) or ""
+            return stream_generation(
+                "summarization",
+                summarizer,
+                prefix + corrected_text,
+                slot,
+                max_length=max_length,
+                min_length=min_length,
+                do_sample=False,
+                num_beams=1,
+            )
+
+        # Generate the summary in the generation pool so the event loop stays responsive. Decoding is
+        # deterministic, so summaries are cached and identical concurrent requests share one generation;
+        # the summarization options are part of the key so configuration changes take effect
+        options = dict(DEFAULT_OPTIONS)
+        options.update(get_setting("summarization", {}))
+        params = {"mode": request.mode, "reduce": request.reduce, "do_sample": False, **options}
+        result = await cached_result(
+            "summarize",
+            resolve_model_id("summarization"),
+            params,
+            corrected_text,
+            lambda: run_task("summarization", summarize_document, corrected_text, request.mode, request.reduce),
+        )
+        result["timings"] = {"preprocess_ms": preprocess_ms, **result["timings"]}
+        result["timings"] = {stage: round(ms, 2) for stage, ms in result["timings"].items()}
+        return result
@@ -1,24 +1,41 @@
 from fastapi import APIRouter, HTTPException, Depends
 from schemas.requests import TokenizeRequest
-from models.nlp_models import get_model
 from utils.auth import get_api_key 
-from utils.text_processing import correct_sentence_spacing
+from utils.fast_tokenizers import encode_texts
+from utils.text_processing import normalize_text
+from utils.executors import run_in_pool
 
 router = APIRouter(prefix="/tokenize", tags=["Tokenization"])
 
+def tokenize_texts(texts: list, model_name: str, normalize: bool, return_tokens: bool, return_offsets: bool) -> dict:
+    """
+    Correct the spacing of each text and tokenize them all in one batch.
+    """
+    texts = [normalize_text(text, "tokenize", normalize) for text in texts]
+    return encode_texts(model_name, texts, return_tokens, return_offsets)
+
 @router.post("/", dependencies=[Depends(get_api_key)])
 async def tokenize(request: TokenizeRequest):
-    corrected_text = correct_sentence_spacing(request.text)
-    
+    """
+    Tokenize one text or a list of texts with the standalone fast tokenizer of an embedding model.
+
+    Set `return_tokens` to false to get only counts, and `return_offsets` to true for character offsets
+    into the normalized text.
+    """
     # Use the provided model or default to the embedding model
     model_name = request.model if request.model else "all-MiniLM-L6-v2"
-    
+    single = isinstance(request.text, str)
+    texts = [request.text] if single else request.text
+
+    # Only the tokenizer is loaded, never the model weights; loading it may still download tokenizer.json
     try:
-        tokenizer = get_model("embedding", model_name).tokenizer
+        result = await run_in_pool(
+            "preprocess", tokenize_texts, texts, model_name, request.normalize, request.return_tokens, request.return_offsets
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    
-    # Tokenize the text
-    tokens = tokenizer.encode(corrected_text, return_tensors='pt').tolist()[0]
-    
-    return {"tokens": tokens}
+
+    if single:
+        # A single text keeps the original response shape: flat lists and one count
+        return {("count" if key == "counts" else key): value[0] for key, value in result.items()}
+    return result
@@ -1,27 +1,153 @@
-from pydantic import BaseModel, constr, conlist
-from typing import Optional
+from pydantic import BaseModel, constr, conlist, conint, confloat, model_validator
+from typing import Optional, Union, List, Literal
 
 class TextRequest(BaseModel):
     """
     Schema for simple text requests.
     """
     text: constr(min_length=1, max_length=5000)
+    normalize: bool = True  # Set to False to skip spacing correction for already clean text
+
+class ParaphraseRequest(TextRequest):
+    """
+    Schema for paraphrase requests.
+    """
+    stream: bool = False  # Stream tokens as Server-Sent Events while they are generated
+
+class SentimentRequest(BaseModel):
+    """
+    Schema for sentiment requests; document mode accepts long texts and scores them sentence by sentence.
+    """
+    text: constr(min_length=1, max_length=100000)
+    normalize: bool = True  # Set to False to skip spacing correction for already clean text
+    mode: Literal["text", "document"] = "text"  # "document" classifies each sentence and aggregates the scores
+    aggregation: Literal["mean", "weighted", "majority"] = "weighted"  # How document mode combines sentence scores
+
+    @model_validator(mode="after")
+    def check_text_length(self):
+        # The whole text is classified at once in text mode, so it keeps the usual limit
+        if self.mode == "text" and len(self.text) > 5000:
+            raise ValueError("text is limited to 5000 characters in text mode; use document mode for longer texts")
+        return self
+
+class SummarizationRequest(BaseModel):
+    """
+    Schema for summarization requests, which accept long documents.
+    """
+    text: constr(min_length=1, max_length=500000)
+    normalize: bool = True  # Set to False to skip spacing correction for already clean text
+    mode: Literal["auto", "single", "long"] = "auto"  # "auto" switches to long-document mode past the model's input window
+    reduce: bool = True  # In long-document mode, summarize the chunk summaries into one final summary
+    stream: bool = False  # Stream tokens as Server-Sent Events while they are generated
+
+class EmbedRequest(TextRequest):
+    """
+    Schema for embedding requests, with opt-in options that shrink the response.
+    """
+    encoding_format: Literal["float", "base64"] = "float"
+    normalize_embeddings: bool = False  # Scale the vector to unit length
+    precision: Optional[conint(ge=1, le=8)] = None  # Decimal places kept in JSON output
+    dtype: Literal["float32", "float16"] = "float32"  # Element type of base64, msgpack and octet-stream output
 
 class EmbeddingRequest(BaseModel):
     """
     Schema for OpenAI-compatible embedding requests.
+
+    `input` accepts a string, a list of strings, a list of token IDs, or a list of token ID lists.
     """
-    input: constr(min_length=1, max_length=5000)
+    input: Union[
+        constr(min_length=1, max_length=5000),
+        conlist(constr(min_length=1, max_length=5000), min_length=1),
+        conlist(int, min_length=1),
+        conlist(conlist(int, min_length=1), min_length=1),
+    ]
     model: str
+    encoding_format: Literal["float", "base64"] = "float"
+    dimensions: Optional[conint(gt=0)] = None
+    user: Optional[str] = None  # Accepted for compatibility, not used
+    normalize: bool = True  # Set to False to skip spacing correction for already clean text
+    normalize_embeddings: bool = False  # Scale each vector to unit length
+    precision: Optional[conint(ge=1, le=8)] = None  # Decimal places kept in JSON output
+    dtype: Literal["float32", "float16"] = "float32"  # Element type of base64, msgpack and octet-stream output
 
 class TokenizeRequest(BaseModel):
     """
-    Schema for OpenAI-compatible embedding requests.
+    Schema for tokenization requests over one text or a list of texts.
     """
-    text: constr(min_length=1, max_length=5000)
+    text: Union[
+        constr(min_length=1, max_length=5000),
+        conlist(constr(min_length=1, max_length=5000), min_length=1, max_length=256),
+    ]
     model: Optional[str] = None  # Optional, defaults to embedding model
+    normalize: bool = True  # Set to False to skip spacing correction for already clean text
+    return_tokens: bool = True  # Set to False to return only token counts (and offsets, if requested)
+    return_offsets: bool = False  # Character offsets of each token in the normalized text
     
+class KeywordBatchRequest(BaseModel):
+    """
+    Schema for keyword extraction over a batch of documents.
+    """
+    texts: conlist(constr(min_length=1, max_length=5000), min_length=1, max_length=64)
+    num_keywords: conint(gt=0, le=20) = 5
+    use_mmr: bool = False  # Diversify keywords with Maximal Marginal Relevance
+    diversity: confloat(ge=0, le=1) = 0.5  # MMR trade-off between relevance (0) and diversity (1)
+    use_maxsum: bool = False  # Diversify keywords with Max Sum Distance
+    nr_candidates: conint(gt=0, le=50) = 20  # Candidates considered by Max Sum Distance
+    normalize: bool = True  # Set to False to skip spacing correction for already clean text
+
+class AnalyzeRequest(BaseModel):
+    """
+    Schema for multi-task analysis requests over one text or a list of texts.
+    """
+    text: Union[
+        constr(min_length=1, max_length=5000),
+        conlist(constr(min_length=1, max_length=5000), min_length=1, max_length=64),
+    ]
+    tasks: conlist(Literal["sentiment", "entities", "keywords", "embedding"], min_length=1)
+    num_keywords: conint(gt=0, le=20) = 5
+    normalize: bool = True  # Set to False to skip spacing correction for already clean text
+
 class DetokenizeRequest(BaseModel):
-    tokens: conlist(int, min_length=1)
+    tokens: Union[conlist(int, min_length=1), conlist(conlist(int, min_length=1), min_length=1, max_length=256)]
     model: Optional[str] = None  # Optional, defaults to embedding model
-    
\ No newline at end of file
+    
+class EmbeddingJobRequest(BaseModel):
+    """
+    Schema for bulk embedding jobs over a file in the configured input directory.
+    """
+    path: constr(min_length=1)  # Relative to the input directory
+    format: Literal["jsonl", "text"] = "jsonl"
+    model: Optional[str] = None  # Optional, defaults to embedding model
+    text_field: str = "text"  # JSONL field holding the text
+    id_field: str = "id"  # JSONL field holding the record ID; line numbers are used when it is missing
+
+class SimilarityDocument(BaseModel):
+    id: constr(min_length=1, max_length=256)
+    text: constr(min_length=1, max_length=5000)
+
+class SimilarityAddRequest(BaseModel):
+    """
+    Schema for adding documents to a similarity collection; existing IDs are replaced.
+    """
+    documents: conlist(SimilarityDocument, min_length=1, max_length=256)
+    model: Optional[str] = None  # Optional, defaults to embedding model; fixed per collection
+    normalize: bool = True  # Set to False to skip spacing correction for already clean text
+
+class SimilarityDeleteRequest(BaseModel):
+    ids: conlist(constr(min_length=1, max_length=256), min_length=1, max_length=10000)
+
+class SimilarityQueryRequest(BaseModel):
+    """
+    Schema for similarity search over one query text or a list of them.
+    """
+    text: Union[
+        constr(min_length=1, max_length=5000),
+        conlist(constr(min_length=1, max_length=5000), min_length=1, max_length=64),
+    ]
+    top_k: conint(gt=0, le=1000) = 10
+    mode: Literal["exact", "approximate", "auto"] = "auto"  # "auto" uses the IVF index on very large collections
+    nprobe: Optional[conint(gt=0)] = None  # IVF lists scanned per query in approximate mode
+    normalize: bool = True  # Set to False to skip spacing correction for already clean text
+
+class SimilarityIndexRequest(BaseModel):
+    nlist: Optional[conint(gt=0)] = None  # IVF lists; defaults to about 4 * sqrt(rows)
@@ -0,0 +1,67 @@
+# test_keyword_engine.py
+import hashlib
+from itertools import combinations
+import numpy as np
+from models import keyword_engine
+from models.keyword_engine import MAX_SUM_COMBINATIONS, KeywordEngine, _max_sum
+from utils.embedding_cache import EmbeddingCache
+
+def make_similarities(candidates: int, dimensions: int = 32, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.normal(size=(candidates, dimensions)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    document = embeddings.mean(axis=0)
+    document /= np.linalg.norm(document)
+    return embeddings @ document, embeddings @ embeddings.T
+
+def hash_encode(texts: list) -> np.ndarray:
+    # A deterministic stand-in for the keyword model: a bag of hashed words
+    embeddings = np.zeros((len(texts), 64), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.split():
+            embeddings[row, int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % 64] += 1.0
+    return embeddings
+
+def test_max_sum_with_largest_allowed_parameters_is_greedy(monkeypatch):
+    # nr_candidates=50 and num_keywords=20 are the API maximums: C(50, 20) combinations must not be enumerated
+    def fail(*args):
+        raise AssertionError("exhaustive search used past MAX_SUM_COMBINATIONS")
+
+    greedy_calls = []
+    greedy = keyword_engine._greedy_max_sum
+    monkeypatch.setattr(keyword_engine, "_exhaustive_max_sum", fail)
+    monkeypatch.setattr(keyword_engine, "_greedy_max_sum", lambda *args: greedy_calls.append(args) or greedy(*args))
+
+    doc_similarity, candidate_similarity = make_similarities(200)
+    selected = _max_sum(doc_similarity, candidate_similarity, 20, 50)
+    assert len(greedy_calls) == 1
+    assert len(selected) == 20
+    assert len(set(selected)) == 20
+    # Every keyword comes from the 50 most relevant candidates
+    assert set(selected) <= set(np.argsort(doc_similarity)[-50:].tolist())
+
+def test_max_sum_searches_small_shortlists_exhaustively():
+    doc_similarity, candidate_similarity = make_similarities(40)
+    selected = _max_sum(doc_similarity, candidate_similarity, 3, 10)
+    assert len(selected) == 3
+    shortlist = np.argsort(doc_similarity)[-10:]
+
+    def self_similarity(ids):
+        ids = list(ids)
+        return candidate_similarity[np.ix_(ids, ids)].sum() - len(ids)
+
+    # C(10, 3) is within the exhaustive limit, so the least self-similar combination is found
+    assert MAX_SUM_COMBINATIONS >= 120
+    best = min(self_similarity(combination) for combination in combinations(shortlist, 3))
+    assert np.isclose(self_similarity(selected), best)
+
+def test_engine_extracts_with_an_injected_encoder(monkeypatch):
+    monkeypatch.setattr(keyword_engine, "get_embedding_cache", EmbeddingCache)
+    engine = KeywordEngine(model_id="test", encode=hash_encode)
+    doc = "vector search engines index vector embeddings for fast similarity search"
+    for options in ({}, {"use_mmr": True}, {"use_maxsum": True, "nr_candidates": 10}):
+        keywords = engine.extract([doc], top_n=3, **options)[0]
+        assert len(keywords) == 3
+        assert all(phrase in engine.candidates(doc) for phrase, _ in keywords)
+        # Keywords come back sorted by relevance
+        assert [score for _, score in keywords] == sorted((score for _, score in keywords), reverse=True)
@@ -0,0 +1,316 @@
+# admission.py
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from utils.config import get_setting
+from utils.executors import run_in_pool
+
+# Built-in admission classes: a few expensive generation requests at a time, many cheap encoding requests.
+# seconds_per_token seeds the service-time estimate until real requests have been measured.
+DEFAULT_CLASSES = {
+    "generation": {"max_concurrent": 2, "max_queue": 32, "slo_ms": 30000, "seconds_per_token": 0.002},
+    "encoding": {"max_concurrent": 16, "max_queue": 256, "slo_ms": 2000, "seconds_per_token": 0.0002},
+}
+
+# Admission class, cost weight per input token, priority (lower runs first) and the task whose model's
+# tokenizer counts the input tokens, for each route
+DEFAULT_ROUTES = {
+    "summarize": {"class": "generation", "weight": 1.0, "priority": 1, "task": "summarization"},
+    "paraphrase": {"class": "generation", "weight": 1.0, "priority": 0, "task": "paraphrase"},
+    "embed": {"class": "encoding", "weight": 1.0, "priority": 0, "task": "embedding"},
+    "openai_embeddings": {"class": "encoding", "weight": 1.0, "priority": 0, "task": "embedding"},
+    "sentiment": {"class": "encoding", "weight": 1.0, "priority": 0, "task": "sentiment"},
+    "entities": {"class": "encoding", "weight": 2.0, "priority": 1, "task": "ner"},
+    "extract_keywords": {"class": "encoding", "weight": 3.0, "priority": 1, "task": "keyword"},
+    "analyze": {"class": "encoding", "weight": 6.0, "priority": 2, "task": "embedding"},
+    "similarity_add": {"class": "encoding", "weight": 1.0, "priority": 1, "task": "embedding"},
+    "similarity_query": {"class": "encoding", "weight": 1.5, "priority": 0, "task": "embedding"},
+}
+
+# Inputs up to this many characters are counted on the event loop; longer ones in the preprocess pool
+INLINE_COUNT_CHARS = 4096
+
+def estimate_tokens(inputs) -> int:
+    """
+    Approximate the token count of a text, a list of texts or a list of token ID lists, without tokenizing.
+
+    Text is counted at roughly four characters per token. This suits English prose but can be off several
+    times for CJK text or code, so it is only used when the route's model is not loaded yet.
+    """
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    tokens = sum(len(item) // 4 if isinstance(item, str) else len(item) for item in inputs)
+    return max(1, tokens)
+
+def count_tokens(task: str, inputs) -> int:
+    """
+    Count the input tokens of a text, a list of texts or a list of token ID lists with the tokenizer of the
+    task's model, falling back to `estimate_tokens` while that model is not loaded.
+    """
+    # Imported here because the tokenizers module imports the model stack
+    from utils.fast_tokenizers import model_tokenizer
+
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    texts = [item for item in inputs if isinstance(item, str)]
+    tokenizer = model_tokenizer(task) if task and texts else None
+    if tokenizer is None:
+        return estimate_tokens(inputs)
+    tokens = sum(len(encoding.ids) for encoding in tokenizer.encode_batch(texts, add_special_tokens=False))
+    tokens += sum(len(item) for item in inputs if not isinstance(item, str))
+    return max(1, tokens)
+
+async def count_input_tokens(task: str, inputs) -> int:
+    """
+    Count input tokens, tokenizing long inputs in the preprocess pool so the event loop is not blocked.
+    """
+    items = [inputs] if isinstance(inputs, str) else inputs
+    if sum(len(item) for item in items if isinstance(item, str)) <= INLINE_COUNT_CHARS:
+        return count_tokens(task, inputs)
+    return await run_in_pool("preprocess", count_tokens, task, inputs)
+
+class AdmissionQueue:
+    def __init__(self, name: str, max_concurrent: int = 4, max_queue: int = 64, slo_ms: float = 5000,
+                 seconds_per_token: float = 0.001):
+        """
+        Initialize the AdmissionQueue class, which admits requests of one class in priority order
+        and sheds load before queueing would breach the latency SLO.
+
+        Args:
+            name (str): The class name.
+            max_concurrent (int): The number of requests allowed to run at once.
+            max_queue (int): The number of requests allowed to wait.
+            slo_ms (float): The longest predicted queue wait accepted, in milliseconds.
+            seconds_per_token (float): The initial estimate of service time per unit of cost.
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.slo_seconds = slo_ms / 1000
+        self.seconds_per_token = seconds_per_token
+        self.active = 0
+        self.active_cost = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_slo = 0
+        self.queue_wait_seconds = 0.0
+        self.queue_wait_max_seconds = 0.0
+        self.queue_wait_histogram = {}
+
+    def predicted_wait(self, priority: int) -> float:
+        """
+        Predict how long a new request of the given priority would wait, from the cost ahead of it.
+        """
+        # Running requests are on average half done; waiters of equal or higher priority go first
+        cost_ahead = self.active_cost / 2 + sum(cost for p, _, cost, _ in self._waiters if p <= priority)
+        return cost_ahead * self.seconds_per_token / self.max_concurrent
+
+    async def acquire(self, cost: float, priority: int) -> float:
+        """
+        Wait for a slot.
+
+        Args:
+            cost (float): The request's estimated cost.
+            priority (int): The request's priority; lower values are admitted first.
+
+        Returns:
+            float: The seconds spent waiting.
+
+        Raises:
+            HTTPException: 503 if the queue is full, or 429 if the predicted wait exceeds the SLO,
+                both with a Retry-After header.
+        """
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.active_cost += cost
+            self.admitted += 1
+            self._record_wait(0.0)
+            return 0.0
+
+        predicted = self.predicted_wait(priority)
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, please retry later",
+                headers={"Retry-After": str(max(1, math.ceil(predicted)))},
+            )
+        if predicted > self.slo_seconds:
+            self.rejected_slo += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too Many Requests, please retry later",
+                headers={"Retry-After": str(max(1, math.ceil(predicted - self.slo_seconds)))},
+            )
+
+        start_time = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), cost, future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # A slot may have been handed over just as the caller went away; pass it on
+            if future.done() and not future.cancelled():
+                self.release(cost, None)
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+        waited = time.perf_counter() - start_time
+        self._record_wait(waited)
+        return waited
+
+    def _record_wait(self, waited):
+        self.queue_wait_seconds += waited
+        self.queue_wait_max_seconds = max(self.queue_wait_max_seconds, waited)
+        # Power-of-two millisecond buckets keep the histogram small
+        bucket = 1
+        while bucket < waited * 1000:
+            bucket *= 2
+        self.queue_wait_histogram[bucket] = self.queue_wait_histogram.get(bucket, 0) + 1
+
+    def release(self, cost: float, duration: float = None):
+        """
+        Free a slot and admit the next waiter.
+
+        Args:
+            cost (float): The finished request's cost.
+            duration (float): Its service time in seconds, used to refine the estimate, or None.
+        """
+        self.active -= 1
+        self.active_cost -= cost
+        if duration is not None and cost > 0:
+            # Exponentially weighted, so the estimate follows changes in load and model choice
+            self.seconds_per_token = 0.9 * self.seconds_per_token + 0.1 * (duration / cost)
+
+        while self._waiters and self.active < self.max_concurrent:
+            _, _, next_cost, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self.active += 1
+            self.active_cost += next_cost
+            self.admitted += 1
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        """
+        Return concurrency, rejection and queue-wait statistics.
+        """
+        return {
+            "name": self.name,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "slo_ms": self.slo_seconds * 1000,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_slo": self.rejected_slo,
+            "seconds_per_token": self.seconds_per_token,
+            "mean_queue_wait_ms": self.queue_wait_seconds * 1000 / self.admitted if self.admitted else 0.0,
+            "max_queue_wait_ms": self.queue_wait_max_seconds * 1000,
+            "queue_wait_histogram": {f"le_{bucket}ms": count for bucket, count in sorted(self.queue_wait_histogram.items())},
+        }
+
+# Admission queues, created on first use from the "admission" settings
+admission_queues = {}
+
+def get_admission_queue(name: str) -> AdmissionQueue:
+    """
+    Retrieve an admission class's queue, creating it on first use.
+    """
+    queue = admission_queues.get(name)
+    if queue is None:
+        options = dict(DEFAULT_CLASSES.get(name, DEFAULT_CLASSES["encoding"]))
+        options.update(get_setting("admission", {}).get("classes", {}).get(name, {}))
+        queue = AdmissionQueue(name, **options)
+        admission_queues[name] = queue
+    return queue
+
+def route_options(route: str) -> dict:
+    """
+    Return the admission class, weight and priority of a route.
+    """
+    options = dict(DEFAULT_ROUTES.get(route, {"class": "encoding", "weight": 1.0, "priority": 1}))
+    options.update(get_setting("admission", {}).get("routes", {}).get(route, {}))
+    return options
+
+class AdmissionSlot:
+    def __init__(self, queue: AdmissionQueue = None, cost: float = 0.0):
+        """
+        Initialize the AdmissionSlot class, a slot held in an admission queue until it is released once.
+
+        Args:
+            queue (AdmissionQueue): The queue the slot belongs to, or None when admission is disabled.
+            cost (float): The request's estimated cost.
+        """
+        self.queue = queue
+        self.cost = cost
+        self.start_time = time.perf_counter()
+        self.detached = False
+        self.released = False
+
+    def detach(self) -> "AdmissionSlot":
+        """
+        Keep the slot past the end of the `admit` block, for work that outlives the request handler such as a
+        streamed response. Whoever takes the slot must release it.
+        """
+        self.detached = True
+        return self
+
+    def release(self, measure: bool = True):
+        """
+        Free the slot. Later calls do nothing.
+
+        Args:
+            measure (bool): Whether the time held reflects the request's service time and should refine
+                the estimate; failed or abandoned requests pass False.
+        """
+        if self.released:
+            return
+        self.released = True
+        if self.queue is not None:
+            self.queue.release(self.cost, time.perf_counter() - self.start_time if measure else None)
+
+@asynccontextmanager
+async def admit(route: str, texts):
+    """
+    Hold an admission slot for a request while its body runs.
+
+    The cost is the route's weight times the input tokens of `texts`, counted with the route model's tokenizer. Streamed responses
+    return before the work is done, so they detach the yielded slot and release it when generation ends.
+
+    Raises:
+        HTTPException: If the request is shed, a 429 or 503 status with a Retry-After header is raised.
+    """
+    if not get_setting("admission", {}).get("enabled", True):
+        yield AdmissionSlot()
+        return
+
+    options = route_options(route)
+    queue = get_admission_queue(options["class"])
+    cost = options["weight"] * await count_input_tokens(options.get("task"), texts)
+    await queue.acquire(cost, options["priority"])
+    slot = AdmissionSlot(queue, cost)
+    try:
+        yield slot
+    except BaseException:
+        # Failed requests say little about service time, so they do not update the estimate
+        slot.release(measure=False)
+        raise
+    if not slot.detached:
+        slot.release()
+
+def admission_stats() -> list:
+    """
+    Return the statistics of every admission class.
+    """
+    return [queue.stats() for queue in admission_queues.values()]
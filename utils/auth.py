@@ -2,6 +2,7 @@ from fastapi import HTTPException, Depends
 from fastapi.security import APIKeyHeader
 import os
 from dotenv import load_dotenv
+from utils.metrics import stage_timer
 
 # Load environment variables from the .env file
 load_dotenv()
@@ -9,6 +10,18 @@ load_dotenv()
 # Retrieve the API key from environment variables
 API_KEY = os.getenv("API_KEY")
 
+# Every accepted key: API_KEY plus the comma-separated keys in API_KEYS, so each client can have its own key
+API_KEYS = {key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip()}
+if API_KEY:
+    API_KEYS.add(API_KEY)
+
+def is_valid_api_key(authorization: str) -> bool:
+    """
+    Check an Authorization header value in the Bearer <token> format against the accepted keys.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    return scheme == "Bearer" and token in API_KEYS
+
 # Define the header that will contain the API key
 api_key_header = APIKeyHeader(name="Authorization")
 
@@ -26,9 +39,9 @@ async def get_api_key(api_key: str = Depends(api_key_header)):
     Returns:
         str: The valid API key.
     """
-    # Verify that the API key matches the expected format and value
-    expected_api_key = f"Bearer {API_KEY}"
-    if api_key != expected_api_key:
-        raise HTTPException(status_code=403, detail="Unauthorized")
+    # Verify that the API key matches the expected format and one of the accepted keys
+    with stage_timer("auth", "api_key"):
+        if not is_valid_api_key(api_key):
+            raise HTTPException(status_code=403, detail="Unauthorized")
     
     return api_key
@@ -0,0 +1,195 @@
+# batching.py
+import asyncio
+from collections import deque
+from models.nlp_models import get_model
+from utils.bucketing import bucketing_options, classify_bucketed, encode_bucketed
+from utils.config import get_task_setting
+from utils.executors import run_in_pool, pool_for_task
+
+# Built-in batching options, overridable per task under "batching" in models_config.json
+DEFAULT_BATCHING = {"max_batch_size": 32, "max_wait_ms": 5}
+
+class MicroBatcher:
+    def __init__(self, name: str, batch_fn, max_batch_size: int = 32, max_wait_ms: float = 5, pool: str = "encoding"):
+        """
+        Initialize the MicroBatcher class, which groups concurrent single-item requests into one model call.
+
+        Args:
+            name (str): The name reported in the statistics.
+            batch_fn (callable): A function that takes a list of items and returns one result per item.
+            max_batch_size (int): The maximum number of items per batch.
+            max_wait_ms (float): The maximum time to wait for more items after the first one arrives.
+            pool (str): The executor pool that runs the batch function.
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.pool = pool
+        self._pending = deque()
+        # The event and worker task are created on first use, inside the running event loop
+        self._has_items = None
+        self._worker = None
+        self.items_total = 0
+        self.batches_total = 0
+        self.max_queue_depth = 0
+        self.batch_size_histogram = {}
+
+    async def submit(self, item):
+        """
+        Queue an item for the next batch and wait for its result.
+
+        Args:
+            item: A single model input.
+
+        Returns:
+            The result for this item.
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._has_items = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+        self._has_items.set()
+        return await future
+
+    async def submit_many(self, items):
+        """
+        Queue several items and wait for all of their results, in order.
+        """
+        return await asyncio.gather(*(self.submit(item) for item in items))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._has_items.wait()
+
+            # Collect more items until the batch is full or the wait budget is spent
+            deadline = loop.time() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._has_items.clear()
+                try:
+                    await asyncio.wait_for(self._has_items.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = []
+            while self._pending and len(batch) < self.max_batch_size:
+                item, future = self._pending.popleft()
+                # Skip callers that went away while queued
+                if not future.cancelled():
+                    batch.append((item, future))
+            if self._pending:
+                self._has_items.set()
+            else:
+                self._has_items.clear()
+            if not batch:
+                continue
+
+            self._record(len(batch))
+            try:
+                results = await self._execute([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _execute(self, items):
+        # Run the blocking model call in the bounded pool, off the event loop
+        return await run_in_pool(self.pool, self.batch_fn, items)
+
+    def _record(self, batch_size):
+        self.items_total += batch_size
+        self.batches_total += 1
+        # Power-of-two buckets keep the histogram small for any batch size
+        bucket = 1
+        while bucket < batch_size:
+            bucket *= 2
+        self.batch_size_histogram[bucket] = self.batch_size_histogram.get(bucket, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        Return queue depth and batch-size statistics.
+        """
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": len(self._pending),
+            "max_queue_depth": self.max_queue_depth,
+            "items": self.items_total,
+            "batches": self.batches_total,
+            "mean_batch_size": self.items_total / self.batches_total if self.batches_total else 0.0,
+            "batch_size_histogram": {f"le_{bucket}": count for bucket, count in sorted(self.batch_size_histogram.items())},
+        }
+
+def _encode_batch(task, model_name, batch_size):
+    def run(texts):
+        options = bucketing_options(task)
+        model = get_model(task, model_name)
+        if not options["enabled"]:
+            return model.encode(texts, batch_size=len(texts))
+        return encode_bucketed(model, texts, batch_size, options["max_seq_length"], options["max_batch_tokens"])
+    return run
+
+def _pipeline_batch(task, model_name, batch_size):
+    def run(texts):
+        options = bucketing_options(task)
+        classifier = get_model(task, model_name)
+        if not options["enabled"]:
+            return classifier(texts, batch_size=len(texts))
+        return classify_bucketed(classifier, texts, batch_size, options["max_seq_length"], options["max_batch_tokens"])
+    return run
+
+# Batch functions for the tasks that support micro-batching. The model is resolved on every
+# batch so registry evictions are respected, and each batch is split into length buckets.
+batch_functions = {
+    "embedding": _encode_batch,
+    "keyword": _encode_batch,
+    "sentiment": _pipeline_batch,
+}
+
+# Batchers for each (task, model name) pair
+batchers = {}
+
+def get_batcher(task: str, model_name: str = None) -> MicroBatcher:
+    """
+    Retrieve the micro-batcher for a task and model, creating it on first use.
+
+    Args:
+        task (str): The task name, e.g. "embedding".
+        model_name (str): The model name, or None for the task's default model.
+
+    Returns:
+        MicroBatcher: The batcher for the model.
+    """
+    key = (task, model_name)
+    batcher = batchers.get(key)
+    if batcher is None:
+        options = get_task_setting("batching", task, DEFAULT_BATCHING)
+        batcher = MicroBatcher(
+            f"{task}/{model_name or 'default'}",
+            batch_functions[task](task, model_name, options["max_batch_size"]),
+            max_batch_size=options["max_batch_size"],
+            max_wait_ms=options["max_wait_ms"],
+            pool=pool_for_task(task),
+        )
+        batchers[key] = batcher
+    return batcher
+
+def batching_stats() -> list:
+    """
+    Return the statistics of every batcher.
+    """
+    return [batcher.stats() for batcher in batchers.values()]
@@ -0,0 +1,153 @@
+# bucketing.py
+import numpy as np
+import torch
+from utils.config import get_task_setting
+
+# Built-in options, overridable per task under "bucketing" in models_config.json.
+# max_seq_length caps the tokens per input (None keeps the model's own limit);
+# max_batch_tokens caps the padded size of a batch, so batches of long inputs get fewer rows.
+DEFAULT_BUCKETING = {"enabled": True, "max_seq_length": None, "max_batch_tokens": 16384}
+
+def bucketing_options(task: str) -> dict:
+    """
+    Return the bucketing options of a task.
+    """
+    return get_task_setting("bucketing", task, DEFAULT_BUCKETING)
+
+def sequence_cap(tokenizer, model_limit: int = None, configured: int = None) -> int:
+    """
+    Return the number of tokens kept per input: the configured cap, bounded by what the model accepts.
+    """
+    limits = [limit for limit in (model_limit, configured) if limit]
+    # Tokenizers without a known limit report a huge sentinel value
+    if tokenizer.model_max_length and tokenizer.model_max_length < 1_000_000:
+        limits.append(tokenizer.model_max_length)
+    return min(limits) if limits else 512
+
+def tokenize_once(tokenizer, texts: list, max_seq_length: int) -> list:
+    """
+    Tokenize texts in one fast-tokenizer call, truncated to `max_seq_length`, without padding.
+
+    Returns:
+        list: One feature dict (input_ids, attention_mask, ...) per text, ready for `tokenizer.pad`.
+    """
+    encoding = tokenizer(texts, truncation=True, max_length=max_seq_length, padding=False)
+    keys = list(encoding.keys())
+    return [{key: encoding[key][i] for key in keys} for i in range(len(texts))]
+
+def length_buckets(lengths: list, batch_size: int, max_batch_tokens: int = None) -> list:
+    """
+    Group item indices into batches of similar length, longest first, so each batch pads little.
+
+    Returns:
+        list: Lists of indices into `lengths`.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    buckets = []
+    start = 0
+    while start < len(order):
+        # The first item of a batch is its longest, so it sets the padded size
+        size = batch_size
+        if max_batch_tokens:
+            size = max(1, min(batch_size, max_batch_tokens // max(lengths[order[start]], 1)))
+        buckets.append(order[start:start + size])
+        start += size
+    return buckets
+
+def _padded_batch(tokenizer, features: list, indices: list, device) -> dict:
+    batch = tokenizer.pad([features[i] for i in indices], padding=True, return_tensors="pt")
+    return {key: value.to(device) for key, value in batch.items()}
+
+def _sentence_transformer_tokenizer(model):
+    # Bucketing needs the fast tokenizer of a Hugging Face transformer module; other models keep encode()
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+        return None
+    return tokenizer
+
+def tokenize_for_model(model, texts: list, max_seq_length: int = None) -> list:
+    """
+    Tokenize texts the way a SentenceTransformer does, capped at `max_seq_length` tokens.
+    """
+    transformer = model[0]
+    # Match SentenceTransformer's own preprocessing
+    texts = [str(text).strip() for text in texts]
+    if getattr(transformer, "do_lower_case", False):
+        texts = [text.lower() for text in texts]
+    cap = sequence_cap(model.tokenizer, model.max_seq_length, max_seq_length)
+    return tokenize_once(model.tokenizer, texts, cap)
+
+def encode_bucketed(model, texts: list, batch_size: int = 32, max_seq_length: int = None,
+                    max_batch_tokens: int = None, features: list = None) -> np.ndarray:
+    """
+    Encode texts with a SentenceTransformer, batching inputs of similar token length.
+
+    The texts are tokenized once and the same encodings feed the forward pass. Embeddings are returned
+    in the order of `texts`.
+
+    Args:
+        model (SentenceTransformer): The embedding model.
+        texts (list): The texts.
+        batch_size (int): The maximum number of texts per forward pass.
+        max_seq_length (int): The configured token cap, or None for the model's own.
+        max_batch_tokens (int): The maximum padded tokens per forward pass, or None.
+        features (list): Features from `tokenize_for_model`, to reuse an earlier tokenization, or None.
+
+    Returns:
+        np.ndarray: One float32 embedding per text.
+    """
+    tokenizer = _sentence_transformer_tokenizer(model)
+    if tokenizer is None:
+        return model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+    if features is None:
+        features = tokenize_for_model(model, texts, max_seq_length)
+    embeddings = [None] * len(texts)
+    lengths = [len(feature["input_ids"]) for feature in features]
+    with torch.inference_mode():
+        for indices in length_buckets(lengths, batch_size, max_batch_tokens):
+            output = model(_padded_batch(tokenizer, features, indices, model.device))
+            vectors = output["sentence_embedding"].float().cpu().numpy()
+            for i, vector in zip(indices, vectors):
+                embeddings[i] = vector
+    if not embeddings:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    return np.vstack(embeddings)
+
+def classify_bucketed(classifier, texts: list, batch_size: int = 32, max_seq_length: int = None,
+                      max_batch_tokens: int = None, all_scores: bool = False) -> list:
+    """
+    Classify texts with a text-classification pipeline's model, batching inputs of similar token length.
+
+    Inputs longer than the cap are truncated rather than rejected. Results match the pipeline's
+    `{"label", "score"}` output, in the order of `texts`; with `all_scores`, each text gets a list
+    of every label's score instead, highest first, like the pipeline's `top_k=None`.
+    """
+    tokenizer = classifier.tokenizer
+    model = classifier.model
+    if not getattr(tokenizer, "is_fast", False):
+        if all_scores:
+            return classifier(texts, batch_size=batch_size, truncation=True, top_k=None)
+        return classifier(texts, batch_size=batch_size, truncation=True)
+
+    config = model.config
+    cap = sequence_cap(tokenizer, getattr(config, "max_position_embeddings", None), max_seq_length)
+    features = tokenize_once(tokenizer, texts, cap)
+    lengths = [len(feature["input_ids"]) for feature in features]
+    # Same scoring as the pipeline: sigmoid for single-logit and multi-label models, softmax otherwise
+    use_sigmoid = config.num_labels == 1 or getattr(config, "problem_type", None) == "multi_label_classification"
+
+    results = [None] * len(texts)
+    with torch.inference_mode():
+        for indices in length_buckets(lengths, batch_size, max_batch_tokens):
+            logits = model(**_padded_batch(tokenizer, features, indices, model.device)).logits.float()
+            scores = torch.sigmoid(logits) if use_sigmoid else torch.softmax(logits, dim=-1)
+            if all_scores:
+                for i, row in zip(indices, scores.tolist()):
+                    ranked = sorted(enumerate(row), key=lambda pair: -pair[1])
+                    results[i] = [{"label": config.id2label[label], "score": score} for label, score in ranked]
+                continue
+            best_scores, best_labels = scores.max(dim=-1)
+            for i, score, label in zip(indices, best_scores.tolist(), best_labels.tolist()):
+                results[i] = {"label": config.id2label[label], "score": score}
+    return results
@@ -0,0 +1,342 @@
+# bulk_embedding.py
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from models.nlp_models import get_model, resolve_model_id
+from utils.bucketing import bucketing_options, encode_bucketed
+from utils.config import get_setting
+
+# Built-in job options, overridable under "bulk_embedding" in models_config.json
+DEFAULT_JOB_OPTIONS = {
+    "jobs_dir": "data/jobs",
+    "input_dir": "data/inputs",
+    "window_size": 8192,
+    "batch_size": 128,
+    "max_upload_bytes": 1024 * 1024 * 1024,
+}
+
+INPUT_FORMATS = ("jsonl", "text")
+
+# Lock files of the jobs submitted or running in this process. The lock is held from submission until the run
+# ends, so no other worker can queue or run the same job, and it is released by the OS if the process dies
+_job_locks = {}
+_job_locks_lock = threading.Lock()
+
+def job_options() -> dict:
+    """
+    Return the bulk embedding options merged over the built-in defaults.
+    """
+    options = dict(DEFAULT_JOB_OPTIONS)
+    options.update(get_setting("bulk_embedding", {}))
+    return options
+
+def job_dir(job_id: str) -> str:
+    """
+    Return the directory holding a job's input, outputs and state.
+
+    Raises:
+        ValueError: If the job ID is not a valid job identifier.
+    """
+    if not job_id or not all(c.isalnum() or c == "-" for c in job_id):
+        raise ValueError(f"Invalid job ID {job_id}.")
+    return os.path.join(job_options()["jobs_dir"], job_id)
+
+def resolve_input_path(path: str) -> str:
+    """
+    Resolve a local input path, which must lie inside the configured input directory.
+
+    Raises:
+        ValueError: If the path escapes the input directory or does not exist.
+    """
+    input_dir = os.path.realpath(job_options()["input_dir"])
+    resolved = os.path.realpath(os.path.join(input_dir, path))
+    if os.path.commonpath([input_dir, resolved]) != input_dir:
+        raise ValueError(f"Input path must be inside {job_options()['input_dir']}.")
+    if not os.path.isfile(resolved):
+        raise ValueError(f"Input file {path} does not exist.")
+    return resolved
+
+def _write_state(directory: str, state: dict):
+    # Write to a temporary file and rename, so a crash never leaves a half-written state
+    state["updated_at"] = time.time()
+    temporary_path = os.path.join(directory, "job.json.tmp")
+    with open(temporary_path, "w") as file:
+        json.dump(state, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, os.path.join(directory, "job.json"))
+
+def read_state(job_id: str) -> dict:
+    """
+    Read a job's state.
+
+    Raises:
+        FileNotFoundError: If the job does not exist.
+    """
+    with open(os.path.join(job_dir(job_id), "job.json"), "r") as file:
+        return json.load(file)
+
+def create_job(input_path: str, input_format: str, model_name: str = None, text_field: str = "text",
+               id_field: str = "id") -> dict:
+    """
+    Register a job over an input file that is already on disk.
+
+    Args:
+        input_path (str): The JSONL or text file.
+        input_format (str): "jsonl" (one object per line) or "text" (one document per line).
+        model_name (str): The embedding model, or None for the default.
+        text_field (str): The JSONL field holding the text.
+        id_field (str): The JSONL field holding the record ID; line numbers are used when it is missing.
+
+    Returns:
+        dict: The job state.
+    """
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(f"Unsupported input format {input_format}.")
+    resolve_model_id("embedding", model_name)
+
+    job_id = uuid.uuid4().hex
+    directory = job_dir(job_id)
+    os.makedirs(directory, exist_ok=True)
+    state = {
+        "job_id": job_id,
+        "state": "queued",
+        "input_path": os.path.abspath(input_path),
+        "input_format": input_format,
+        "model": model_name,
+        "text_field": text_field,
+        "id_field": id_field,
+        "total": None,
+        "dimensions": None,
+        # Checkpoint: the next record to embed, where it starts in the input, and the size of the ID index so far
+        "next_record": 0,
+        "input_offset": 0,
+        "ids_offset": 0,
+        "created_at": time.time(),
+        "error": None,
+    }
+    _write_state(directory, state)
+    return state
+
+def new_upload_path() -> str:
+    """
+    Return a fresh path for an uploaded input file.
+    """
+    directory = os.path.join(job_options()["jobs_dir"], "uploads")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, uuid.uuid4().hex)
+
+def _parse_line(line: bytes, state: dict, index: int):
+    # Returns (record ID, text), or None for blank lines
+    text = line.decode("utf-8").strip()
+    if not text:
+        return None
+    if state["input_format"] == "text":
+        return str(index), text
+    record = json.loads(text)
+    record_id = record.get(state["id_field"], index)
+    return str(record_id), str(record[state["text_field"]])
+
+def count_records(state: dict) -> int:
+    """
+    Count the non-blank lines of a job's input in one streaming pass.
+    """
+    with open(state["input_path"], "rb") as file:
+        return sum(1 for line in file if line.strip())
+
+def _read_window(file, state: dict, first_index: int, window_size: int):
+    # Read up to window_size records from the current file position
+    ids, texts = [], []
+    while len(texts) < window_size:
+        line = file.readline()
+        if not line:
+            break
+        parsed = _parse_line(line, state, first_index + len(texts))
+        if parsed is not None:
+            ids.append(parsed[0])
+            texts.append(parsed[1])
+    return ids, texts
+
+def run_job(job_id: str, progress=None) -> dict:
+    """
+    Embed a job's input, resuming from its last checkpoint.
+
+    Records are read in windows of `window_size`; each window is encoded in length-bucketed batches of
+    at most `batch_size`, so batches pad little, written into a
+    memory-mapped `embeddings.npy` and appended to `ids.txt`, then checkpointed. Memory use depends on
+    the window size, not the input size.
+
+    Args:
+        job_id (str): The job ID.
+        progress (callable): Called with the job state after every window, or None.
+
+    Returns:
+        dict: The final job state.
+
+    Raises:
+        RuntimeError: If the job is queued or running in another process.
+    """
+    directory = job_dir(job_id)
+    with _job_locks_lock:
+        submitted = job_id in _job_locks
+    if not submitted and not mark_submitted(job_id):
+        raise RuntimeError(f"Job {job_id} is already queued or running.")
+    try:
+        # Read under the lock, since another worker may have run the job since it was submitted
+        state = read_state(job_id)
+    except BaseException:
+        clear_submitted(job_id)
+        raise
+    if state["state"] == "completed":
+        clear_submitted(job_id)
+        return state
+    options = job_options()
+    bucketing = bucketing_options("embedding")
+    cancel_path = os.path.join(directory, "cancel")
+
+    try:
+        state.update(state="running", error=None)
+        model = get_model("embedding", state["model"])
+        if state["total"] is None:
+            state["total"] = count_records(state)
+            state["dimensions"] = model.get_sentence_embedding_dimension()
+        _write_state(directory, state)
+
+        embeddings_path = os.path.join(directory, "embeddings.npy")
+        mode = "r+" if os.path.exists(embeddings_path) else "w+"
+        embeddings = np.lib.format.open_memmap(
+            embeddings_path, mode=mode, dtype=np.float32, shape=(state["total"], state["dimensions"])
+        )
+
+        with open(state["input_path"], "rb") as input_file, open(os.path.join(directory, "ids.txt"), "ab+") as ids_file:
+            # Drop IDs written after the last checkpoint, then continue from it
+            ids_file.truncate(state["ids_offset"])
+            input_file.seek(state["input_offset"])
+            start_time = time.perf_counter()
+            start_record = state["next_record"]
+
+            while state["next_record"] < state["total"]:
+                # Any worker cancels a job by creating its cancel file
+                if os.path.exists(cancel_path):
+                    state["state"] = "cancelled"
+                    break
+                ids, texts = _read_window(input_file, state, state["next_record"], options["window_size"])
+                if not texts:
+                    break
+
+                vectors = encode_bucketed(
+                    model, texts, options["batch_size"], bucketing["max_seq_length"], bucketing["max_batch_tokens"]
+                )
+                first = state["next_record"]
+                embeddings[first:first + len(texts)] = vectors
+                embeddings.flush()
+                ids_file.write("".join(f"{record_id}\n" for record_id in ids).encode("utf-8"))
+                ids_file.flush()
+                os.fsync(ids_file.fileno())
+
+                state["next_record"] = first + len(texts)
+                state["input_offset"] = input_file.tell()
+                state["ids_offset"] = ids_file.tell()
+                elapsed = time.perf_counter() - start_time
+                state["records_per_second"] = round((state["next_record"] - start_record) / max(elapsed, 1e-9), 1)
+                _write_state(directory, state)
+                if progress is not None:
+                    progress(state)
+
+        del embeddings
+        if state["state"] == "running":
+            state["state"] = "completed"
+    except Exception as e:
+        state.update(state="failed", error=str(e))
+    finally:
+        _write_state(directory, state)
+        clear_submitted(job_id)
+    return state
+
+def mark_submitted(job_id: str) -> bool:
+    """
+    Take a job's lock before handing it to a worker, so it can be cancelled before it starts and no other
+    worker process queues or runs it meanwhile.
+
+    Returns:
+        bool: False if the job is already queued or running in this or another process.
+    """
+    directory = job_dir(job_id)
+    with _job_locks_lock:
+        if job_id in _job_locks:
+            return False
+        lock_file = open(os.path.join(directory, "run.lock"), "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        _job_locks[job_id] = lock_file
+    # A new submission starts without any cancellation left from an earlier run
+    try:
+        os.remove(os.path.join(directory, "cancel"))
+    except FileNotFoundError:
+        pass
+    return True
+
+def clear_submitted(job_id: str):
+    """
+    Release a job's lock, once its run ends or if its submission never reached a worker.
+    """
+    with _job_locks_lock:
+        lock_file = _job_locks.pop(job_id, None)
+    if lock_file is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+def _is_locked(job_id: str) -> bool:
+    # Whether any process holds the job's lock
+    with _job_locks_lock:
+        if job_id in _job_locks:
+            return True
+    try:
+        lock_file = open(os.path.join(job_dir(job_id), "run.lock"), "r")
+    except FileNotFoundError:
+        return False
+    with lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return False
+
+def cancel_job(job_id: str) -> bool:
+    """
+    Ask a queued or running job to stop after its current window, whichever worker process holds it.
+
+    Returns:
+        bool: True if the job was queued or running.
+    """
+    if not _is_locked(job_id):
+        return False
+    with open(os.path.join(job_dir(job_id), "cancel"), "w"):
+        pass
+    return True
+
+def job_status(job_id: str) -> dict:
+    """
+    Return a job's progress and state.
+    """
+    state = read_state(job_id)
+    total = state["total"]
+    return {
+        "job_id": state["job_id"],
+        "state": state["state"],
+        "model": state["model"],
+        "total": total,
+        "processed": state["next_record"],
+        "progress": state["next_record"] / total if total else 0.0,
+        "records_per_second": state.get("records_per_second"),
+        "dimensions": state["dimensions"],
+        "error": state["error"],
+    }
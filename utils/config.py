@@ -0,0 +1,45 @@
+# config.py
+
+# Runtime settings from models_config.json, populated by main.initialize_models at startup
+settings = {}
+
+def update_settings(config: dict):
+    """
+    Merge the loaded configuration into the shared settings.
+
+    Args:
+        config (dict): The combined JSON configuration and command-line overrides.
+    """
+    settings.update(config)
+
+def get_setting(name: str, default=None):
+    """
+    Retrieve a top-level setting, falling back to a default when it is not configured.
+
+    Args:
+        name (str): The setting name.
+        default: The value to return when the setting is missing.
+
+    Returns:
+        The configured value or the default.
+    """
+    value = settings.get(name)
+    return default if value is None else value
+
+def get_task_setting(section: str, task: str, default: dict = None) -> dict:
+    """
+    Retrieve the per-task options of a configuration section, merged over the section's `default` entry.
+
+    Args:
+        section (str): The configuration section, e.g. "batching".
+        task (str): The task name, e.g. "embedding".
+        default (dict): Built-in options used when nothing is configured.
+
+    Returns:
+        dict: The merged options.
+    """
+    section_config = get_setting(section, {})
+    options = dict(default or {})
+    options.update(section_config.get("default", {}))
+    options.update(section_config.get(task, {}))
+    return options
@@ -0,0 +1,199 @@
+# embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import numpy as np
+from collections import OrderedDict
+from utils.config import get_setting
+from utils.executors import run_in_pool
+
+# Built-in cache options, overridable under "embedding_cache" in models_config.json
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+
+class EmbeddingCache:
+    def __init__(self, memory_bytes: int = DEFAULT_MEMORY_BYTES, disk_path: str = None):
+        """
+        Initialize the EmbeddingCache class, a two-tier cache of float32 embeddings keyed by (model id, text hash).
+
+        Args:
+            memory_bytes (int): The byte budget of the in-memory LRU tier.
+            disk_path (str): The path of an SQLite database shared by all workers, or None to disable the disk tier.
+        """
+        self.memory_bytes = memory_bytes
+        self.disk_path = disk_path
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._disk = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path:
+            directory = os.path.dirname(disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # One connection guarded by the lock; WAL lets other workers read while one writes
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, timeout=30)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")
+            self._disk.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._disk.commit()
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        """
+        Build the cache key for a text embedded by a model.
+
+        The exact text passed to the encoder is hashed: normalization has already run when it is requested,
+        and whitespace changes the tokens some tokenizers produce, so it must not be collapsed here.
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model_id}:{digest}"
+
+    def _remember(self, key, vector_bytes):
+        # Caller holds the lock
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = vector_bytes
+        self._memory_used += len(vector_bytes)
+        while self._memory_used > self.memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def get_many(self, model_id: str, texts: list) -> list:
+        """
+        Look up the embeddings of several texts.
+
+        Args:
+            model_id (str): The model that produced the embeddings.
+            texts (list): The texts.
+
+        Returns:
+            list: A float32 array for each cached text and None for each miss.
+        """
+        keys = [self.make_key(model_id, text) for text in texts]
+        results = [None] * len(texts)
+        disk_lookups = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector_bytes = self._memory.get(key)
+                if vector_bytes is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    results[i] = np.frombuffer(vector_bytes, dtype=np.float32)
+                else:
+                    disk_lookups.append(i)
+
+            if disk_lookups and self._disk is not None:
+                placeholders = ",".join("?" * len(disk_lookups))
+                rows = self._disk.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    [keys[i] for i in disk_lookups],
+                ).fetchall()
+                found = dict(rows)
+                for i in disk_lookups:
+                    vector_bytes = found.get(keys[i])
+                    if vector_bytes is not None:
+                        self.disk_hits += 1
+                        # Promote disk hits into the memory tier
+                        self._remember(keys[i], bytes(vector_bytes))
+                        results[i] = np.frombuffer(vector_bytes, dtype=np.float32)
+
+            self.misses += sum(1 for result in results if result is None)
+
+        return results
+
+    def put_many(self, model_id: str, texts: list, embeddings):
+        """
+        Store the embeddings of several texts in both tiers.
+
+        Args:
+            model_id (str): The model that produced the embeddings.
+            texts (list): The texts.
+            embeddings: One embedding per text.
+        """
+        entries = [
+            (self.make_key(model_id, text), np.asarray(embedding, dtype=np.float32).tobytes())
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            for key, vector_bytes in entries:
+                self._remember(key, vector_bytes)
+            if self._disk is not None:
+                self._disk.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", entries)
+                self._disk.commit()
+
+    def stats(self) -> dict:
+        """
+        Return hit ratios and the bytes stored in each tier.
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_bytes = 0
+            if self._disk is not None:
+                page_count = self._disk.execute("PRAGMA page_count").fetchone()[0]
+                page_size = self._disk.execute("PRAGMA page_size").fetchone()[0]
+                disk_bytes = page_count * page_size
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "memory_bytes_limit": self.memory_bytes,
+                "disk_path": self.disk_path,
+                "disk_bytes": disk_bytes,
+            }
+
+# Shared cache, created on first use from the "embedding_cache" settings
+_embedding_cache = None
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Retrieve the shared embedding cache, creating it on first use.
+    """
+    global _embedding_cache
+    if _embedding_cache is None:
+        options = get_setting("embedding_cache", {})
+        _embedding_cache = EmbeddingCache(
+            memory_bytes=options.get("memory_bytes", DEFAULT_MEMORY_BYTES),
+            disk_path=options.get("disk_path"),
+        )
+    return _embedding_cache
+
+async def cached_embeddings(model_id: str, texts: list, encode) -> np.ndarray:
+    """
+    Return embeddings for the texts, encoding only the ones missing from the cache.
+
+    Args:
+        model_id (str): The model that produces the embeddings.
+        texts (list): The texts.
+        encode (callable): An async function that takes a list of texts and returns their embeddings.
+
+    Returns:
+        np.ndarray: A float32 matrix with one row per text, in input order.
+    """
+    cache = get_embedding_cache()
+    # Disk lookups block, so they run off the event loop
+    if cache.disk_path:
+        results = await run_in_pool("preprocess", cache.get_many, model_id, texts)
+    else:
+        results = cache.get_many(model_id, texts)
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        encoded = await encode(missing_texts)
+        for i, embedding in zip(missing, encoded):
+            results[i] = np.asarray(embedding, dtype=np.float32)
+        if cache.disk_path:
+            await run_in_pool("preprocess", cache.put_many, model_id, missing_texts, encoded)
+        else:
+            cache.put_many(model_id, missing_texts, encoded)
+
+    return np.vstack(results)
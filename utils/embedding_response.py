@@ -0,0 +1,102 @@
+# embedding_response.py
+import base64
+import time
+import msgpack
+import numpy as np
+import orjson
+from fastapi.responses import Response
+from utils.metrics import TimedJSONResponse, observe_stage
+
+# Media types clients can request in the Accept header
+OCTET_STREAM = "application/octet-stream"
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+class ORJSONNumpyResponse(TimedJSONResponse):
+    """
+    JSON response serialized with orjson, which writes numpy arrays directly instead of going through lists.
+    """
+    def render(self, content) -> bytes:
+        start_time = time.perf_counter()
+        body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        observe_stage("serialization", "orjson", time.perf_counter() - start_time)
+        return body
+
+def _little_endian_bytes(array: np.ndarray) -> bytes:
+    return array.astype(array.dtype.newbyteorder("<"), copy=False).tobytes()
+
+def _pack_array(value):
+    # msgpack has no array type: send raw little-endian bytes with their dtype and shape
+    if isinstance(value, np.ndarray):
+        return {"dtype": value.dtype.name, "shape": list(value.shape), "data": _little_endian_bytes(value)}
+    raise TypeError(f"Cannot serialize {type(value).__name__} to msgpack")
+
+def prepare_embeddings(embeddings, normalize_embeddings: bool = False, precision: int = None, dtype: str = "float32") -> np.ndarray:
+    """
+    Apply the opt-in output options to a matrix of embeddings.
+
+    Args:
+        embeddings: One embedding per row.
+        normalize_embeddings (bool): Scale each row to unit length.
+        precision (int): Round to this many decimal places, which shortens JSON output, or None.
+        dtype (str): "float32", or "float16" to halve binary payloads.
+
+    Returns:
+        np.ndarray: A C-contiguous matrix in the requested dtype.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if normalize_embeddings:
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        embeddings = embeddings / norms
+    if precision is not None:
+        embeddings = np.round(embeddings, precision)
+    return np.ascontiguousarray(embeddings, dtype=np.dtype(dtype))
+
+def encode_base64(embedding: np.ndarray) -> str:
+    """
+    Encode an embedding's little-endian bytes as base64.
+    """
+    return base64.b64encode(_little_endian_bytes(embedding)).decode("ascii")
+
+def negotiate(accept: str) -> str:
+    """
+    Pick the response format from an Accept header: "octet-stream", "msgpack" or "json".
+    """
+    accept = (accept or "").lower()
+    if OCTET_STREAM in accept:
+        return "octet-stream"
+    if any(media_type in accept for media_type in MSGPACK_TYPES):
+        return "msgpack"
+    return "json"
+
+def embedding_response(accept: str, content: dict, embeddings: np.ndarray, headers: dict = None) -> Response:
+    """
+    Build the response for an embedding endpoint in the format the client asked for.
+
+    Args:
+        accept (str): The request's Accept header.
+        content (dict): The JSON/msgpack body, with numpy arrays left as arrays.
+        embeddings (np.ndarray): The embeddings, sent alone as raw bytes for `application/octet-stream`.
+        headers (dict): Extra headers for binary responses, such as token usage.
+
+    Returns:
+        Response: An orjson JSON, msgpack or octet-stream response.
+    """
+    response_format = negotiate(accept)
+    if response_format == "json":
+        return ORJSONNumpyResponse(content)
+
+    headers = {
+        "X-Embedding-Shape": ",".join(str(size) for size in embeddings.shape),
+        "X-Embedding-Dtype": embeddings.dtype.name,
+        **(headers or {}),
+    }
+    start_time = time.perf_counter()
+    if response_format == "msgpack":
+        body = msgpack.packb(content, default=_pack_array)
+        media_type = MSGPACK_TYPES[0]
+    else:
+        body = _little_endian_bytes(embeddings)
+        media_type = OCTET_STREAM
+    observe_stage("serialization", response_format, time.perf_counter() - start_time)
+    return Response(body, media_type=media_type, headers=headers)
@@ -0,0 +1,217 @@
+# executors.py
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import HTTPException
+from utils.config import get_setting
+from utils.metrics import observe_stage
+
+# Built-in pools: one worker for heavy generation, more for encoding, text preprocessing and vector search,
+# and one for bulk jobs.
+# Process pools only accept picklable module-level functions, so they suit "preprocess" but not the model pools.
+DEFAULT_POOLS = {
+    "generation": {"kind": "thread", "max_workers": 1, "max_queue": 8},
+    "encoding": {"kind": "thread", "max_workers": 2, "max_queue": 64},
+    "preprocess": {"kind": "thread", "max_workers": 2, "max_queue": 128},
+    "search": {"kind": "thread", "max_workers": 2, "max_queue": 64},
+    "jobs": {"kind": "thread", "max_workers": 1, "max_queue": 16},
+}
+
+# Pool used by each task's model calls
+DEFAULT_TASK_POOLS = {
+    "summarization": "generation",
+    "paraphrase": "generation",
+    "embedding": "encoding",
+    "keyword": "encoding",
+    "sentiment": "encoding",
+    "ner": "encoding",
+}
+
+def _timed_call(fn, args, kwargs):
+    # Module-level so it can be pickled into process pools; wall-clock times work across processes
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time() - started
+
+class BoundedExecutor:
+    def __init__(self, name: str, kind: str = "thread", max_workers: int = 2, max_queue: int = 16):
+        """
+        Initialize the BoundedExecutor class, a worker pool that rejects work once its queue is full.
+
+        Args:
+            name (str): The pool name.
+            kind (str): "thread" or "process".
+            max_workers (int): The number of workers.
+            max_queue (int): The number of calls allowed to wait for a free worker.
+        """
+        if kind == "process":
+            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        elif kind == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        else:
+            raise ValueError(f"Unsupported executor kind {kind} for pool {name}.")
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+
+    def retry_after(self) -> int:
+        """
+        Estimate how many seconds a rejected caller should wait before retrying.
+
+        Returns:
+            int: The suggested Retry-After value, at least one second.
+        """
+        mean_duration = self.busy_seconds / self.completed if self.completed else 1.0
+        waves = (self.pending - self.max_workers + 1) / self.max_workers
+        return max(1, math.ceil(mean_duration * max(waves, 1)))
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run a blocking function in the pool and wait for its result without blocking the event loop.
+
+        Raises:
+            HTTPException: If the pool's queue is full, a 503 status with a Retry-After header is raised.
+        """
+        return await self.submit(fn, *args, **kwargs)
+
+    def submit(self, fn, *args, **kwargs) -> asyncio.Future:
+        """
+        Schedule a blocking function in the pool and return an awaitable for its result.
+
+        Must be called from the event loop. Rejection happens immediately, before anything is awaited.
+
+        Raises:
+            HTTPException: If the pool's queue is full, a 503 status with a Retry-After header is raised.
+        """
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                rejected = True
+            else:
+                self.pending += 1
+                rejected = False
+        if rejected:
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, please retry later",
+                headers={"Retry-After": str(self.retry_after())},
+            )
+
+        submitted = time.time()
+        future = self.executor.submit(_timed_call, fn, args, kwargs)
+        # Release the slot when the work actually finishes, even if the caller was cancelled
+        future.add_done_callback(lambda f: self._release(f, submitted))
+        return asyncio.ensure_future(self._result(future))
+
+    @staticmethod
+    async def _result(future):
+        result, _, _ = await asyncio.wrap_future(future)
+        return result
+
+    def _release(self, future, submitted):
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            _, started, duration = future.result()
+            self.completed += 1
+            self.busy_seconds += duration
+            self.queue_wait_seconds += max(0.0, started - submitted)
+        observe_stage("queue", self.name, max(0.0, started - submitted))
+        # Model pools run inference; preprocessing is timed where it happens, per endpoint, and jobs by their own progress
+        if self.name not in ("preprocess", "jobs"):
+            observe_stage("inference", self.name, duration)
+
+    def stats(self) -> dict:
+        """
+        Return queue depth and utilization statistics.
+        """
+        with self._lock:
+            elapsed = max(time.time() - self.created_at, 1e-9)
+            return {
+                "name": self.name,
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": min(self.pending, self.max_workers),
+                "queued": max(0, self.pending - self.max_workers),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "utilization": min(1.0, self.busy_seconds / (elapsed * self.max_workers)),
+                "mean_queue_wait_seconds": self.queue_wait_seconds / self.completed if self.completed else 0.0,
+            }
+
+    def shutdown(self):
+        """
+        Stop accepting work and release the workers.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# Pools, created on first use from the "executors" settings
+pools = {}
+
+def get_pool(name: str) -> BoundedExecutor:
+    """
+    Retrieve a named pool, creating it on first use.
+
+    Args:
+        name (str): The pool name, e.g. "generation".
+
+    Returns:
+        BoundedExecutor: The pool.
+    """
+    pool = pools.get(name)
+    if pool is None:
+        pool_config = dict(DEFAULT_POOLS.get(name, DEFAULT_POOLS["encoding"]))
+        pool_config.update(get_setting("executors", {}).get("pools", {}).get(name, {}))
+        pool = BoundedExecutor(name, **pool_config)
+        pools[name] = pool
+    return pool
+
+def pool_for_task(task: str) -> str:
+    """
+    Return the name of the pool that runs a task's model calls.
+    """
+    task_pools = dict(DEFAULT_TASK_POOLS)
+    task_pools.update(get_setting("executors", {}).get("tasks", {}))
+    return task_pools.get(task, "encoding")
+
+async def run_in_pool(name: str, fn, *args, **kwargs):
+    """
+    Run a blocking function in a named pool.
+    """
+    return await get_pool(name).run(fn, *args, **kwargs)
+
+async def run_task(task: str, fn, *args, **kwargs):
+    """
+    Run a blocking model call in the pool assigned to the task.
+    """
+    return await get_pool(pool_for_task(task)).run(fn, *args, **kwargs)
+
+def executor_stats() -> list:
+    """
+    Return the statistics of every pool.
+    """
+    return [pool.stats() for pool in pools.values()]
+
+def shutdown_pools():
+    """
+    Shut down every pool.
+    """
+    for pool in pools.values():
+        pool.shutdown()
+    pools.clear()
@@ -0,0 +1,104 @@
+# fast_tokenizers.py
+import os
+import threading
+from tokenizers import Tokenizer
+from models.nlp_models import ModelUnavailableError, get_loaded_model, resolve_model_id, supported_models
+
+# Standalone Rust tokenizers, keyed by model name; they hold no model weights
+_tokenizers = {}
+_tokenizers_lock = threading.Lock()
+
+# Standalone copies of loaded models' tokenizers, keyed by model id, for counting input tokens
+_model_tokenizers = {}
+
+def tokenizer_source(model_id: str) -> str:
+    """
+    Return where to load a model's tokenizer from: a local directory, or a Hugging Face Hub repository.
+
+    Bare sentence-transformers names such as "all-MiniLM-L6-v2" live under the "sentence-transformers" organization.
+    """
+    if os.path.isdir(model_id) or "/" in model_id:
+        return model_id
+    return f"sentence-transformers/{model_id}"
+
+def load_tokenizer(model_id: str) -> Tokenizer:
+    """
+    Load a model's `tokenizer.json` without loading the model.
+
+    Truncation and padding saved with the tokenizer are turned off, so every token is returned as-is.
+    """
+    source = tokenizer_source(model_id)
+    if os.path.isdir(source):
+        tokenizer = Tokenizer.from_file(os.path.join(source, "tokenizer.json"))
+    else:
+        tokenizer = Tokenizer.from_pretrained(source)
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+def get_tokenizer(model_name: str) -> Tokenizer:
+    """
+    Retrieve the fast tokenizer of an embedding model, loading it once per worker.
+
+    Raises:
+        ValueError: If the model is not a supported embedding model.
+    """
+    tokenizer = _tokenizers.get(model_name)
+    if tokenizer is not None:
+        return tokenizer
+    model_id = supported_models["embedding"].get(model_name)
+    if model_id is None:
+        raise ValueError(f"Model {model_name} not supported for task embedding.")
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(model_name)
+        if tokenizer is None:
+            tokenizer = load_tokenizer(model_id)
+            _tokenizers[model_name] = tokenizer
+    return tokenizer
+
+def encode_texts(model_name: str, texts: list, return_tokens: bool = True, return_offsets: bool = False) -> dict:
+    """
+    Tokenize texts in one `encode_batch` call.
+
+    Returns:
+        dict: "counts", plus "tokens" and "offsets" (character spans, with (0, 0) for special tokens) when requested.
+    """
+    encodings = get_tokenizer(model_name).encode_batch(texts)
+    result = {"counts": [len(encoding.ids) for encoding in encodings]}
+    if return_tokens:
+        result["tokens"] = [encoding.ids for encoding in encodings]
+    if return_offsets:
+        result["offsets"] = [encoding.offsets for encoding in encodings]
+    return result
+
+def decode_tokens(model_name: str, token_lists: list) -> list:
+    """
+    Detokenize token ID lists in one `decode_batch` call, skipping special tokens.
+    """
+    return get_tokenizer(model_name).decode_batch(token_lists, skip_special_tokens=True)
+
+def model_tokenizer(task: str) -> Tokenizer:
+    """
+    Retrieve a standalone copy of the tokenizer of a task's default model, made once the model is loaded.
+
+    The copy is never reconfigured, so it can count tokens from any thread while the model's own tokenizer
+    truncates and pads for inference. Nothing is loaded just to count tokens.
+
+    Returns:
+        Tokenizer: The tokenizer, or None if the model is not loaded or has no fast tokenizer.
+    """
+    try:
+        model_id = resolve_model_id(task)
+    except (ValueError, ModelUnavailableError):
+        return None
+    tokenizer = _model_tokenizers.get(model_id)
+    if tokenizer is not None:
+        return tokenizer
+    backend = getattr(getattr(get_loaded_model(task), "tokenizer", None), "backend_tokenizer", None)
+    if backend is None:
+        return None
+    tokenizer = Tokenizer.from_str(backend.to_str())
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    with _tokenizers_lock:
+        return _model_tokenizers.setdefault(model_id, tokenizer)
@@ -0,0 +1,90 @@
+# memory.py
+import os
+
+# Fields of /proc/<pid>/smaps_rollup that describe how a process's pages are shared, in kB
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+def read_smaps(pid="self") -> dict:
+    """
+    Read a process's memory totals from /proc, in kB.
+
+    `smaps_rollup` holds the totals; on kernels without it, the per-mapping `smaps` entries are summed.
+
+    Raises:
+        OSError: If the process does not exist or /proc is unavailable (e.g. not Linux).
+    """
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        path = f"/proc/{pid}/smaps"
+    totals = dict.fromkeys(MEMORY_FIELDS, 0)
+    with open(path, "r") as file:
+        for line in file:
+            field, _, value = line.partition(":")
+            if field in totals:
+                totals[field] += int(value.split()[0])
+    return totals
+
+def _megabytes(kilobytes: int) -> float:
+    return round(kilobytes / 1024, 1)
+
+def process_memory(pid="self") -> dict:
+    """
+    Summarize a process's memory in MB.
+
+    `pss_mb` charges each shared page to the processes sharing it in equal parts, so the PSS of a group of
+    workers adds up to the memory they actually use, while their RSS counts shared pages once per worker.
+    """
+    totals = read_smaps(pid)
+    return {
+        "pid": os.getpid() if pid == "self" else int(pid),
+        "rss_mb": _megabytes(totals["Rss"]),
+        "pss_mb": _megabytes(totals["Pss"]),
+        "shared_mb": _megabytes(totals["Shared_Clean"] + totals["Shared_Dirty"]),
+        "private_mb": _megabytes(totals["Private_Clean"] + totals["Private_Dirty"]),
+        "swap_mb": _megabytes(totals["Swap"]),
+    }
+
+def child_pids(pid: int) -> list:
+    """
+    Return the IDs of a process's direct children.
+    """
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as file:
+                # The command name may contain spaces, so the fields are read after its closing parenthesis
+                fields = file.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+def worker_memory_report(master_pid: int) -> dict:
+    """
+    Report the memory of a server's master process and its workers.
+
+    Returns:
+        dict: Per-process figures, plus totals: `rss_mb` as the sum of every process's RSS,
+            `pss_mb` as the memory the group actually uses, and `shared_savings_mb` as the difference.
+    """
+    processes = [dict(process_memory(master_pid), role="master")]
+    for pid in child_pids(master_pid):
+        try:
+            processes.append(dict(process_memory(pid), role="worker"))
+        except OSError:
+            # The worker exited while the report was being built
+            continue
+    rss = sum(process["rss_mb"] for process in processes)
+    pss = sum(process["pss_mb"] for process in processes)
+    return {
+        "processes": processes,
+        "workers": len(processes) - 1,
+        "totals": {
+            "rss_mb": round(rss, 1),
+            "pss_mb": round(pss, 1),
+            "shared_savings_mb": round(rss - pss, 1),
+        },
+    }
@@ -0,0 +1,233 @@
+# metrics.py
+import os
+import re
+import time
+from contextlib import contextmanager
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+# Request latency buckets, in seconds, from cheap encodings to long summaries
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUEST_COUNT = Counter(
+    "llm_services_requests_total",
+    "HTTP requests by route template and status code.",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "llm_services_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "llm_services_stage_duration_seconds",
+    "Time spent in each stage of the request path: auth, preprocess, tokenize, inference and serialization.",
+    ["stage", "name"],
+    buckets=LATENCY_BUCKETS,
+)
+
+def observe_stage(stage: str, name: str, seconds: float):
+    """
+    Record the duration of one stage.
+    """
+    STAGE_LATENCY.labels(stage, name).observe(seconds)
+
+@contextmanager
+def stage_timer(stage: str, name: str):
+    """
+    Time the enclosed block as one stage of the request path.
+
+    Args:
+        stage (str): The stage, e.g. "preprocess".
+        name (str): What ran in the stage, e.g. the endpoint or pool name.
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage, name).observe(time.perf_counter() - start_time)
+
+class TimedJSONResponse(JSONResponse):
+    """
+    JSONResponse that records how long serializing the body takes.
+    """
+    def render(self, content) -> bytes:
+        start_time = time.perf_counter()
+        body = super().render(content)
+        STAGE_LATENCY.labels("serialization", "json").observe(time.perf_counter() - start_time)
+        return body
+
+async def record_request_metrics(request: Request, call_next):
+    """
+    Middleware that counts requests and records their latency by route template.
+
+    The route template (e.g. "/summarize/") is used instead of the raw path so label cardinality stays bounded.
+    """
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_name = route.path if route is not None else "unmatched"
+        REQUEST_COUNT.labels(request.method, route_name, str(status)).inc()
+        REQUEST_LATENCY.labels(request.method, route_name).observe(time.perf_counter() - start_time)
+
+def _bucket_bound(key):
+    # Bucket keys look like "le_8" or "le_64ms"
+    return int(re.search(r"\d+", key).group())
+
+def _power_of_two_histogram(name, documentation, label, entries, scale=1.0):
+    # Convert the power-of-two bucket counts kept by batchers and admission queues into a cumulative histogram
+    family = HistogramMetricFamily(name, documentation, labels=[label])
+    for label_value, histogram, total in entries:
+        buckets, cumulative = [], 0
+        for key, count in sorted(histogram.items(), key=lambda item: _bucket_bound(item[0])):
+            cumulative += count
+            buckets.append((str(_bucket_bound(key) * scale), cumulative))
+        buckets.append(("+Inf", cumulative))
+        family.add_metric([label_value], buckets, total)
+    return family
+
+class ServiceCollector:
+    """
+    Collects registry, embedding and result cache, batcher, executor and admission statistics at scrape time,
+    so the request path pays nothing for them.
+    """
+    def describe(self):
+        # Nothing to declare up front; describing would otherwise call collect() at registration
+        return []
+
+    def collect(self):
+        # Imported here so the metrics module does not load the models at import time
+        from models.nlp_models import model_registry
+        from utils.admission import admission_stats
+        from utils.batching import batching_stats
+        from utils.embedding_cache import get_embedding_cache
+        from utils.executors import executor_stats
+        from utils.result_cache import get_result_cache
+
+        registry = model_registry.stats()
+        lookups = CounterMetricFamily("llm_services_model_registry_lookups", "Model registry lookups by result.", labels=["result"])
+        lookups.add_metric(["hit"], registry["hits"])
+        lookups.add_metric(["miss"], registry["misses"])
+        yield lookups
+        yield CounterMetricFamily("llm_services_model_registry_evictions", "Models evicted from the registry.", value=registry["evictions"])
+        yield GaugeMetricFamily("llm_services_model_registry_resident_bytes", "Estimated bytes of resident models.", value=registry["resident_bytes"])
+        load_seconds = GaugeMetricFamily("llm_services_model_load_seconds", "Load time of each resident model.", labels=["task", "model"])
+        for entry in registry["resident"]:
+            load_seconds.add_metric([entry["task"], entry["model"]], entry["load_seconds"])
+        yield load_seconds
+
+        cache = get_embedding_cache().stats()
+        cache_lookups = CounterMetricFamily("llm_services_embedding_cache_lookups", "Embedding cache lookups by result.", labels=["result"])
+        cache_lookups.add_metric(["memory_hit"], cache["memory_hits"])
+        cache_lookups.add_metric(["disk_hit"], cache["disk_hits"])
+        cache_lookups.add_metric(["miss"], cache["misses"])
+        yield cache_lookups
+        yield GaugeMetricFamily("llm_services_embedding_cache_hit_ratio", "Embedding cache hit ratio.", value=cache["hit_ratio"])
+        yield GaugeMetricFamily("llm_services_embedding_cache_memory_bytes", "Bytes held by the in-memory embedding cache.", value=cache["memory_bytes"])
+
+        results = get_result_cache().stats()
+        result_lookups = CounterMetricFamily("llm_services_result_cache_lookups", "Result cache lookups by result.", labels=["result"])
+        result_lookups.add_metric(["hit"], results["hits"])
+        result_lookups.add_metric(["coalesced"], results["coalesced"])
+        result_lookups.add_metric(["miss"], results["misses"])
+        yield result_lookups
+        yield GaugeMetricFamily("llm_services_result_cache_bytes", "Bytes held by the result cache.", value=results["bytes"])
+
+        batchers = batching_stats()
+        queue_depth = GaugeMetricFamily("llm_services_batcher_queue_depth", "Items waiting in each micro-batcher.", labels=["batcher"])
+        for batcher in batchers:
+            queue_depth.add_metric([batcher["name"]], batcher["queue_depth"])
+        yield queue_depth
+        yield _power_of_two_histogram(
+            "llm_services_batch_size", "Micro-batch sizes.", "batcher",
+            [(batcher["name"], batcher["batch_size_histogram"], batcher["items"]) for batcher in batchers],
+        )
+
+        pools = executor_stats()
+        for field, documentation in (("active", "Calls running in each pool."), ("queued", "Calls waiting in each pool."),
+                                     ("utilization", "Busy fraction of each pool's workers.")):
+            gauge = GaugeMetricFamily(f"llm_services_executor_{field}", documentation, labels=["pool"])
+            for pool in pools:
+                gauge.add_metric([pool["name"]], pool[field])
+            yield gauge
+        rejected = CounterMetricFamily("llm_services_executor_rejected", "Calls rejected because a pool was full.", labels=["pool"])
+        for pool in pools:
+            rejected.add_metric([pool["name"]], pool["rejected"])
+        yield rejected
+
+        classes = admission_stats()
+        shed = CounterMetricFamily("llm_services_admission_rejected", "Requests shed by admission control.", labels=["class", "reason"])
+        for admission_class in classes:
+            shed.add_metric([admission_class["name"], "queue_full"], admission_class["rejected_queue_full"])
+            shed.add_metric([admission_class["name"], "slo"], admission_class["rejected_slo"])
+        yield shed
+        yield _power_of_two_histogram(
+            "llm_services_admission_queue_wait_seconds", "Time requests waited for admission.", "class",
+            [
+                (c["name"], c["queue_wait_histogram"], c["mean_queue_wait_ms"] * c["admitted"] / 1000)
+                for c in classes
+            ],
+            scale=0.001,
+        )
+
+class WorkerCollector:
+    """
+    Wraps a collector so every sample carries the `pid` of the worker that produced it.
+
+    Scrape-time statistics describe the worker that answers the scrape, so with several workers they are
+    labelled rather than passed off as totals for the service.
+    """
+    def __init__(self, collector):
+        self.collector = collector
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        pid = str(os.getpid())
+        for family in self.collector.collect():
+            family.samples = [sample._replace(labels={**sample.labels, "pid": pid}) for sample in family.samples]
+            yield family
+
+def multiprocess_mode() -> bool:
+    """
+    Check whether workers share request and stage metrics through files in PROMETHEUS_MULTIPROC_DIR.
+    """
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+_collector_registered = False
+
+def register_collectors():
+    """
+    Register the scrape-time collector with the default Prometheus registry, once.
+
+    Process metrics such as `process_resident_memory_bytes` come from prometheus_client's default collectors.
+    In multiprocess mode nothing is registered; `metrics_registry` builds the registry for each scrape.
+    """
+    global _collector_registered
+    if not _collector_registered and not multiprocess_mode():
+        REGISTRY.register(ServiceCollector())
+        _collector_registered = True
+
+def metrics_registry():
+    """
+    Return the registry to expose at /metrics.
+
+    In multiprocess mode, request and stage counters and histograms are merged from the files every worker
+    writes, so one scrape covers all workers. Scrape-time statistics come from the worker that answers, with
+    its `pid` label, and the per-process default collectors are left out.
+    """
+    if not multiprocess_mode():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(WorkerCollector(ServiceCollector()))
+    return registry
@@ -0,0 +1,185 @@
+# result_cache.py
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import orjson
+from utils.config import get_setting
+
+# Built-in cache options, overridable under "result_cache" in models_config.json
+DEFAULT_RESULT_CACHE = {
+    "enabled": True,
+    "ttl_seconds": 300,
+    "max_bytes": 32 * 1024 * 1024,
+    "routes": ["sentiment", "entities", "extract_keywords", "summarize"],
+}
+
+def is_deterministic(params: dict) -> bool:
+    """
+    Report whether a request's output is fixed by its inputs; sampled generation is not, so it is never cached.
+    """
+    return not params.get("do_sample", False)
+
+class ResultCache:
+    def __init__(self, ttl_seconds: float = 300, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize the ResultCache class, an LRU cache of serialized endpoint results with a TTL and a byte
+        bound, which also coalesces identical requests that are in flight at the same time.
+
+        Args:
+            ttl_seconds (float): How long a result stays valid.
+            max_bytes (int): The byte budget of the serialized results; the least recently used are dropped first.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Computations in flight, keyed like the entries; only touched from the event loop
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(route: str, model_id: str, params: dict, text: str) -> str:
+        """
+        Build the key of a result from the route, model, parameters and a hash of the text.
+
+        The text is hashed exactly as the model receives it. Requests that opt out of normalization keep
+        their whitespace, so texts that differ only in spacing do not share a result.
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        encoded_params = orjson.dumps(params, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+        return f"{route}|{model_id}|{encoded_params}|{digest}"
+
+    def get(self, key: str):
+        """
+        Return a fresh copy of a cached result, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, body = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+        # Each caller gets its own copy, so handlers can modify the result freely
+        return orjson.loads(body)
+
+    def put(self, key: str, result):
+        """
+        Store a result, evicting the least recently used ones beyond the byte budget.
+        """
+        body = orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY)
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    async def get_or_compute(self, key: str, compute):
+        """
+        Return the cached result for a key, or compute it once however many callers ask at the same time.
+
+        The computation runs as its own task, so a caller that disconnects does not cancel it for the others.
+
+        Args:
+            key (str): The result key.
+            compute (callable): An async function without arguments that produces the result.
+        """
+        result = self.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._compute(key, compute))
+            self._in_flight[key] = task
+        result = await asyncio.shield(task)
+        # Hand out copies, like cache hits
+        return orjson.loads(orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY))
+
+    async def _compute(self, key, compute):
+        try:
+            result = await compute()
+            self.put(key, result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Return hit, miss and coalescing counters and the cache size.
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "in_flight": len(self._in_flight),
+            }
+
+# Shared cache, created on first use from the "result_cache" settings
+_result_cache = None
+
+def result_cache_options() -> dict:
+    """
+    Return the result cache options merged over the built-in defaults.
+    """
+    options = dict(DEFAULT_RESULT_CACHE)
+    options.update(get_setting("result_cache", {}))
+    return options
+
+def get_result_cache() -> ResultCache:
+    """
+    Retrieve the shared result cache, creating it on first use.
+    """
+    global _result_cache
+    if _result_cache is None:
+        options = result_cache_options()
+        _result_cache = ResultCache(ttl_seconds=options["ttl_seconds"], max_bytes=options["max_bytes"])
+    return _result_cache
+
+async def cached_result(route: str, model_id: str, params: dict, text: str, compute):
+    """
+    Serve a deterministic result from the cache, coalescing identical concurrent requests.
+
+    Requests are computed directly when the cache is disabled, the route is not listed under
+    `result_cache.routes`, or the parameters sample (`do_sample`).
+
+    Args:
+        route (str): The route name, e.g. "sentiment".
+        model_id (str): The model that produces the result.
+        params (dict): Every request parameter that changes the result.
+        text (str): The input text exactly as the model receives it.
+        compute (callable): An async function without arguments that produces the result.
+    """
+    options = result_cache_options()
+    if not options["enabled"] or route not in options["routes"] or not is_deterministic(params):
+        return await compute()
+    cache = get_result_cache()
+    return await cache.get_or_compute(cache.make_key(route, model_id, params, text), compute)
@@ -0,0 +1,156 @@
+# streaming.py
+import asyncio
+import json
+import threading
+import torch
+from fastapi.responses import StreamingResponse
+from transformers import TextStreamer, StoppingCriteria, StoppingCriteriaList
+from utils.executors import get_pool, pool_for_task
+from utils.admission import AdmissionSlot
+
+class AsyncTextStreamer(TextStreamer):
+    def __init__(self, tokenizer, loop: asyncio.AbstractEventLoop, **decode_kwargs):
+        """
+        Initialize the AsyncTextStreamer class, which hands decoded text from a generation thread to the event loop.
+
+        Args:
+            tokenizer: The tokenizer used to decode generated tokens.
+            loop (asyncio.AbstractEventLoop): The event loop that consumes the text.
+            decode_kwargs: Extra arguments for `tokenizer.decode`.
+        """
+        # skip_prompt drops the decoder start token of encoder-decoder models
+        super().__init__(tokenizer, skip_prompt=True, **decode_kwargs)
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        if text:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, text)
+        if stream_end:
+            self.close()
+
+    def close(self):
+        """
+        Signal the consumer that no more text will arrive.
+        """
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+class CancelledCriteria(StoppingCriteria):
+    def __init__(self, cancel_event: threading.Event):
+        """
+        Initialize the CancelledCriteria class, which stops generation once the client has gone away.
+
+        Args:
+            cancel_event (threading.Event): Set when the stream is abandoned.
+        """
+        self.cancel_event = cancel_event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.cancel_event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+def generate_with_streamer(model, tokenizer, prompt: str, streamer: AsyncTextStreamer, cancel_event: threading.Event, **generate_kwargs):
+    """
+    Run `model.generate` on a prompt, streaming tokens and stopping early when the stream is cancelled.
+
+    Runs in a worker thread. The streamer is always closed, so the consumer never waits forever.
+    """
+    try:
+        # The client may have disconnected while the call was queued
+        if cancel_event.is_set():
+            return
+        inputs = tokenizer(prompt, return_tensors="pt", truncation=True).to(model.device)
+        with torch.inference_mode():
+            model.generate(
+                **inputs,
+                streamer=streamer,
+                stopping_criteria=StoppingCriteriaList([CancelledCriteria(cancel_event)]),
+                **generate_kwargs,
+            )
+    finally:
+        streamer.close()
+
+class GenerationStreamingResponse(StreamingResponse):
+    def __init__(self, content, cancel_event: threading.Event, **kwargs):
+        """
+        Initialize the GenerationStreamingResponse class, a streaming response that stops its generation
+        however the response ends.
+
+        Args:
+            content: The async iterator of events.
+            cancel_event (threading.Event): Set when the response is finished or abandoned.
+            kwargs: Arguments for `StreamingResponse`.
+        """
+        super().__init__(content, **kwargs)
+        self.cancel_event = cancel_event
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # A client that disconnects before the body is iterated never runs the body's own cleanup
+            self.cancel_event.set()
+
+async def sse_events(streamer: AsyncTextStreamer, generation: asyncio.Future, cancel_event: threading.Event):
+    """
+    Yield generated text as Server-Sent Events, ending with `[DONE]` or an error event.
+
+    When the client disconnects the response task is cancelled, which sets the cancel event so the
+    generation thread stops at its next step.
+    """
+    try:
+        while True:
+            text = await streamer.queue.get()
+            if text is None:
+                break
+            yield f"data: {json.dumps({'token': text})}\n\n"
+
+        try:
+            await generation
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+        yield "data: [DONE]\n\n"
+    finally:
+        cancel_event.set()
+
+def finish_generation(generation: asyncio.Future, slot: AdmissionSlot, cancel_event: threading.Event):
+    """
+    Release a streamed request's admission slot once its generation has ended.
+    """
+    # Retrieve the error here, since an abandoned stream never awaits the generation
+    if not generation.cancelled():
+        generation.exception()
+    # A cancelled generation's time says little about service time
+    slot.release(measure=not cancel_event.is_set())
+
+def stream_generation(task: str, pipe, prompt: str, slot: AdmissionSlot, **generate_kwargs) -> StreamingResponse:
+    """
+    Start generating from a transformers pipeline in the task's pool and stream the output as Server-Sent Events.
+
+    Args:
+        task (str): The task name, used to pick the pool.
+        pipe: The loaded pipeline; its model and tokenizer are used directly.
+        prompt (str): The model input.
+        slot (AdmissionSlot): The request's admission slot, held until generation finishes.
+        generate_kwargs: Arguments for `model.generate`.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` response.
+
+    Raises:
+        HTTPException: If the pool's queue is full, a 503 status is raised before the stream starts.
+    """
+    streamer = AsyncTextStreamer(pipe.tokenizer, asyncio.get_running_loop(), skip_special_tokens=True)
+    cancel_event = threading.Event()
+    generation = get_pool(pool_for_task(task)).submit(
+        generate_with_streamer, pipe.model, pipe.tokenizer, prompt, streamer, cancel_event, **generate_kwargs
+    )
+    # Generation keeps using the CPU after the handler returns, so the slot is released when it ends
+    slot.detach()
+    generation.add_done_callback(lambda future: finish_generation(future, slot, cancel_event))
+    return GenerationStreamingResponse(
+        sse_events(streamer, generation, cancel_event),
+        cancel_event,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
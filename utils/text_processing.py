@@ -1,60 +1,196 @@
 import re
+import threading
 import spacy
+from utils.config import get_setting
+from utils.metrics import stage_timer
 
-# Load spaCy model for sentence splitting
-nlp = spacy.load("en_core_web_sm")
+# Regular expressions used by correct_sentence_spacing, compiled once at import
+COMMA_SPACING = re.compile(r",(\S)")  # Space after commas
+PERIOD_SPACING = re.compile(r"(\.\s*)([A-Za-z])")  # Space after periods
+PUNCTUATION_SPACING = re.compile(r"([!?,;:])(\S)")  # Space after punctuation
+MULTIPLE_SPACES = re.compile(r"\s{2,}")  # Remove multiple spaces
+
+# Define common abbreviations
+ABBREVIATIONS = [
+    "U\\.", "I\\.", "P\\.", "R\\.", "B\\.", "O\\.", "S\\.", "J\\.", "A\\."
+]
+ABBREV_PATTERN = "|".join(ABBREVIATIONS)
+ABBREV_WORD = re.compile(rf"\b({ABBREV_PATTERN})\b")
+ABBREV_PAIR = re.compile(rf"(\b{ABBREV_PATTERN})\s+(\b{ABBREV_PATTERN})")
+ABBREV_LEADING_SPACE = re.compile(rf"\s({ABBREV_PATTERN})")
+
+# Components of en_core_web_sm that sentence splitting does not need
+UNUSED_COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+
+# spaCy pipeline for sentence splitting, loaded on first use
+_sentence_splitter = None
+_sentence_splitter_lock = threading.Lock()
+
+def load_sentence_splitter(mode: str = "senter"):
+    """
+    Load a spaCy pipeline that only splits sentences.
+
+    Args:
+        mode (str): "senter" for the statistical sentence recognizer of en_core_web_sm with every other
+            component excluded, "sentencizer" for the rule-based splitter, or "parser" for the full pipeline.
+
+    Returns:
+        spacy.Language: The pipeline.
+    """
+    if mode == "sentencizer":
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        return nlp
+    if mode == "parser":
+        return spacy.load("en_core_web_sm")
+    if mode != "senter":
+        raise ValueError(f"Unsupported sentence splitter {mode}.")
+
+    nlp = spacy.load("en_core_web_sm", exclude=UNUSED_COMPONENTS)
+    nlp.enable_pipe("senter")
+    return nlp
+
+def get_sentence_splitter():
+    """
+    Retrieve the shared sentence splitter, loading it on first use.
+    """
+    global _sentence_splitter
+    if _sentence_splitter is None:
+        with _sentence_splitter_lock:
+            if _sentence_splitter is None:
+                mode = get_setting("text_normalization", {}).get("sentence_splitter", "senter")
+                _sentence_splitter = load_sentence_splitter(mode)
+    return _sentence_splitter
+
+def fix_spacing(text: str) -> str:
+    """
+    Fix punctuation and abbreviation spacing with the precompiled regular expressions.
+    """
+    text = COMMA_SPACING.sub(r", \1", text)
+    text = PERIOD_SPACING.sub(r". \2", text)
+    text = PUNCTUATION_SPACING.sub(r"\1 \2", text)
+    text = MULTIPLE_SPACES.sub(" ", text)
+    text = text.strip()  # Trim leading and trailing spaces
+
+    # Handle common abbreviation spacing issues
+    text = ABBREV_WORD.sub(lambda m: m.group(0).replace(" ", ""), text)
+    text = ABBREV_PAIR.sub(r"\1\2", text)
+    text = ABBREV_LEADING_SPACE.sub(r" \1", text)
+    return text
+
+def split_sentences(text: str) -> list:
+    """
+    Split text into stripped sentences with the shared sentence splitter.
+    """
+    doc = get_sentence_splitter()(text)
+    return [sent.text.strip() for sent in doc.sents]
 
 def correct_sentence_spacing(text: str) -> str:
     """
     Correct common spacing issues in text.
     """
-    # Use spaCy to split text into sentences
-    doc = nlp(text)
-    sentences = [sent.text.strip() for sent in doc.sents]
-
     # Join sentences with a single space between them
-    corrected_text = " ".join(sentences)
+    return fix_spacing(" ".join(split_sentences(text)))
 
-    # Use regular expressions to fix common punctuation issues
-    corrected_text = re.sub(r",(\S)", r", \1", corrected_text)  # Space after commas
-    corrected_text = re.sub(r"(\.\s*)([A-Za-z])", r". \2", corrected_text)  # Space after periods
-    corrected_text = re.sub(r"([!?,;:])(\S)", r"\1 \2", corrected_text)  # Space after punctuation
-    corrected_text = re.sub(r"\s{2,}", " ", corrected_text)  # Remove multiple spaces
-    corrected_text = corrected_text.strip()  # Trim leading and trailing spaces
+def normalization_enabled(endpoint: str = None) -> bool:
+    """
+    Check whether text normalization is enabled globally and for an endpoint.
 
-    # Define common abbreviations
-    abbreviations = [
-        "U\\.", "I\\.", "P\\.", "R\\.", "B\\.", "O\\.", "S\\.", "J\\.", "A\\."
-    ]
+    Args:
+        endpoint (str): The endpoint name, e.g. "embed".
 
-    # Create a regex pattern for all abbreviations
-    abbrev_pattern = "|".join(abbreviations)
+    Returns:
+        bool: True if text should be normalized.
+    """
+    options = get_setting("text_normalization", {})
+    if not options.get("enabled", True):
+        return False
+    return options.get("endpoints", {}).get(endpoint, True)
 
-    # Handle common abbreviation spacing issues
-    corrected_text = re.sub(rf"\b({abbrev_pattern})\b", lambda m: m.group(0).replace(" ", ""), corrected_text)
-    corrected_text = re.sub(rf"(\b{abbrev_pattern})\s+(\b{abbrev_pattern})", r"\1\2", corrected_text)
-    corrected_text = re.sub(rf"\s({abbrev_pattern})", r" \1", corrected_text)
+def normalize_text(text: str, endpoint: str = None, normalize: bool = True) -> str:
+    """
+    Correct the spacing of request text unless the client or the endpoint configuration opted out.
 
-    return corrected_text
+    Args:
+        text (str): The request text.
+        endpoint (str): The endpoint name, used to look up the per-endpoint setting.
+        normalize (bool): The per-request opt-out; False returns the text unchanged.
 
-def chunk_text(text, tokenizer, max_length=512, overlap=50):
+    Returns:
+        str: The normalized text.
     """
-    Chunk text into manageable pieces using a sliding window approach.
+    if not normalize or not normalization_enabled(endpoint):
+        return text
+    with stage_timer("preprocess", endpoint or "default"):
+        return correct_sentence_spacing(text)
+
+def normalize_sentences(text: str, endpoint: str = None, normalize: bool = True) -> list:
+    """
+    Split request text into sentences, correcting the spacing of each one unless normalization is off.
+
+    This is the same sentence split that `normalize_text` runs, returned as sentences instead of joined.
+
+    Returns:
+        list: The non-empty sentences, in order.
+    """
+    with stage_timer("preprocess", endpoint or "default"):
+        sentences = split_sentences(text)
+        if normalize and normalization_enabled(endpoint):
+            sentences = [fix_spacing(sentence) for sentence in sentences]
+    return [sentence for sentence in sentences if sentence]
+
+def _word_start(word_ids, index, floor):
+    # Move an index back to the first token of its word, without going below floor
+    while index > floor and word_ids[index] is not None and word_ids[index] == word_ids[index - 1]:
+        index -= 1
+    return index
+
+def encode_for_chunking(text, tokenizer):
     """
-    tokens = tokenizer.encode(text, truncation=False)
-    total_tokens = len(tokens)
-    chunks = []
+    Tokenize text once, without special tokens, keeping the character offsets `chunk_spans` needs.
 
-    # Create overlapping chunks
-    for i in range(0, total_tokens, max_length - overlap):
-        # Get tokens for the current chunk, ensure we don't exceed total token length
-        chunk_tokens = tokens[i:i + max_length]
+    Callers that also need the token count can reuse the encoding instead of tokenizing again.
+    """
+    with stage_timer("tokenize", "chunk_spans"):
+        return tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, truncation=False)
+
+def chunk_spans(text, tokenizer, max_length=512, overlap=50, encoding=None):
+    """
+    Split text into overlapping windows of at most `max_length` tokens, including special tokens.
+
+    Windows are built from the tokenizer's character offsets, so chunks are slices of the original
+    text rather than decoded tokens. With a fast tokenizer, window edges are moved to word boundaries.
+    Pass the result of `encode_for_chunking` as `encoding` to skip tokenizing again.
+
+    Returns:
+        list: (start, end) character offsets of each chunk.
+    """
+    if encoding is None:
+        encoding = encode_for_chunking(text, tokenizer)
+    offsets = encoding["offset_mapping"]
+    word_ids = encoding.word_ids() if getattr(tokenizer, "is_fast", False) else [None] * len(offsets)
+    total_tokens = len(offsets)
+    window = max_length - tokenizer.num_special_tokens_to_add()
+    spans = []
 
-        # Decode tokens back to text
-        chunk_text = tokenizer.decode(chunk_tokens, skip_special_tokens=True)
-        chunks.append(chunk_text)
+    start = 0
+    while start < total_tokens:
+        end = min(start + window, total_tokens)
+        if end < total_tokens:
+            end = _word_start(word_ids, end, start + 1)
+        spans.append((offsets[start][0], offsets[end - 1][1]))
+        if end >= total_tokens:
+            break
+        # Step back by the overlap for the next window, always making progress
+        start = _word_start(word_ids, max(end - overlap, start + 1), start + 1)
 
-    return chunks
+    return spans
+
+def chunk_text(text, tokenizer, max_length=512, overlap=50):
+    """
+    Chunk text into manageable pieces using a sliding window approach.
+    """
+    return [text[start:end] for start, end in chunk_spans(text, tokenizer, max_length, overlap)]
 
 def count_tokens(text: str, model_name: str) -> int:
     """
@@ -1,21 +1,222 @@
 # throttling.py
+import hashlib
+import math
+import os
+import sqlite3
+import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict
 from fastapi import Request, HTTPException
+from utils import auth
+from utils.config import get_setting
+from utils.executors import run_in_pool
+
+# Built-in limits, overridable under "rate_limits" in models_config.json
+DEFAULT_RATE_LIMITS = {
+    # "auto" shares counters in SQLite when several workers serve the app (WEB_CONCURRENCY), else keeps them in memory
+    "backend": "auto",
+    "sqlite_path": "data/rate_limits.sqlite3",
+    "key_by": "ip",
+    "max_clients": 10000,
+    "default": {"limit": 600, "window_seconds": 60},
+    "routes": {},
+    "api_keys": {},
+}
+
+def _slide(window_index: int, state):
+    """
+    Advance a (window index, current count, previous count) state to the given window.
+    """
+    if state is None or window_index > state[0] + 1:
+        return window_index, 0, 0
+    if window_index == state[0] + 1:
+        return window_index, 0, state[1]
+    return state
+
+def _acquire(state, limit: int, window_seconds: float, now: float):
+    """
+    Apply one request to a sliding-window counter state.
+
+    The count over the last window is estimated as the previous window's count, weighted by how much of it
+    still overlaps the sliding window, plus the current window's count.
+
+    Returns:
+        tuple: (allowed, remaining, retry_after, new_state)
+    """
+    window_index = int(now // window_seconds)
+    window_index, current, previous = _slide(window_index, state)
+    elapsed = now - window_index * window_seconds
+    estimate = previous * (1 - elapsed / window_seconds) + current
+
+    if estimate + 1 <= limit:
+        current += 1
+        return True, max(0, int(limit - estimate - 1)), 0, (window_index, current, previous)
+
+    # Wait until enough of the previous window has slid out; if the current window is full, it becomes
+    # the previous window and part of it has to slide out too
+    if current + 1 <= limit:
+        wait = (1 - (limit - current - 1) / previous) * window_seconds - elapsed
+    else:
+        wait = window_seconds - elapsed + max(0, 1 - (limit - 1) / max(current, 1)) * window_seconds
+    return False, 0, max(1, math.ceil(wait)), (window_index, current, previous)
+
+def _rate(limit: dict) -> float:
+    # Requests per second allowed by a {"limit", "window_seconds"} setting
+    return limit["limit"] / limit.get("window_seconds", 60)
+
+class MemoryRateLimitStore:
+    def __init__(self, max_clients: int = 10000):
+        """
+        Initialize the MemoryRateLimitStore class, which keeps counters for this worker in a bounded LRU map.
+
+        Args:
+            max_clients (int): The maximum number of counters kept; the least recently seen are dropped first.
+        """
+        self.max_clients = max_clients
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, limit: int, window_seconds: float, now: float):
+        """
+        Count a request against a key.
+
+        Returns:
+            tuple: (allowed, remaining, retry_after)
+        """
+        with self._lock:
+            counter = self._counters.get(key)
+            state = counter[:3] if counter is not None else None
+            allowed, remaining, retry_after, state = _acquire(state, limit, window_seconds, now)
+            self._counters[key] = state + (window_seconds,)
+            self._counters.move_to_end(key)
+            self._evict(now)
+            return allowed, remaining, retry_after
+
+    def _evict(self, now):
+        # Counters idle for two windows are equivalent to no counter; the oldest are checked first
+        while self._counters:
+            key, (window_index, _, _, window_seconds) = next(iter(self._counters.items()))
+            if len(self._counters) <= self.max_clients and int(now // window_seconds) <= window_index + 1:
+                break
+            del self._counters[key]
+
+    def __len__(self):
+        return len(self._counters)
+
+class SQLiteRateLimitStore:
+    def __init__(self, path: str):
+        """
+        Initialize the SQLiteRateLimitStore class, which keeps counters in an SQLite database shared by all workers.
+
+        Args:
+            path (str): The database path.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            "key TEXT PRIMARY KEY, window INTEGER NOT NULL, current INTEGER NOT NULL, "
+            "previous INTEGER NOT NULL, expires REAL NOT NULL)"
+        )
+        self._calls = 0
+
+    def acquire(self, key: str, limit: int, window_seconds: float, now: float):
+        """
+        Count a request against a key, atomically across workers.
+
+        Returns:
+            tuple: (allowed, remaining, retry_after)
+        """
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so the read-modify-write cannot interleave
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT window, current, previous FROM counters WHERE key = ?", (key,)).fetchone()
+                allowed, remaining, retry_after, state = _acquire(row, limit, window_seconds, now)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO counters (key, window, current, previous, expires) VALUES (?, ?, ?, ?, ?)",
+                    (key, state[0], state[1], state[2], (state[0] + 2) * window_seconds),
+                )
+                self._calls += 1
+                if self._calls % 1000 == 0:
+                    self._db.execute("DELETE FROM counters WHERE expires < ?", (now,))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            return allowed, remaining, retry_after
 
 class AdaptiveThrottling:
-    def __init__(self, base_backoff: int = 1, max_backoff: int = 60):
+    def __init__(self, base_backoff: int = 1, max_backoff: int = 60, options: dict = None):
         """
-        Initialize the AdaptiveThrottling class. 
+        Initialize the AdaptiveThrottling class, a sliding-window rate limiter with error backoff.
 
         Args:
             base_backoff (int): The base backoff time in seconds.
             max_backoff (int): The maximum backoff time in seconds.
+            options (dict): Rate limit options, or None to read "rate_limits" from the settings on first use.
         """
         self.base_backoff = base_backoff
         self.max_backoff = max_backoff
-        self.request_frequency = defaultdict(list)
-        self.error_count = defaultdict(int)
+        self.options = options
+        self.store = None
+        # Per-client [error count, blocked until] for this worker, bounded like the counters
+        self.error_count = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _configure(self):
+        if self.store is not None:
+            return
+        options = dict(DEFAULT_RATE_LIMITS)
+        options.update(self.options if self.options is not None else get_setting("rate_limits", {}))
+        self.options = options
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+        if options["backend"] == "auto":
+            options["backend"] = "sqlite" if workers > 1 else "memory"
+        elif options["backend"] == "memory" and workers > 1:
+            print(f"Warning: memory rate limits are counted per worker, so {workers} workers allow {workers} times each limit")
+        if options["backend"] == "sqlite":
+            self.store = SQLiteRateLimitStore(options["sqlite_path"])
+        elif options["backend"] == "memory":
+            self.store = MemoryRateLimitStore(options["max_clients"])
+        else:
+            raise ValueError(f"Unsupported rate limit backend {options['backend']}.")
+
+    def client_id(self, request: Request) -> str:
+        """
+        Identify the client by IP address, or by a fingerprint of its API key when `key_by` is "api_key".
+
+        The middleware runs before authentication, so a key only identifies the client once it is one of the
+        keys auth accepts; any other token is counted against its IP, so callers cannot get a fresh counter by
+        sending a new token.
+        """
+        authorization = request.headers.get("Authorization")
+        if self.options["key_by"] == "api_key" and auth.is_valid_api_key(authorization):
+            token = authorization.split(" ", 1)[-1]
+            return "key:" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        return "ip:" + request.client.host
+
+    def limit_for(self, client_id: str, path: str):
+        """
+        Return the (bucket, limit, window) that applies to a client and path.
+
+        The client's API key limit replaces the default. On routes with their own limit, the stricter
+        of the route limit and the key limit applies, compared as requests per second.
+        """
+        key_limit = self.options["api_keys"].get(client_id.split(":", 1)[-1]) if client_id.startswith("key:") else None
+        for route, route_limit in self.options["routes"].items():
+            if path == route or path.startswith(route.rstrip("/") + "/"):
+                if key_limit is not None and _rate(key_limit) < _rate(route_limit):
+                    route_limit = key_limit
+                return route, route_limit["limit"], route_limit.get("window_seconds", 60)
+        limit = key_limit if key_limit is not None else self.options["default"]
+        return "*", limit["limit"], limit.get("window_seconds", 60)
 
     def calculate_backoff(self, client_ip):
         """
@@ -27,49 +228,70 @@ class AdaptiveThrottling:
         Returns:
             int: The calculated backoff time in seconds.
         """
-        error_count = self.error_count[client_ip]
-        backoff_time = min(self.base_backoff * (2 ** error_count), self.max_backoff)
+        error_count = self.error_count[client_ip][0] if client_ip in self.error_count else 0
+        backoff_time = min(self.base_backoff * (2 ** max(error_count - 1, 0)), self.max_backoff)
         return backoff_time
 
-    async def check_rate_limit(self, request: Request):
+    async def check_rate_limit(self, request: Request) -> dict:
         """
         Check if the client has exceeded the rate limit.
 
         Args:
             request (Request): The incoming request.
 
+        Returns:
+            dict: Rate limit headers for the response.
+
         Raises:
-            HTTPException: If the client has exceeded the rate limit, a 429 status is raised.
+            HTTPException: If the client has exceeded the rate limit or is backing off after errors,
+                a 429 status with a Retry-After header is raised.
         """
-        client_ip = request.client.host
+        self._configure()
         current_time = time.time()
 
-        # Clean up old requests outside the time window (optional, based on your logic)
-        self.request_frequency[client_ip] = [
-            t for t in self.request_frequency[client_ip]
-            if current_time - t < 60
-        ]
+        # Clients that caused errors are held back until their backoff expires, not indefinitely
+        _, blocked_until = self.error_count.get(request.client.host, (0, 0.0))
+        if current_time < blocked_until:
+            raise HTTPException(
+                status_code=429,
+                detail="Too Many Requests, please retry later",
+                headers={"Retry-After": str(math.ceil(blocked_until - current_time))}
+            )
 
-        # Track current request
-        self.request_frequency[client_ip].append(current_time)
+        client_id = self.client_id(request)
+        bucket, limit, window_seconds = self.limit_for(client_id, request.url.path)
+        key = f"{client_id}|{bucket}"
+        if isinstance(self.store, SQLiteRateLimitStore):
+            # The shared store blocks on disk, so it runs off the event loop
+            allowed, remaining, retry_after = await run_in_pool(
+                "preprocess", self.store.acquire, key, limit, window_seconds, current_time
+            )
+        else:
+            allowed, remaining, retry_after = self.store.acquire(key, limit, window_seconds, current_time)
 
-        # Adjust based on errors
-        if self.error_count[client_ip] > 0:
-            retry_after = self.calculate_backoff(client_ip)
+        headers = {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining)}
+        if not allowed:
             raise HTTPException(
                 status_code=429,
                 detail="Too Many Requests, please retry later",
-                headers={"Retry-After": str(int(retry_after))}
+                headers={**headers, "Retry-After": str(retry_after)}
             )
+        return headers
 
     def record_error(self, client_ip):
         """
-        Increment the error count for a specific client.
+        Increment the error count for a specific client and start its backoff.
 
         Args:
             client_ip (str): The IP address of the client.
         """
-        self.error_count[client_ip] += 1
+        with self._lock:
+            entry = self.error_count.pop(client_ip, None) or [0, 0.0]
+            entry[0] += 1
+            self.error_count[client_ip] = entry
+            entry[1] = time.time() + self.calculate_backoff(client_ip)
+            while len(self.error_count) > self.options["max_clients"]:
+                self.error_count.popitem(last=False)
 
     def reset_error_count(self, client_ip):
         """
@@ -78,4 +300,6 @@ class AdaptiveThrottling:
         Args:
             client_ip (str): The IP address of the client.
         """
-        self.error_count[client_ip] = 0
+        if client_ip in self.error_count:
+            with self._lock:
+                self.error_count.pop(client_ip, None)
@@ -0,0 +1,671 @@
+# vector_index.py
+import fcntl
+import json
+import math
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+import numpy as np
+from utils.config import get_setting
+
+# Built-in index options, overridable under "vector_index" in models_config.json
+DEFAULT_INDEX_OPTIONS = {
+    "directory": "data/collections",
+    "initial_capacity": 1024,
+    "block_rows": 65536,  # Rows scored per matrix product in exact search, which bounds scratch memory
+    "compact_ratio": 0.5,  # Deleted fraction of rows that triggers a compaction
+    "approximate_min_rows": 1000000,  # "auto" mode switches to IVF search from this many live rows
+    "nlist": None,  # IVF lists; None picks about 4 * sqrt(rows)
+    "nprobe": 16,  # IVF lists scanned per query
+    "train_sample": 100000,  # Rows sampled to train the IVF centroids
+    "kmeans_iterations": 10,
+}
+
+SEARCH_MODES = ("exact", "approximate", "auto")
+
+COLLECTION_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def index_options() -> dict:
+    """
+    Return the vector index options merged over the built-in defaults.
+    """
+    options = dict(DEFAULT_INDEX_OPTIONS)
+    options.update(get_setting("vector_index", {}))
+    return options
+
+def normalize_rows(vectors) -> np.ndarray:
+    """
+    Scale each row to unit length, so a dot product is the cosine similarity.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k highest scores of each row, best first, without sorting the whole row.
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    partition = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, partition, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(partition, order, axis=1)
+
+def nearest_centroids(vectors, centroids: np.ndarray, block_rows: int = 8192) -> np.ndarray:
+    """
+    Return the index of the most similar centroid of each vector, scoring blocks of rows at a time.
+    """
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block_rows):
+        assignments[start:start + block_rows] = np.argmax(vectors[start:start + block_rows] @ centroids.T, axis=1)
+    return assignments
+
+def spherical_kmeans(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Cluster unit vectors by cosine similarity.
+
+    Returns:
+        np.ndarray: `nlist` unit-length centroids.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = nearest_centroids(vectors, centroids)
+        counts = np.bincount(assignments, minlength=nlist)
+        # Sum each cluster's rows with one sorted reduceat, much faster than np.add.at
+        order = np.argsort(assignments, kind="stable")
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts[filled])[:-1]])
+        sums = np.empty_like(centroids)
+        sums[filled] = np.add.reduceat(vectors[order], starts, axis=0)
+        # Lists that lost all their rows are reseeded from random rows
+        empty = counts == 0
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+def _open_array(path: str, mode: str, dtype, shape=None) -> np.memmap:
+    return np.lib.format.open_memmap(path, mode=mode, dtype=dtype, shape=shape)
+
+class VectorCollection:
+    def __init__(self, path: str, name: str, options: dict, dimensions: int = None, model: str = None):
+        """
+        Initialize the VectorCollection class, a named set of unit-length float32 vectors held in one
+        contiguous memory-mapped matrix.
+
+        Rows are appended as vectors are added; deleted rows are masked until a compaction drops them,
+        so adds and deletes never rebuild the collection. An optional IVF index narrows searches on
+        large collections to the lists nearest the query.
+
+        Every worker process can open the same collection: writes hold an exclusive `fcntl` lock on the
+        collection's lock file and searches a shared one, and each worker catches up with the others'
+        changes from `meta.json` whenever it takes the lock.
+
+        Args:
+            path (str): The collection directory.
+            name (str): The collection name.
+            options (dict): The vector index options.
+            dimensions (int): The vector size, to create the collection if it does not exist; None to open an existing one.
+            model (str): The embedding model that produces the vectors, to create a new collection.
+
+        Raises:
+            FileNotFoundError: If the collection does not exist and no dimensions were given.
+        """
+        self.path = path
+        self.name = name
+        self.options = options
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_exclusive = False
+        self.vectors = self.deleted = self.assignments = None
+
+        if dimensions is not None:
+            os.makedirs(path, exist_ok=True)
+        self._lock_file = open(self._file("lock"), "a+")
+        with self._lock:
+            # Another worker may create the collection at the same time; whichever locks second opens it
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                if os.path.exists(self._file("meta.json")):
+                    self._open(self._read_meta())
+                elif dimensions is None:
+                    raise FileNotFoundError(f"Collection {name} does not exist.")
+                else:
+                    self._create(dimensions, model)
+            except BaseException:
+                self._lock_file.close()
+                raise
+            finally:
+                if not self._lock_file.closed:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _create(self, dimensions: int, model: str):
+        self.model = model
+        self.dimensions = dimensions
+        self.count = 0
+        self.capacity = self.options["initial_capacity"]
+        self.vectors = _open_array(self._file("vectors.npy"), "w+", np.float32, (self.capacity, dimensions))
+        self.deleted = _open_array(self._file("deleted.npy"), "w+", np.bool_, (self.capacity,))
+        self.ids = []
+        self._rewrite_ids()
+        self.rows = {}
+        self.deleted_count = 0
+        self.centroids = None
+        self.assignments = None
+        self._lists = None
+        self.generation = 0
+        self.epoch = 0
+        self._write_meta()
+
+    def _open(self, meta: dict):
+        # (Re)open every file, for a collection opened for the first time or whose files another worker replaced
+        self.model = meta["model"]
+        self.dimensions = meta["dimensions"]
+        self.count = meta["count"]
+        self.generation = meta.get("generation", 0)
+        self.epoch = meta.get("epoch", 0)
+        self.vectors = _open_array(self._file("vectors.npy"), "r+", np.float32)
+        self.deleted = _open_array(self._file("deleted.npy"), "r+", np.bool_)
+        self.capacity = len(self.vectors)
+        self.ids = []
+        self._ids_bytes = 0
+        self._read_ids(self.count)
+        self.rows = {row_id: row for row, row_id in enumerate(self.ids) if not self.deleted[row]}
+        self.deleted_count = self.count - len(self.rows)
+        self.centroids = None
+        self.assignments = None
+        self._lists = None
+        if meta.get("ivf"):
+            self._load_ivf()
+
+    def _read_meta(self) -> dict:
+        with open(self._file("meta.json"), "r") as file:
+            return json.load(file)
+
+    def _read_ids(self, lines: int):
+        # Read the next IDs from where the last read stopped. IDs past the saved count belong to an add
+        # that never finished, and are overwritten by the next one
+        with open(self._file("ids.jsonl"), "rb") as file:
+            file.seek(self._ids_bytes)
+            for _ in range(lines):
+                line = file.readline()
+                if not line.endswith(b"\n"):
+                    break
+                self.ids.append(json.loads(line))
+            self._ids_bytes = file.tell()
+
+    def _refresh(self):
+        # Called with the lock held: catch up with changes other workers made since this one last held it
+        try:
+            meta = self._read_meta()
+        except FileNotFoundError:
+            raise ValueError(f"Collection {self.name} was dropped.")
+        if meta.get("generation", 0) == self.generation:
+            return
+        if meta.get("epoch", 0) != self.epoch:
+            # The files were replaced by a growth, compaction or index build
+            self._open(meta)
+            return
+
+        # Otherwise rows were only appended or marked deleted, in files this worker already maps
+        first, last = self.count, meta["count"]
+        self._read_ids(last - first)
+        self.count = last
+        self.generation = meta["generation"]
+        live = np.flatnonzero(~self.deleted[:self.count]).tolist()
+        self.rows = {self.ids[row]: row for row in live}
+        self.deleted_count = self.count - len(self.rows)
+        if self._lists is not None and last > first:
+            self._extend_lists(first, last)
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """
+        Hold the collection's lock across threads and worker processes, catching up with other workers'
+        changes when it is first taken. Nested uses share the outermost lock, which must be exclusive if
+        any of them is.
+        """
+        with self._lock:
+            if self._lock_depth == 0:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self._lock_exclusive = exclusive
+            elif exclusive and not self._lock_exclusive:
+                raise RuntimeError("A shared collection lock cannot be upgraded.")
+            self._lock_depth += 1
+            try:
+                if self._lock_depth == 1:
+                    self._refresh()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _write_meta(self):
+        # Written last and replaced atomically, so the saved count only covers fully written rows. Each write
+        # bumps the generation, and replacing files bumps the epoch, so other workers know what to reload
+        self.generation += 1
+        meta = {
+            "name": self.name,
+            "model": self.model,
+            "dimensions": self.dimensions,
+            "count": self.count,
+            "capacity": self.capacity,
+            "ivf": self.centroids is not None,
+            "generation": self.generation,
+            "epoch": self.epoch,
+        }
+        temporary_path = self._file("meta.json.tmp")
+        with open(temporary_path, "w") as file:
+            json.dump(meta, file)
+        os.replace(temporary_path, self._file("meta.json"))
+
+    def _rewrite_ids(self):
+        temporary_path = self._file("ids.jsonl.tmp")
+        with open(temporary_path, "w") as file:
+            file.writelines(json.dumps(row_id) + "\n" for row_id in self.ids)
+        os.replace(temporary_path, self._file("ids.jsonl"))
+        self._ids_bytes = os.path.getsize(self._file("ids.jsonl"))
+
+    def _grow(self, required: int):
+        # Double the capacity, so appending n rows costs amortized O(n) copying
+        capacity = max(self.capacity * 2, required)
+        arrays = [("vectors", np.float32, (capacity, self.dimensions)), ("deleted", np.bool_, (capacity,))]
+        if self.assignments is not None:
+            arrays.append(("assignments", np.int32, (capacity,)))
+        for name, dtype, shape in arrays:
+            temporary_path = self._file(f"{name}.tmp.npy")
+            grown = _open_array(temporary_path, "w+", dtype, shape)
+            grown[:self.count] = getattr(self, name)[:self.count]
+            grown.flush()
+            del grown
+            setattr(self, name, None)
+            os.replace(temporary_path, self._file(f"{name}.npy"))
+            setattr(self, name, _open_array(self._file(f"{name}.npy"), "r+", dtype))
+        self.capacity = capacity
+        self.epoch += 1
+
+    def add(self, ids: list, vectors) -> dict:
+        """
+        Add vectors under the given IDs, replacing the vectors of IDs already in the collection.
+
+        Returns:
+            dict: The number of rows added, how many of them replaced existing IDs, and the collection's size.
+        """
+        vectors = normalize_rows(vectors)
+        if vectors.shape != (len(ids), self.dimensions):
+            raise ValueError(f"Expected {len(ids)} vectors of {self.dimensions} dimensions.")
+
+        with self._locked(exclusive=True):
+            replaced = 0
+            for row_id in ids:
+                row = self.rows.pop(row_id, None)
+                if row is not None:
+                    self.deleted[row] = True
+                    self.deleted_count += 1
+                    replaced += 1
+
+            if self.count + len(ids) > self.capacity:
+                self._grow(self.count + len(ids))
+            first = self.count
+            last = first + len(ids)
+            self.vectors[first:last] = vectors
+            self.deleted[first:last] = False
+            # An ID repeated within one add keeps its last vector
+            for offset, row_id in enumerate(ids):
+                previous = self.rows.get(row_id)
+                if previous is not None and previous >= first:
+                    self.deleted[previous] = True
+                    self.deleted_count += 1
+                self.rows[row_id] = first + offset
+            if self.assignments is not None:
+                self._assign(first, last)
+            self.vectors.flush()
+            self.deleted.flush()
+
+            with open(self._file("ids.jsonl"), "r+b") as file:
+                # Drop any IDs left by an add that never finished
+                file.truncate(self._ids_bytes)
+                file.seek(self._ids_bytes)
+                file.write("".join(json.dumps(row_id) + "\n" for row_id in ids).encode("utf-8"))
+                self._ids_bytes = file.tell()
+            self.ids.extend(ids)
+            self.count = last
+            self._write_meta()
+            return {"added": len(ids), "replaced": replaced, "count": len(self.rows)}
+
+    def delete(self, ids: list) -> dict:
+        """
+        Delete vectors by ID, compacting the collection once deleted rows pass `compact_ratio`.
+
+        Returns:
+            dict: The number of IDs that were found and deleted, and the collection's size.
+        """
+        with self._locked(exclusive=True):
+            deleted = 0
+            for row_id in ids:
+                row = self.rows.pop(row_id, None)
+                if row is not None:
+                    self.deleted[row] = True
+                    deleted += 1
+            self.deleted_count += deleted
+            self.deleted.flush()
+            if self.count and self.deleted_count > self.options["compact_ratio"] * self.count:
+                self.compact()
+            elif deleted:
+                self._write_meta()
+            return {"deleted": deleted, "count": len(self.rows)}
+
+    def compact(self):
+        """
+        Rewrite the collection without its deleted rows.
+        """
+        with self._locked(exclusive=True):
+            keep = np.flatnonzero(~self.deleted[:self.count])
+            capacity = max(self.options["initial_capacity"], len(keep))
+            arrays = [("vectors", np.float32, (capacity, self.dimensions)), ("deleted", np.bool_, (capacity,))]
+            if self.assignments is not None:
+                arrays.append(("assignments", np.int32, (capacity,)))
+            for name, dtype, shape in arrays:
+                temporary_path = self._file(f"{name}.tmp.npy")
+                compacted = _open_array(temporary_path, "w+", dtype, shape)
+                # Copy in blocks so compaction never holds the whole matrix in memory
+                for start in range(0, len(keep), self.options["block_rows"]):
+                    rows = keep[start:start + self.options["block_rows"]]
+                    compacted[start:start + len(rows)] = getattr(self, name)[rows]
+                compacted.flush()
+                del compacted
+                setattr(self, name, None)
+                os.replace(temporary_path, self._file(f"{name}.npy"))
+                setattr(self, name, _open_array(self._file(f"{name}.npy"), "r+", dtype))
+
+            self.ids = [self.ids[row] for row in keep]
+            self._rewrite_ids()
+            self.rows = {row_id: row for row, row_id in enumerate(self.ids)}
+            self.count = len(keep)
+            self.capacity = capacity
+            self.deleted_count = 0
+            if self.assignments is not None:
+                self._build_lists()
+            self.epoch += 1
+            self._write_meta()
+
+    def build_ivf(self, nlist: int = None) -> dict:
+        """
+        Train IVF centroids on a sample of the live rows and assign every row to its nearest list.
+
+        Rows added later are assigned to the existing centroids, so the index only needs rebuilding
+        when the data drifts far from what it was trained on.
+        """
+        with self._locked(exclusive=True):
+            live = np.flatnonzero(~self.deleted[:self.count])
+            if len(live) == 0:
+                raise ValueError(f"Collection {self.name} is empty.")
+            nlist = nlist or self.options["nlist"] or int(4 * math.sqrt(len(live)))
+            nlist = max(1, min(nlist, len(live)))
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live, size=min(len(live), self.options["train_sample"]), replace=False))
+            self.centroids = spherical_kmeans(
+                np.asarray(self.vectors[sample]), nlist, self.options["kmeans_iterations"]
+            )
+            np.save(self._file("centroids.npy"), self.centroids)
+            # A new file, so other workers holding the old one reopen it
+            temporary_path = self._file("assignments.tmp.npy")
+            self.assignments = _open_array(temporary_path, "w+", np.int32, (self.capacity,))
+            self._assign(0, self.count)
+            del self.assignments
+            os.replace(temporary_path, self._file("assignments.npy"))
+            self.assignments = _open_array(self._file("assignments.npy"), "r+", np.int32)
+            self.epoch += 1
+            self._write_meta()
+            return self.ivf_stats()
+
+    def _load_ivf(self):
+        self.centroids = np.load(self._file("centroids.npy"))
+        self.assignments = _open_array(self._file("assignments.npy"), "r+", np.int32)
+        self._build_lists()
+
+    def _assign(self, first: int, last: int):
+        # Assign rows to their nearest centroid in blocks, then add them to the inverted lists
+        self.assignments[first:last] = nearest_centroids(self.vectors[first:last], self.centroids)
+        self.assignments.flush()
+        if self._lists is None or first == 0:
+            self._build_lists()
+            return
+        self._extend_lists(first, last)
+
+    def _extend_lists(self, first: int, last: int):
+        # Add rows that were already assigned to the inverted lists
+        new_rows = np.arange(first, last)
+        new_assignments = np.asarray(self.assignments[first:last])
+        for list_id in np.unique(new_assignments):
+            self._lists[list_id].append(new_rows[new_assignments == list_id])
+
+    def _build_lists(self):
+        # Each inverted list is kept as a list of row-index chunks, so appends never copy existing rows
+        assignments = np.asarray(self.assignments[:self.count])
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        self._lists = [[order[bounds[i]:bounds[i + 1]]] for i in range(len(self.centroids))]
+
+    def search(self, queries, k: int = 10, mode: str = "auto", nprobe: int = None) -> list:
+        """
+        Find the k vectors most similar to each query.
+
+        Args:
+            queries: One query vector or a matrix of them.
+            k (int): The number of matches per query.
+            mode (str): "exact" scores every row, "approximate" scores the rows of the `nprobe` nearest IVF
+                lists (training the index first if needed), and "auto" is approximate from `approximate_min_rows` live rows.
+            nprobe (int): The IVF lists scanned per query, or None for the configured default.
+
+        Returns:
+            list: For each query, its matches as (id, cosine similarity), best first.
+        """
+        queries = normalize_rows(queries)
+        if queries.shape[1] != self.dimensions:
+            raise ValueError(f"Expected query vectors of {self.dimensions} dimensions.")
+        with self._locked(exclusive=False):
+            if mode == "auto":
+                mode = "approximate" if len(self.rows) >= self.options["approximate_min_rows"] else "exact"
+            untrained = mode == "approximate" and self.centroids is None
+        if untrained:
+            # Training writes the index, which needs the exclusive lock
+            self.build_ivf()
+        with self._locked(exclusive=False):
+            if mode == "approximate":
+                rows, scores = self._search_ivf(queries, k, nprobe or self.options["nprobe"])
+            else:
+                rows, scores = self._search_exact(queries, k)
+            return [
+                [(self.ids[row], float(score)) for row, score in zip(query_rows, query_scores) if np.isfinite(score)]
+                for query_rows, query_scores in zip(rows, scores)
+            ]
+
+    def _search_exact(self, queries, k):
+        # Score blocks of rows with one matrix product each, keeping a running top k per query
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        block_rows = self.options["block_rows"]
+        for start in range(0, self.count, block_rows):
+            end = min(start + block_rows, self.count)
+            scores = queries @ self.vectors[start:end].T
+            scores[:, self.deleted[start:end]] = -np.inf
+            block_best = top_k(scores, k)
+            best_rows = np.concatenate([best_rows, block_best + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, block_best, axis=1)], axis=1)
+            keep = top_k(best_scores, k)
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+        return best_rows, best_scores
+
+    def _search_ivf(self, queries, k, nprobe):
+        probes = top_k(queries @ self.centroids.T, nprobe)
+        all_rows, all_scores = [], []
+        for query, lists in zip(queries, probes):
+            # Sorted row order reads the memory map sequentially
+            candidates = np.sort(np.concatenate([chunk for list_id in lists for chunk in self._lists[list_id]]))
+            candidates = candidates[~self.deleted[candidates]]
+            scores = (self.vectors[candidates] @ query)[None, :]
+            best = top_k(scores, k)[0]
+            all_rows.append(candidates[best])
+            all_scores.append(scores[0, best])
+        return all_rows, all_scores
+
+    def ivf_stats(self) -> dict:
+        """
+        Return the IVF index size, or None if it has not been built.
+        """
+        if self.centroids is None:
+            return None
+        sizes = [sum(len(chunk) for chunk in chunks) for chunks in self._lists]
+        return {"nlist": len(self.centroids), "largest_list": max(sizes), "mean_list": sum(sizes) / len(sizes)}
+
+    def stats(self) -> dict:
+        """
+        Return the collection's size and index state.
+        """
+        with self._locked(exclusive=False):
+            return {
+                "name": self.name,
+                "model": self.model,
+                "dimensions": self.dimensions,
+                "count": len(self.rows),
+                "rows": self.count,
+                "deleted_rows": self.deleted_count,
+                "capacity": self.capacity,
+                "bytes": self.capacity * self.dimensions * 4,
+                "ivf": self.ivf_stats(),
+            }
+
+    def close(self):
+        """
+        Release the memory maps and the lock file.
+        """
+        with self._lock:
+            self.vectors = self.deleted = self.assignments = None
+            self._lock_file.close()
+
+    def is_current(self) -> bool:
+        """
+        Check that the collection on disk is still the one this object opened, and was not dropped or
+        dropped and created again by another worker.
+        """
+        try:
+            return os.stat(self._file("lock")).st_ino == os.fstat(self._lock_file.fileno()).st_ino
+        except (OSError, ValueError):
+            return False
+
+class VectorIndex:
+    def __init__(self, options: dict):
+        """
+        Initialize the VectorIndex class, which opens and creates named collections under one directory.
+
+        Args:
+            options (dict): The vector index options.
+        """
+        self.options = options
+        self.directory = options["directory"]
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        if not COLLECTION_NAME.match(name):
+            raise ValueError(f"Invalid collection name {name}.")
+        return os.path.join(self.directory, name)
+
+    def get(self, name: str) -> VectorCollection:
+        """
+        Retrieve a collection, opening it from disk on first use.
+
+        Returns:
+            VectorCollection: The collection, or None if it does not exist.
+        """
+        path = self._path(name)
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is not None and not collection.is_current():
+                # Another worker dropped the collection since it was opened here
+                self._collections.pop(name)
+                collection.close()
+                collection = None
+            if collection is None and os.path.exists(os.path.join(path, "meta.json")):
+                try:
+                    collection = VectorCollection(path, name, self.options)
+                except FileNotFoundError:
+                    return None
+                self._collections[name] = collection
+            return collection
+
+    def get_or_create(self, name: str, dimensions: int, model: str) -> VectorCollection:
+        """
+        Retrieve a collection, creating it for the given vector size and model if it does not exist.
+
+        Raises:
+            ValueError: If the collection exists with vectors from a different model.
+        """
+        collection = self.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = VectorCollection(self._path(name), name, self.options, dimensions, model)
+                    self._collections[name] = collection
+        if collection.model != model:
+            raise ValueError(f"Collection {name} holds vectors from model {collection.model}, not {model}.")
+        return collection
+
+    def drop(self, name: str) -> bool:
+        """
+        Delete a collection and its files.
+
+        Returns:
+            bool: True if the collection existed.
+        """
+        collection = self.get(name)
+        if collection is None:
+            return False
+        with self._lock:
+            self._collections.pop(name, None)
+            try:
+                # Wait for other workers' writes and searches on the collection to finish
+                with collection._locked(exclusive=True):
+                    shutil.rmtree(self._path(name))
+            except ValueError:
+                # Another worker dropped it first
+                return False
+            finally:
+                collection.close()
+        return True
+
+    def names(self) -> list:
+        """
+        List the collections on disk.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if COLLECTION_NAME.match(name) and os.path.exists(os.path.join(self.directory, name, "meta.json"))
+        )
+
+# Shared index, created on first use from the "vector_index" settings
+_vector_index = None
+
+def get_vector_index() -> VectorIndex:
+    """
+    Retrieve the shared vector index, creating it on first use.
+    """
+    global _vector_index
+    if _vector_index is None:
+        _vector_index = VectorIndex(index_options())
+    return _vector_index